@@ -0,0 +1,79 @@
+"""
+Raw-binary and multipart image uploads
+
+The ``/upload`` variants of the inference endpoints take the image bytes
+directly instead of a base64 string inside JSON. Parameters travel as
+query string fields or, for multipart requests, as form fields.
+"""
+
+from typing import Dict, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.datastructures import UploadFile
+
+# Multipart field names accepted for the image part
+IMAGE_FIELDS = ("file", "image")
+
+# OpenAPI request body shared by the upload endpoints
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/octet-stream": {
+                "schema": {"type": "string", "format": "binary"}
+            },
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+
+async def read_image_upload(request: Request) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Read the uploaded image and its parameters from the request
+
+    ``multipart/form-data`` requests carry the image in a ``file`` (or
+    ``image``) part and parameters as form fields. Any other content type
+    is treated as the raw encoded image (``application/octet-stream``).
+    Query string parameters apply to both; form fields take precedence.
+
+    Args:
+        request: FastAPI request object
+
+    Returns:
+        tuple: Image bytes and a dict of string parameters
+
+    Raises:
+        HTTPException: If no image was uploaded
+    """
+    params = dict(request.query_params)
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = next(
+            (form.get(name) for name in IMAGE_FIELDS if isinstance(form.get(name), UploadFile)),
+            None
+        )
+        if upload is None:
+            raise HTTPException(status_code=400, detail="Missing image file part")
+        image_bytes = await upload.read()
+        params.update({key: value for key, value in form.items() if isinstance(value, str)})
+    else:
+        image_bytes = await request.body()
+
+    if not image_bytes:
+        raise HTTPException(status_code=400, detail="Empty image upload")
+
+    return image_bytes, params
+
+
+def param_flag(params: Dict[str, str], name: str) -> bool:
+    """Read a boolean query/form parameter (``1``, ``true``, ``yes``, ``on``)"""
+    return params.get(name, "").strip().lower() in ("1", "true", "yes", "on")
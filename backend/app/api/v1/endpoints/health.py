@@ -0,0 +1,47 @@
+"""
+Health API Endpoint
+
+Reports worker liveness, readiness and inference executor load.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.inference import get_inference_executor
+from app.services.ocr_cache import get_ocr_cache
+from app.services.ocr_pipeline import pipeline_stats
+
+router = APIRouter()
+
+
+@router.get("/health", tags=["Health"])
+async def health():
+    """
+    Report liveness, inference executor queue depth / wait times,
+    OCR pipeline counters such as recognizer micro-batch sizes and
+    OCR result cache hit/miss counters.
+
+    Cheap enough to poll: it never touches the inference workers.
+    """
+    return {
+        "status": "ok",
+        "inference": get_inference_executor().stats(),
+        "warmup": get_inference_executor().warmup_state(),
+        "pipelines": pipeline_stats(),
+        "ocr_cache": get_ocr_cache().stats() if get_ocr_cache() is not None else None
+    }
+
+
+@router.get("/ready", tags=["Health"])
+async def ready():
+    """
+    Readiness probe
+
+    Returns 503 until the inference workers have created and warmed up
+    every model session (``WARMUP_ON_STARTUP``), and if the warmup failed.
+    """
+    executor = get_inference_executor()
+    warmup = executor.warmup_state()
+    if not executor.ready:
+        return JSONResponse(status_code=503, content={"status": "not_ready", "warmup": warmup})
+    return {"status": "ready", "warmup": warmup}
@@ -0,0 +1,153 @@
+"""
+Metrics API Endpoint
+
+Exposes stage timing histograms, inference queue depth, OCR cache hit
+rates, crop paths, angle classification counters, per-language
+recognizer loads / evictions, recognizer micro-batching counters and
+recognizer input padding in Prometheus text format.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import REQUEST_SECONDS, STAGE_SECONDS, render_samples
+from app.services.inference import get_inference_executor
+from app.services.ocr_cache import get_ocr_cache
+from app.services.ocr_pipeline import pipeline_stats
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _executor_metrics() -> list:
+    stats = get_inference_executor().stats()
+    labels = {"backend": stats["backend"]}
+    lines = []
+    lines += render_samples(
+        "komiix_inference_workers", "gauge", "Inference workers",
+        [(labels, stats["workers"])]
+    )
+    lines += render_samples(
+        "komiix_inference_queue_depth", "gauge", "Inference jobs waiting for a worker",
+        [(labels, stats["queue_depth"])]
+    )
+    lines += render_samples(
+        "komiix_inference_running", "gauge", "Inference jobs currently running",
+        [(labels, stats["running"])]
+    )
+    lines += render_samples(
+        "komiix_inference_jobs_total", "counter", "Inference jobs by outcome",
+        [({**labels, "state": state}, stats[state]) for state in ("submitted", "completed", "rejected")]
+    )
+    lines += render_samples(
+        "komiix_inference_wait_seconds_max", "gauge", "Longest queue wait observed",
+        [(labels, stats["wait_seconds_max"])]
+    )
+    return lines
+
+
+def _cache_metrics() -> list:
+    cache = get_ocr_cache()
+    if cache is None:
+        return []
+    stats = cache.stats()
+    lines = []
+    lines += render_samples(
+        "komiix_ocr_cache_requests_total", "counter", "OCR cache lookups by result",
+        [({"result": "hit"}, stats["hits"]),
+         ({"result": "miss"}, stats["misses"]),
+         ({"result": "bypass"}, stats["bypassed"])]
+    )
+    lines += render_samples(
+        "komiix_ocr_cache_hit_ratio", "gauge", "OCR cache hits over lookups",
+        [({}, stats["hit_ratio"])]
+    )
+    lines += render_samples(
+        "komiix_ocr_cache_writes_total", "counter", "OCR cache writes by outcome",
+        [({"outcome": "stored"}, stats["stored"]),
+         ({"outcome": "skipped_oversize"}, stats["skipped_oversize"]),
+         ({"outcome": "evicted"}, stats["evicted"])]
+    )
+    return lines
+
+
+def _rec_shape_metrics(stats: dict) -> list:
+    plans = ("executed", "legacy") if "legacy_input_columns" in stats else ("executed",)
+    prefixes = {"executed": "", "legacy": "legacy_"}
+    lines = []
+    lines += render_samples(
+        "komiix_rec_input_columns_total", "counter",
+        "Recognizer input columns (batch x width) by plan; legacy pads each batch to its widest crop",
+        [({"plan": plan}, stats[prefixes[plan] + "input_columns"]) for plan in plans]
+    )
+    lines += render_samples(
+        "komiix_rec_padding_ratio", "gauge", "Share of recognizer input columns that are padding",
+        [({"plan": plan}, stats[prefixes[plan] + "padding_ratio"]) for plan in plans]
+    )
+    lines += render_samples(
+        "komiix_rec_distinct_widths", "gauge", "Distinct recognizer input widths seen",
+        [({"plan": plan}, stats[prefixes[plan] + "distinct_widths"]) for plan in plans]
+    )
+    return lines
+
+
+def _pipeline_metrics() -> list:
+    lines = []
+    pipelines = pipeline_stats()
+    if "crops" in pipelines:
+        lines += render_samples(
+            "komiix_ocr_crops_total", "counter", "Text boxes cropped by path; slice skips the perspective warp",
+            [({"path": path}, count) for path, count in pipelines["crops"].items()]
+        )
+    if "cls" in pipelines:
+        lines += render_samples(
+            "komiix_ocr_cls_crops_total", "counter",
+            "Crops by angle classification outcome; lazy mode only classifies low-confidence crops",
+            [({"outcome": outcome}, count) for outcome, count in pipelines["cls"].items()]
+        )
+    if "rec_languages" in pipelines:
+        registry = pipelines["rec_languages"]
+        lines += render_samples(
+            "komiix_ocr_rec_language_total", "counter", "Per-language recognizer lookups by outcome",
+            [({"outcome": outcome}, registry[outcome]) for outcome in ("hits", "loads", "evictions")]
+        )
+        lines += render_samples(
+            "komiix_ocr_rec_language_resident_bytes", "gauge", "Model bytes of the loaded per-language recognizers",
+            [({}, registry["resident_bytes"])]
+        )
+    if "rec_shapes" in pipelines:
+        lines += _rec_shape_metrics(pipelines["rec_shapes"])
+    stats = pipelines.get("rec_microbatch")
+    if stats is None:
+        return lines
+    lines += render_samples(
+        "komiix_rec_microbatch_total", "counter", "Recognizer micro-batching counters",
+        [({"kind": kind}, stats[kind]) for kind in ("requests", "crops", "batches", "full_batches")]
+    )
+    lines += render_samples(
+        "komiix_rec_microbatch_avg_batch_crops", "gauge", "Average crops per recognizer batch",
+        [({}, stats["avg_batch_crops"])]
+    )
+    lines += render_samples(
+        "komiix_rec_microbatch_queue_depth", "gauge", "Recognition requests waiting for a batch",
+        [({}, stats["queue_depth"])]
+    )
+    return lines
+
+
+@router.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+
+    Like ``/health`` it only reads counters and never touches the
+    inference workers.
+    """
+    lines = []
+    lines += STAGE_SECONDS.render()
+    lines += REQUEST_SECONDS.render()
+    lines += _executor_metrics()
+    lines += _cache_metrics()
+    lines += _pipeline_metrics()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
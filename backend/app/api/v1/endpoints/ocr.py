@@ -1,191 +1,353 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from loguru import logger
-from typing import List
+import asyncio
 import base64
-import cv2
-import numpy as np
 import time
-import os
-from PIL import Image
+from typing import AsyncIterator, Dict, Optional, Tuple
 
 from app.api.deps import limiter, verify_jwt
-from app.schemas.ocr import OCRRequest, OCRResponse, BoundingBox
-from lib.manga_ocr import MangaOCR, TextDetector
-from lib.onnx_ocr.onnx_paddleocr import ONNXPaddleOcr
+from app.api.uploads import UPLOAD_OPENAPI, param_flag, read_image_upload
+from app.core.config import get_settings
+from app.core.metrics import REQUEST_SECONDS, record_timings, server_timing_header
+from app.schemas.ocr import (
+    OCRBatchPageResult,
+    OCRBatchRequest,
+    OCRRegion,
+    OCRRegionsRequest,
+    OCRRequest,
+    OCRResponse
+)
+from app.services.inference import get_inference_executor
+from app.services.ocr_cache import get_ocr_cache
+from app.services.ocr_pipeline import pipeline_name, run_ocr, run_ocr_regions
+from app.utils.image import ImageDecodeError
 
 router = APIRouter()
 
-# Initialize ONNX OCR model
-model = ONNXPaddleOcr(use_angle_cls=True, use_gpu=False)
 
-# Initialize TextDetector and MangaOCR for Japanese (lazy initialization)
-_text_detector = None
-_manga_ocr = None
+async def _cached_ocr(image_bytes: bytes, language: str, cache_control: str) -> Tuple[dict, str]:
+    """
+    Serve OCR from the result cache or execute it on an inference worker
+
+    ``Cache-Control: no-cache`` skips the lookup and refreshes the entry,
+    ``no-store`` skips the cache entirely.
+
+    Per-stage ``timings`` of inference runs are fed into the metrics
+    histograms; they are not cached, a hit only reports ``cache_lookup``.
+
+    Returns:
+        tuple: OCR response dict and cache status (HIT, MISS, BYPASS or DISABLED)
+    """
+    start = time.perf_counter()
+    pipeline = pipeline_name(language)
+    cache = get_ocr_cache()
+    cache_key = None
+    cache_status = "DISABLED"
 
+    if cache is not None:
+        cache_key = await cache.key(image_bytes, language)
+        if cache.should_bypass(cache_control):
+            cache.record_bypass()
+            cache_status = "BYPASS"
+        else:
+            cached = await cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"OCR cache hit for {cache_key}")
+                elapsed = time.perf_counter() - start
+                REQUEST_SECONDS.observe(elapsed, pipeline=pipeline, cache="HIT")
+                return {**cached, "timings": {"cache_lookup": elapsed}}, "HIT"
+            cache_status = "MISS"
+
+    try:
+        result = await get_inference_executor().run_image(run_ocr, image_bytes, language)
+    except ImageDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Error decoding image: {str(e)}")
 
-def get_text_detector():
-    """Lazy initialization of TextDetector"""
-    global _text_detector
-    if _text_detector is None:
-        _text_detector = TextDetector()
-    return _text_detector
+    record_timings(pipeline, result.get("timings"))
 
+    if cache_key is not None and "no-store" not in cache_control.lower():
+        await cache.set(cache_key, {k: v for k, v in result.items() if k != "timings"})
 
-def get_manga_ocr():
-    """Lazy initialization of MangaOCR"""
-    global _manga_ocr
-    if _manga_ocr is None:
-        _manga_ocr = MangaOCR()
-    return _manga_ocr
+    REQUEST_SECONDS.observe(time.perf_counter() - start, pipeline=pipeline, cache=cache_status)
+    return result, cache_status
 
 
-def polygon_to_bbox(polygon):
+async def _run_ocr(
+    request: Request,
+    response: Response,
+    image_bytes: bytes,
+    language: str,
+    include_timings: bool,
+    timings: Optional[Dict[str, float]] = None
+) -> dict:
     """
-    Convert a 4-point polygon to bounding box format [x1, y1, x2, y2]
+    Run OCR for a single page
+
+    The cache outcome is reported in ``X-OCR-Cache`` and the stage timings
+    in ``Server-Timing``; ``timings`` stays in the body only on request.
     """
-    # If polygon is a numpy array, convert to list
-    if hasattr(polygon, 'tolist'):
-        polygon = polygon.tolist()
-    
-    # Verify we have valid data
-    if polygon is None or len(polygon) < 4:
-        return [0, 0, 0, 0]
-    
-    # Extract all x and y coordinates
-    x_coords = [point[0] for point in polygon]
-    y_coords = [point[1] for point in polygon]
-    
-    # Find min and max
-    x1 = min(x_coords)
-    y1 = min(y_coords)
-    x2 = max(x_coords)
-    y2 = max(y_coords)
-    
-    return [x1, y1, x2, y2]
-
-
-@router.post("/ocr", tags=["OCR"], dependencies=[Depends(verify_jwt)], response_model=OCRResponse)
+    result, cache_status = await _cached_ocr(
+        image_bytes, language, request.headers.get("cache-control", "")
+    )
+    result["timings"] = {**(timings or {}), **result.get("timings", {})}
+
+    response.headers["X-OCR-Cache"] = cache_status
+    response.headers["Server-Timing"] = server_timing_header(result["timings"])
+    if not include_timings:
+        result.pop("timings")
+
+    logger.info(f"Final OCR results: {result['results']}")
+    return result
+
+
+@router.post(
+    "/ocr",
+    tags=["OCR"],
+    dependencies=[Depends(verify_jwt)],
+    response_model=OCRResponse,
+    response_model_exclude_none=True
+)
 @limiter.limit("200/minute")
 async def ocr_service(
     request: Request,
+    response: Response,
     ocr_request: OCRRequest,
     payload: dict = Depends(verify_jwt)
 ):
     logger.info(f"User {payload.get('sub')} requested OCR")
     try:
         # Decode base64 image
+        decode_start = time.perf_counter()
         try:
             image_bytes = base64.b64decode(ocr_request.image)
-            image_np = np.frombuffer(image_bytes, dtype=np.uint8)
-            img = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
-            if img is None:
-                raise HTTPException(status_code=400, detail="Could not decode image from base64")
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error decoding image: {str(e)}")
+        timings = {"base64_decode": time.perf_counter() - decode_start}
 
-        # Execute OCR based on language
-        start_time = time.time()
-        
-        if ocr_request.language.lower() == 'jpn':
-            # Use TextDetector + MangaOCR for Japanese
-            logger.info("Using TextDetector + MangaOCR for Japanese text")
-            
-            # Convert CV2 image (BGR) to PIL Image (RGB)
-            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            pil_image = Image.fromarray(img_rgb)
-            
-            # Get detector and OCR instances
-            detector = get_text_detector()
-            manga_ocr = get_manga_ocr()
-            
-            # Detect text regions with absolute coordinates
-            text_blocks = detector(pil_image)
-            logger.info(f"Detected {len(text_blocks)} text blocks")
-            
-            ocr_results = []
-            img_width, img_height = pil_image.size
-            padding = 5  # Padding around detected regions
-            
-            for block in text_blocks:
-                x1, y1, x2, y2 = block.xyxy
-                
-                # Add padding and clamp to image bounds
-                x1 = max(0, int(x1) - padding)
-                y1 = max(0, int(y1) - padding)
-                x2 = min(img_width, int(x2) + padding)
-                y2 = min(img_height, int(y2) + padding)
-                
-                # Skip if region is too small
-                if (x2 - x1) < 10 or (y2 - y1) < 10:
-                    logger.debug(f"Skipping small region: {x1},{y1},{x2},{y2}")
-                    continue
-                
-                # Crop the detected region
-                cropped = pil_image.crop((x1, y1, x2, y2))
-                
-                # Run OCR on cropped region
-                try:
-                    text = manga_ocr(cropped)
-                    
-                    if text and text.strip():
-                        ocr_results.append({
-                            "text": text,
-                            "confidence": block.confidence,
-                            "bounding_box": {
-                                "x0": x1,
-                                "y0": y1,
-                                "x1": x2,
-                                "y1": y2
-                            }
-                        })
-                        logger.debug(f"OCR result for block: {text}")
-                except Exception as e:
-                    logger.error(f"Error running OCR on block {block.xyxy}: {e}")
-                    continue
-            
-            processing_time = time.time() - start_time
-            logger.info(f"MangaOCR processed {len(ocr_results)} text regions")
-        else:
-            # Use OnnxOCR for other languages
-            logger.info("Using OnnxOCR for non-Japanese text")
-            result = model.ocr(img)
-            processing_time = time.time() - start_time
+        return await _run_ocr(
+            request, response, image_bytes, ocr_request.language, ocr_request.include_timings, timings
+        )
 
-            logger.info(f"OCR result format: {type(result)}")
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error in OCR service: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-            # Format results
-            ocr_results = []
-            for line in result[0]:
-                try:
-                    # bounding_box is numpy array of shape (4, 2)
-                    polygon = line[0]
-                    bbox = polygon_to_bbox(polygon)
-                    text = line[1][0]
-                    confidence = float(line[1][1])
-
-                    ocr_results.append({
-                        "text": text,
-                        "confidence": confidence,
-                        "bounding_box": {
-                            "x0": bbox[0],
-                            "y0": bbox[1],
-                            "x1": bbox[2],
-                            "y1": bbox[3]
-                        }
-                    })
 
-                except Exception as e:
-                    logger.error(f"Error processing result: {str(e)}")
-                    continue
+@router.post(
+    "/ocr/upload",
+    tags=["OCR"],
+    dependencies=[Depends(verify_jwt)],
+    response_model=OCRResponse,
+    response_model_exclude_none=True,
+    openapi_extra=UPLOAD_OPENAPI
+)
+@limiter.limit("200/minute")
+async def ocr_upload_service(
+    request: Request,
+    response: Response,
+    payload: dict = Depends(verify_jwt)
+):
+    """
+    OCR on an image sent as raw ``application/octet-stream`` or as a
+    multipart file part, skipping the base64/JSON round trip.
 
-        logger.info(f"Final OCR results: {ocr_results}")
-        return {
-            "processing_time": processing_time,
-            "results": ocr_results
-        }
+    ``language`` and ``include_timings`` are read from the query string or
+    form fields.
+    """
+    logger.info(f"User {payload.get('sub')} requested OCR upload")
+    try:
+        image_bytes, params = await read_image_upload(request)
+        return await _run_ocr(
+            request,
+            response,
+            image_bytes,
+            params.get("language", "eng"),
+            param_flag(params, "include_timings")
+        )
 
     except HTTPException as he:
         raise he
     except Exception as e:
         logger.error(f"Error in OCR service: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+def _region_quad(index: int, region: OCRRegion) -> list:
+    """Four ``[x, y]`` points of a region; 400 unless it has exactly one valid shape"""
+    if (region.bounding_box is None) == (region.polygon is None):
+        raise HTTPException(
+            status_code=400, detail=f"Region {index}: set exactly one of bounding_box or polygon"
+        )
+    if region.bounding_box is not None:
+        box = region.bounding_box
+        if box.x1 <= box.x0 or box.y1 <= box.y0:
+            raise HTTPException(status_code=400, detail=f"Region {index}: empty bounding_box")
+        return [[box.x0, box.y0], [box.x1, box.y0], [box.x1, box.y1], [box.x0, box.y1]]
+    if len(region.polygon) != 4 or any(len(point) != 2 for point in region.polygon):
+        raise HTTPException(status_code=400, detail=f"Region {index}: polygon needs four [x, y] points")
+    return [list(point) for point in region.polygon]
+
+
+@router.post(
+    "/ocr/regions",
+    tags=["OCR"],
+    dependencies=[Depends(verify_jwt)],
+    response_model=OCRResponse,
+    response_model_exclude_none=True
+)
+@limiter.limit("200/minute")
+async def ocr_regions_service(
+    request: Request,
+    response: Response,
+    regions_request: OCRRegionsRequest,
+    payload: dict = Depends(verify_jwt)
+):
+    """
+    Recognize regions the client already detected, skipping detection.
+
+    Each region is a ``bounding_box`` or a four-point ``polygon`` in page
+    pixels. ``results[i]`` belongs to ``regions[i]``, with empty text when
+    nothing was recognized. Results are not cached. Japanese regions are
+    recognized by MangaOCR, which has no score, so their results carry no
+    ``confidence``.
+    """
+    settings = get_settings()
+    region_count = len(regions_request.regions)
+    logger.info(f"User {payload.get('sub')} requested OCR of {region_count} regions")
+
+    if region_count == 0:
+        raise HTTPException(status_code=400, detail="No regions provided")
+    if region_count > settings.OCR_REGIONS_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many regions: {region_count} (max {settings.OCR_REGIONS_MAX})"
+        )
+    quads = [_region_quad(index, region) for index, region in enumerate(regions_request.regions)]
+
+    try:
+        start = time.perf_counter()
+        try:
+            image_bytes = base64.b64decode(regions_request.image)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error decoding image: {str(e)}")
+        timings = {"base64_decode": time.perf_counter() - start}
+
+        try:
+            result = await get_inference_executor().run_image(
+                run_ocr_regions, image_bytes, regions_request.language, quads
+            )
+        except ImageDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Error decoding image: {str(e)}")
+
+        pipeline = f"{pipeline_name(regions_request.language)}_regions"
+        record_timings(pipeline, result.get("timings"))
+        REQUEST_SECONDS.observe(time.perf_counter() - start, pipeline=pipeline, cache="NONE")
+
+        result["timings"] = {**timings, **result.get("timings", {})}
+        response.headers["Server-Timing"] = server_timing_header(result["timings"])
+        if not regions_request.include_timings:
+            result.pop("timings")
+        return result
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error in OCR regions service: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+async def _stream_batch(
+    pages: list,
+    language: str,
+    cache_control: str,
+    max_in_flight: int,
+    include_timings: bool
+) -> AsyncIterator[str]:
+    """
+    Yield one NDJSON line per page in completion order
+
+    At most ``max_in_flight`` pages are decoded and held in memory at once.
+    Their detection and recognition overlap on the inference workers, and
+    recognition crops of concurrent pages share micro-batches.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def process(index: int, image: str) -> str:
+        async with semaphore:
+            try:
+                decode_start = time.perf_counter()
+                try:
+                    image_bytes = base64.b64decode(image)
+                except Exception as e:
+                    raise HTTPException(status_code=400, detail=f"Error decoding image: {str(e)}")
+                decode_time = time.perf_counter() - decode_start
+                result, cache_status = await _cached_ocr(image_bytes, language, cache_control)
+                if include_timings:
+                    result["timings"] = {"base64_decode": decode_time, **result.get("timings", {})}
+                else:
+                    result.pop("timings", None)
+                line = OCRBatchPageResult(index=index, cache=cache_status, **result)
+            except HTTPException as he:
+                line = OCRBatchPageResult(index=index, status_code=he.status_code, error=str(he.detail))
+            except Exception as e:
+                logger.error(f"Error in batch OCR page {index}: {str(e)}", exc_info=True)
+                line = OCRBatchPageResult(
+                    index=index, status_code=500, error=f"Internal server error: {str(e)}"
+                )
+        return line.model_dump_json(exclude_none=True) + "\n"
+
+    tasks = [asyncio.create_task(process(index, image)) for index, image in enumerate(pages)]
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            yield await next_page
+    finally:
+        # Client went away: drop pages that have not reached a worker yet
+        for task in tasks:
+            task.cancel()
+
+
+@router.post(
+    "/ocr/batch",
+    tags=["OCR"],
+    dependencies=[Depends(verify_jwt)],
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One OCRBatchPageResult per line"}}
+)
+@limiter.limit("30/minute")
+async def ocr_batch_service(
+    request: Request,
+    batch_request: OCRBatchRequest,
+    payload: dict = Depends(verify_jwt)
+):
+    """
+    OCR every page of a chapter in one request.
+
+    Results are streamed as newline-delimited JSON (``OCRBatchPageResult``)
+    as soon as each page is ready, so lines arrive out of order; ``index``
+    points back into ``images``. A failing page yields a line with
+    ``status_code`` and ``error`` instead of failing the whole batch.
+    """
+    settings = get_settings()
+    page_count = len(batch_request.images)
+    logger.info(f"User {payload.get('sub')} requested batch OCR of {page_count} pages")
+
+    if page_count == 0:
+        raise HTTPException(status_code=400, detail="No images provided")
+    if page_count > settings.OCR_BATCH_MAX_PAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many images: {page_count} (max {settings.OCR_BATCH_MAX_PAGES})"
+        )
+
+    return StreamingResponse(
+        _stream_batch(
+            batch_request.images,
+            batch_request.language,
+            request.headers.get("cache-control", ""),
+            settings.OCR_BATCH_MAX_IN_FLIGHT,
+            batch_request.include_timings
+        ),
+        media_type="application/x-ndjson"
+    )
@@ -4,19 +4,26 @@ Text Coordinates API Endpoint
 Provides text coordinate calculation for manga/comic bubble text placement.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
 from loguru import logger
+from pydantic import ValidationError
 import base64
-import cv2
-import numpy as np
 import time
-import tempfile
-import os
 from pathlib import Path
+from typing import Dict, Tuple
 
 from app.api.deps import limiter, verify_jwt
-from app.schemas.text_coordinates import TextCoordinatesRequest, TextCoordinatesResponse
-from lib.text_centralization import process_bubble_from_array
+from app.api.uploads import UPLOAD_OPENAPI, read_image_upload
+from app.core.metrics import REQUEST_SECONDS, record_timings, server_timing_header
+from app.schemas.text_coordinates import (
+    TextCoordinatesRequest,
+    TextCoordinatesResponse,
+    TextCoordinatesUploadParams
+)
+from app.services.inference import get_inference_executor
+from app.services.text_layout import SeedPointOutsideImageError, calculate_text_layout
+from app.utils.image import ImageDecodeError
 
 router = APIRouter()
 
@@ -56,15 +63,84 @@ def get_font_path(font_id: str) -> str:
     )
 
 
+async def _layout_text(
+    response: Response,
+    image_bytes: bytes,
+    seed_point: Tuple[float, float],
+    font_id: str,
+    text: str,
+    include_timings: bool,
+    timings: Dict[str, float] = None
+) -> TextCoordinatesResponse:
+    """
+    Resolve the font and run the bubble layout on an inference worker
+
+    Stage timings are reported in ``Server-Timing`` and kept in the body
+    only when ``include_timings`` is set.
+    """
+    start = time.perf_counter()
+    # Get font path
+    try:
+        font_path = get_font_path(font_id)
+        logger.info(f"Using font: {font_path}")
+    except HTTPException as e:
+        logger.error(f"Font not found: {font_id}")
+        raise e
+
+    # Execute text coordinate calculation on an inference worker
+    try:
+        layout = await get_inference_executor().run_image(
+            calculate_text_layout,
+            image_bytes,
+            seed_point,
+            font_path,
+            text
+        )
+    except ImageDecodeError as e:
+        logger.error(f"Error decoding image: {str(e)}")
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Error decoding image: {str(e)}"
+        )
+    except SeedPointOutsideImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing bubble: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing bubble: {str(e)}"
+        )
+
+    logger.info(
+        f"Text coordinates calculated: x={layout['left']}, y={layout['top']}, "
+        f"w={layout['width']}, h={layout['height']}, font_size={layout['font_size']}, "
+        f"processing_time={layout['processing_time']:.3f}s"
+    )
+
+    record_timings("text_layout", layout.get("timings"))
+    REQUEST_SECONDS.observe(time.perf_counter() - start, pipeline="text_layout", cache="NONE")
+
+    layout["timings"] = {**(timings or {}), **layout.get("timings", {})}
+    response.headers["Server-Timing"] = server_timing_header(layout["timings"])
+    if not include_timings:
+        layout.pop("timings")
+
+    return TextCoordinatesResponse(**layout)
+
+
 @router.post(
     "/text-coordinates", 
     tags=["Text Coordinates"], 
     dependencies=[Depends(verify_jwt)], 
-    response_model=TextCoordinatesResponse
+    response_model=TextCoordinatesResponse,
+    response_model_exclude_none=True
 )
 @limiter.limit("200/minute")
 async def calculate_text_coordinates(
     request: Request,
+    response: Response,
     text_request: TextCoordinatesRequest,
     payload: dict = Depends(verify_jwt)
 ):
@@ -77,6 +153,7 @@ async def calculate_text_coordinates(
     
     Args:
         request: FastAPI request object
+        response: Response whose headers receive ``Server-Timing``
         text_request: Text coordinates request with image and parameters
         payload: JWT payload from authentication
         
@@ -87,15 +164,9 @@ async def calculate_text_coordinates(
     
     try:
         # Decode base64 image
+        decode_start = time.perf_counter()
         try:
             image_bytes = base64.b64decode(text_request.image)
-            image_np = np.frombuffer(image_bytes, dtype=np.uint8)
-            img = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
-            if img is None:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Could not decode image from base64"
-                )
         except Exception as e:
             logger.error(f"Error decoding image: {str(e)}")
             raise HTTPException(
@@ -103,59 +174,20 @@ async def calculate_text_coordinates(
                 detail=f"Error decoding image: {str(e)}"
             )
 
-        # Get font path
-        try:
-            font_path = get_font_path(text_request.font_id)
-            logger.info(f"Using font: {font_path}")
-        except HTTPException as e:
-            logger.error(f"Font not found: {text_request.font_id}")
-            raise e
+        timings = {"base64_decode": time.perf_counter() - decode_start}
 
         # Extract seed point
         seed_point = (text_request.seed_point.x, text_request.seed_point.y)
-        
-        # Validate seed point is within image bounds
-        if not (0 <= seed_point[0] < img.shape[1] and 0 <= seed_point[1] < img.shape[0]):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Seed point ({seed_point[0]}, {seed_point[1]}) is outside image bounds"
-            )
 
-        # Execute text coordinate calculation
-        start_time = time.time()
-        
-        try:
-            # Process bubble and get coordinates
-            (x, y, h, w), font_size, hyphenations = process_bubble_from_array(
-                image=img,
-                seed_point=seed_point,
-                font_path=font_path,
-                text=text_request.text
-            )
-            
-            processing_time = time.time() - start_time
-            
-            logger.info(
-                f"Text coordinates calculated: x={x}, y={y}, w={w}, h={h}, "
-                f"font_size={font_size}, processing_time={processing_time:.3f}s"
-            )
-            
-            # Return response
-            return TextCoordinatesResponse(
-                top=float(y),
-                left=float(x),
-                width=float(w),
-                height=float(h),
-                font_size=float(font_size),
-                processing_time=processing_time
-            )
-            
-        except Exception as e:
-            logger.error(f"Error processing bubble: {str(e)}", exc_info=True)
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error processing bubble: {str(e)}"
-            )
+        return await _layout_text(
+            response,
+            image_bytes,
+            seed_point,
+            text_request.font_id,
+            text_request.text,
+            text_request.include_timings,
+            timings
+        )
 
     except HTTPException as he:
         raise he
@@ -165,3 +197,64 @@ async def calculate_text_coordinates(
             status_code=500, 
             detail=f"Internal server error: {str(e)}"
         )
+
+
+@router.post(
+    "/text-coordinates/upload",
+    tags=["Text Coordinates"],
+    dependencies=[Depends(verify_jwt)],
+    response_model=TextCoordinatesResponse,
+    response_model_exclude_none=True,
+    openapi_extra=UPLOAD_OPENAPI
+)
+@limiter.limit("200/minute")
+async def calculate_text_coordinates_upload(
+    request: Request,
+    response: Response,
+    payload: dict = Depends(verify_jwt)
+):
+    """
+    Calculate text coordinates for a bubble image sent as raw
+    ``application/octet-stream`` or as a multipart file part.
+
+    ``seed_x``, ``seed_y``, ``text`` and ``font_id`` (plus optional
+    ``font_family`` and ``include_timings``) are read from the query string
+    or form fields.
+    
+    Args:
+        request: FastAPI request object
+        response: Response whose headers receive ``Server-Timing``
+        payload: JWT payload from authentication
+        
+    Returns:
+        TextCoordinatesResponse with calculated coordinates and font size
+    """
+    logger.info(f"User {payload.get('sub')} requested text coordinates calculation upload")
+
+    try:
+        image_bytes, params = await read_image_upload(request)
+
+        try:
+            upload_params = TextCoordinatesUploadParams(**params)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+
+        seed_point = (upload_params.seed_x, upload_params.seed_y)
+
+        return await _layout_text(
+            response,
+            image_bytes,
+            seed_point,
+            upload_params.font_id,
+            upload_params.text,
+            upload_params.include_timings
+        )
+
+    except (HTTPException, RequestValidationError):
+        raise
+    except Exception as e:
+        logger.error(f"Error in text coordinates service: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Internal server error: {str(e)}"
+        )
@@ -1,4 +1,6 @@
-from app.api.v1.endpoints import fonts, models, ocr, text_coordinates
+from fastapi import APIRouter
+
+from app.api.v1.endpoints import fonts, health, metrics, models, ocr, text_coordinates
 
 api_router = APIRouter()
 
@@ -7,3 +9,5 @@ api_router.include_router(fonts.router, tags=["Fonts"])
 api_router.include_router(models.router, tags=["Models"])
 api_router.include_router(ocr.router, tags=["OCR"])
 api_router.include_router(text_coordinates.router, tags=["Text Coordinates"])
+api_router.include_router(health.router, tags=["Health"])
+api_router.include_router(metrics.router, tags=["Health"])
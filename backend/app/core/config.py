@@ -23,6 +23,65 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
     
+    # Inference executor (CPU-bound OCR / layout work)
+    INFERENCE_BACKEND: str = "thread"  # "thread" or "process" (one ORT session set per process)
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_QUEUE_SIZE: int = 16
+    INFERENCE_RETRY_AFTER: int = 5  # Seconds suggested to clients when the queue is full
+    WARMUP_ON_STARTUP: bool = True  # Load and exercise every model before /api/ready reports ready
+    
+    # Cross-request micro-batching for the ONNX text recognizer
+    OCR_REC_MICROBATCH: bool = True
+    OCR_REC_MICROBATCH_MAX_WAIT_MS: float = 5.0  # Only spent while other pages are in flight
+    OCR_REC_MICROBATCH_MAX_BATCH_SIZE: int = 32
+    # Fixed recognizer input widths crops are padded to ("" = pad each batch to its widest crop)
+    OCR_REC_WIDTH_BUCKETS: str = "320,480,640,960"
+    # Also plan each batch the per-batch-width way for the legacy_* padding metrics (costs CPU)
+    OCR_REC_LEGACY_STATS: bool = False
+    # Angle classification: "eager" (every crop) or "lazy" (only crops recognized below the threshold)
+    OCR_CLS_MODE: str = "eager"
+    OCR_CLS_LAZY_THRESHOLD: float = 0.8
+    # Tall / wide strips (e.g. webtoons): detect overlapping tiles at native resolution
+    OCR_DET_TILING: bool = True
+    OCR_DET_TILE_SIZE: int = 960
+    OCR_DET_TILE_OVERLAP: int = 160
+    OCR_DET_TILE_ASPECT: float = 2.0  # Only pages at least this many times longer than wide (or vice versa)
+    # JSON recognizer per language, loaded on first use; other languages use ppocrv5, e.g.
+    # {"kor": {"rec_model_dir": "korean/rec.onnx", "rec_char_dict_path": "korean/dict.txt"}}
+    OCR_REC_MODELS: str = ""
+    OCR_REC_MEMORY_BUDGET_MB: int = 256  # Model files of those recognizers kept loaded (0 = no limit)
+    
+    # OCR result cache (Redis, keyed by image hash + language + model fingerprint)
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_TTL: int = 604800  # 7 days
+    OCR_CACHE_MAX_ENTRIES: int = 20000
+    OCR_CACHE_MAX_ENTRY_BYTES: int = 1048576
+    
+    # ONNX Runtime SessionOptions for every model session (0 threads = ORT default)
+    ORT_INTRA_OP_THREADS: int = 0
+    ORT_INTER_OP_THREADS: int = 0
+    ORT_EXECUTION_MODE: str = "sequential"  # "sequential" or "parallel"
+    ORT_GRAPH_OPTIMIZATION_LEVEL: str = "all"  # "disable", "basic", "extended" or "all"
+    ORT_ENABLE_CPU_MEM_ARENA: bool = True
+    ORT_ENABLE_MEM_PATTERN: bool = True
+    ORT_ALLOW_SPINNING: bool = True
+    # JSON per-model overrides, e.g. {"rec": {"intra_op_num_threads": 2}}
+    # Models: det, cls, rec, manga_encoder, manga_decoder, comic_detector
+    ORT_SESSION_OVERRIDES: str = ""
+    # Model precision per pipeline ("fp32" or "int8", see scripts/quantize_models.py);
+    # a "precision" key in ORT_SESSION_OVERRIDES picks it per model instead
+    PADDLE_OCR_PRECISION: str = "fp32"
+    MANGA_OCR_PRECISION: str = "fp32"
+    # Fetch the MangaOCR KV-cache decoder from Hugging Face when missing (a failure is not retried)
+    MANGA_OCR_DOWNLOAD_KV_DECODER: bool = False
+    
+    # Recognition-only OCR of client-detected regions
+    OCR_REGIONS_MAX: int = 500
+    
+    # Chapter-level batch OCR
+    OCR_BATCH_MAX_PAGES: int = 200
+    OCR_BATCH_MAX_IN_FLIGHT: int = 4  # Pages decoded / processed concurrently per request
+    
     # Paths - determine if running in Docker or local
     @property
     def BASE_DIR(self) -> Path:
@@ -0,0 +1,120 @@
+"""
+Prometheus text-format metrics
+
+Kept dependency-free: histograms are aggregated in-process and rendered
+in the text exposition format by ``GET /api/metrics``. With the process
+inference backend the stage timings travel back in the result dicts, so
+they are still observed here in the API process.
+"""
+
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; covers sub-millisecond post-processing up to slow full pages
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """Thread-safe labelled histogram"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        # label values -> [bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """Record one observation"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0] * len(self.buckets) + [0.0, 0]
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        """Lines of the text exposition format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, values):
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {values[-1]}")
+        return lines
+
+
+def render_samples(
+    name: str,
+    metric_type: str,
+    documentation: str,
+    samples: Iterable[Tuple[Dict[str, Any], float]]
+) -> List[str]:
+    """Lines for a gauge or counter with one sample per label set"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+STAGE_SECONDS = Histogram(
+    "komiix_inference_stage_seconds",
+    "Wall-clock time per pipeline stage",
+    ("pipeline", "stage")
+)
+
+REQUEST_SECONDS = Histogram(
+    "komiix_inference_request_seconds",
+    "End-to-end time of one OCR page or text layout request",
+    ("pipeline", "cache")
+)
+
+
+def record_timings(pipeline: str, timings: Optional[Dict[str, float]]):
+    """Feed per-stage timings of one request into ``STAGE_SECONDS``"""
+    for stage_name, seconds in (timings or {}).items():
+        STAGE_SECONDS.observe(seconds, pipeline=pipeline, stage=stage_name)
+
+
+def server_timing_header(timings: Optional[Dict[str, float]]) -> str:
+    """``Server-Timing`` header value (milliseconds) for per-stage timings"""
+    return ", ".join(
+        f"{stage_name};dur={seconds * 1000:.2f}"
+        for stage_name, seconds in (timings or {}).items()
+    )
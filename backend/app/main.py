@@ -2,6 +2,7 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 from loguru import logger
 import redis.asyncio as redis
 
@@ -9,6 +10,8 @@ from app.core.config import get_settings
 from app.core.logging import configure_logging
 from app.api.deps import limiter
 from app.api.v1.router import api_router
+from app.services.inference import get_inference_executor
+from app.services.ocr_cache import get_ocr_cache
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
@@ -36,9 +39,17 @@ async def lifespan(_app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to connect to Redis: {e}")
     
+    # Start the inference executor before the first request arrives and warm
+    # the models in the background; /api/ready reports when that is done
+    warmup_task = asyncio.create_task(get_inference_executor().warm_up())
+    
     yield
     
     # Cleanup on shutdown
+    warmup_task.cancel()
+    get_inference_executor().shutdown()
+    if get_ocr_cache() is not None:
+        await get_ocr_cache().close()
     await redis_client.close()
     logger.info("Application shutdown complete")
 
@@ -62,7 +73,7 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "X-OCR-Cache", "Server-Timing"],
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization", "Cache-Control"],
 )
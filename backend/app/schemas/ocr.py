@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 
 
 class BoundingBox(BaseModel):
@@ -14,12 +14,13 @@ class OCRRequest(BaseModel):
     """OCR request schema"""
     image: str  # Base64 encoded image
     language: str = "eng"  # Default language is English
+    include_timings: bool = False  # Return per-stage timings in the response
 
 
 class OCRResult(BaseModel):
     """Single OCR result"""
     text: str
-    confidence: float
+    confidence: Optional[float] = None  # Not reported for Japanese (MangaOCR) regions
     bounding_box: BoundingBox
 
 
@@ -27,3 +28,36 @@ class OCRResponse(BaseModel):
     """OCR response schema"""
     processing_time: float
     results: List[OCRResult]
+    timings: Optional[Dict[str, float]] = None  # Seconds per stage, on request
+
+
+class OCRRegion(BaseModel):
+    """Region to recognize: an axis-aligned box or a 4-point polygon"""
+    bounding_box: Optional[BoundingBox] = None
+    polygon: Optional[List[List[float]]] = None  # Four [x, y] points, any order
+
+
+class OCRRegionsRequest(BaseModel):
+    """Recognition-only OCR request for regions already detected by the client"""
+    image: str  # Base64 encoded page
+    regions: List[OCRRegion]
+    language: str = "eng"
+    include_timings: bool = False
+
+
+class OCRBatchRequest(BaseModel):
+    """Batch OCR request schema"""
+    images: List[str]  # Base64 encoded pages
+    language: str = "eng"
+    include_timings: bool = False
+
+
+class OCRBatchPageResult(BaseModel):
+    """One NDJSON line of the batch OCR stream"""
+    index: int  # Position of the page in OCRBatchRequest.images
+    cache: Optional[str] = None
+    processing_time: Optional[float] = None
+    results: Optional[List[OCRResult]] = None
+    timings: Optional[Dict[str, float]] = None
+    status_code: Optional[int] = None  # Set when the page failed
+    error: Optional[str] = None
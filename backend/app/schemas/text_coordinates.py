@@ -29,6 +29,7 @@ class TextCoordinatesRequest(BaseModel):
     font_id: str = Field(..., description="Font ID in the system")
     is_text: Optional[bool] = Field(None, description="Indicates rectangle type (true, false, or null)")
     rect: Optional[Rectangle] = Field(None, description="Optional rectangle coordinates")
+    include_timings: bool = Field(False, description="Return per-stage timings in the response")
 
 
 class TextCoordinatesResponse(BaseModel):
@@ -39,3 +40,14 @@ class TextCoordinatesResponse(BaseModel):
     height: float = Field(..., description="Height of the text area")
     font_size: float = Field(..., description="Optimal font size")
     processing_time: float = Field(..., description="Processing time in seconds")
+    timings: Optional[Dict[str, float]] = Field(None, description="Seconds per stage, on request")
+
+
+class TextCoordinatesUploadParams(BaseModel):
+    """Query/form parameters of the raw-binary and multipart upload variant"""
+    seed_x: float = Field(..., description="X coordinate of the seed point")
+    seed_y: float = Field(..., description="Y coordinate of the seed point")
+    text: str = Field(..., description="Text to place in the bubble")
+    font_id: str = Field(..., description="Font ID in the system")
+    font_family: Optional[str] = Field(None, description="Font family name")
+    include_timings: bool = Field(False, description="Return per-stage timings in the response")
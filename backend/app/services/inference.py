@@ -0,0 +1,395 @@
+"""Bounded executor for CPU-bound inference work
+
+OCR, detection and bubble layout are synchronous and hold the CPU for
+hundreds of milliseconds. Running them directly inside ``async def``
+endpoints blocks the event loop, so every other request on the worker
+(font lookups, model versions...) waits behind them. Endpoints submit
+that work here instead; when the queue is full the request is rejected
+with 503 before any decoding happens.
+
+Two backends are available (``INFERENCE_BACKEND``):
+
+* ``thread``: a thread pool inside the API process. Cheap, but all pre-
+  and post-processing (letterbox, normalize, DB post-process, NMS, CTC
+  decode, crop warping) competes for one GIL.
+* ``process``: a pool of spawned worker processes, each with its own ORT
+  sessions. Images are decoded in the API process and handed over through
+  ``multiprocessing.shared_memory`` instead of being pickled; only the
+  compact result dicts travel back.
+
+With a ``warmup`` function every worker (the shared thread pool once, or
+each process from its initializer) creates and exercises the model
+sessions before reporting ready; see ``warm_up`` and ``GET /api/ready``.
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException, status
+from loguru import logger
+
+from app.core.config import get_settings
+from app.services.ocr_pipeline import warmup_pipelines
+from app.utils.image import decode_image
+from lib.timing import collect_timings, stage
+
+BACKENDS = ("thread", "process")
+
+# Pause between rounds of status calls while process workers are still warming up
+WARMUP_POLL_SECONDS = 0.1
+
+# Error of the warmup run by this worker process's initializer, if any
+_worker_warmup_error: Optional[str] = None
+
+
+def _decode_and_call(fn: Callable, image_bytes: bytes, *args, **kwargs) -> Any:
+    """Decode image bytes on the worker, then run ``fn(image, *args)``"""
+    with stage("image_decode"):
+        img = decode_image(image_bytes)
+    return fn(img, *args, **kwargs)
+
+
+def _call_with_timings(fn: Callable, timings: Dict[str, float], args: tuple, kwargs: dict) -> Any:
+    """Worker-process side: run ``fn`` with stage timings seeded by the API process"""
+    with collect_timings(timings):
+        return fn(*args, **kwargs)
+
+
+def _init_worker_process(warmup: Optional[Callable] = None):
+    """Initializer of the inference worker processes"""
+    global _worker_warmup_error
+    import cv2
+
+    # Worker processes must not rotate the API process's app.log
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level="INFO",
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | inference-{process} | {name}:{function}:{line} - {message}"
+    )
+    # Parallelism comes from the processes; keep OpenCV from oversubscribing cores
+    cv2.setNumThreads(1)
+
+    if warmup is not None:
+        # An initializer exception would break the whole pool; report it instead
+        try:
+            warmup()
+        except Exception as e:
+            logger.exception(f"Inference worker warmup failed: {e}")
+            _worker_warmup_error = str(e)
+
+
+def _worker_warmup_status() -> Tuple[int, Optional[str]]:
+    """Worker-process side: pid and warmup error of this worker"""
+    return os.getpid(), _worker_warmup_error
+
+
+def _call_with_shared_image(
+    fn: Callable,
+    shm_name: str,
+    shape: Tuple[int, ...],
+    dtype: str,
+    timings: Dict[str, float],
+    args: tuple,
+    kwargs: dict
+) -> Any:
+    """Worker-process side: map the shared image and run ``fn(image, *args)``"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        img = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        try:
+            with collect_timings(timings):
+                return fn(img, *args, **kwargs)
+        finally:
+            # The buffer cannot be closed while an array still exports it
+            del img
+    finally:
+        shm.close()
+
+
+class InferenceExecutor:
+    """Worker pool with a bounded queue and queue-depth / wait-time stats"""
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue_size: int,
+        retry_after: int,
+        backend: str = "thread",
+        warmup: Optional[Callable] = None
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend} (expected one of {BACKENDS})")
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.retry_after = retry_after
+        self.backend = backend
+        self.warmup = warmup
+        if backend == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=partial(_init_worker_process, warmup)
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        # Process jobs wait here rather than in the pool so queue/running stats stay exact
+        self._slots = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+        self._warmup_status = "pending" if warmup is not None else "disabled"
+        self._warmup_error = None
+        self._warmup_seconds = None
+
+    def _reserve(self):
+        """Claim a queue slot or reject the request with 503"""
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue_size:
+                self._rejected += 1
+                logger.warning(
+                    f"Inference queue full ({self._queued} queued, {self._running} running), rejecting request"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Inference queue is full, retry later",
+                    headers={"Retry-After": str(self.retry_after)}
+                )
+            self._queued += 1
+            self._submitted += 1
+
+    def _start(self, enqueued_at: float) -> float:
+        """Move a job from queued to running and record its wait time"""
+        wait = time.perf_counter() - enqueued_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._wait_last = wait
+        return wait
+
+    def _finish(self):
+        with self._lock:
+            self._running -= 1
+            self._completed += 1
+
+    def _call(self, enqueued_at: float, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        """Worker-side wrapper that tracks wait time and running jobs"""
+        wait = self._start(enqueued_at)
+        try:
+            with collect_timings({"queue_wait": wait}):
+                return fn(*args, **kwargs)
+        finally:
+            self._finish()
+
+    async def _run_in_process(self, fn: Callable, args: tuple, kwargs: dict, image_bytes: bytes = None) -> Any:
+        """
+        Run ``fn`` on a worker process once a process slot is free
+
+        With ``image_bytes`` the image is decoded here, after the slot is
+        acquired so queued jobs do not hold decoded pages, and shared with
+        the worker through a shared memory block unlinked on return.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        enqueued_at = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+        timings = {"queue_wait": self._start(enqueued_at)}
+        try:
+            loop = asyncio.get_running_loop()
+            if image_bytes is None:
+                return await loop.run_in_executor(
+                    self._pool, partial(_call_with_timings, fn, timings, args, kwargs)
+                )
+
+            decode_start = time.perf_counter()
+            img = await asyncio.to_thread(decode_image, image_bytes)
+            timings["image_decode"] = time.perf_counter() - decode_start
+            shm = shared_memory.SharedMemory(create=True, size=max(img.nbytes, 1))
+            try:
+                shape, dtype = img.shape, img.dtype.str
+                np.ndarray(shape, dtype=img.dtype, buffer=shm.buf)[...] = img
+                del img
+                return await loop.run_in_executor(
+                    self._pool,
+                    partial(_call_with_shared_image, fn, shm.name, shape, dtype, timings, args, kwargs)
+                )
+            finally:
+                shm.close()
+                shm.unlink()
+        finally:
+            self._finish()
+            self._slots.release()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a synchronous function on an inference worker
+
+        Args:
+            fn: Function to execute
+            *args: Positional arguments for ``fn``
+            **kwargs: Keyword arguments for ``fn``
+
+        Returns:
+            The return value of ``fn``
+
+        Raises:
+            HTTPException: 503 with ``Retry-After`` if the queue is full
+        """
+        self._reserve()
+        if self.backend == "process":
+            return await self._run_in_process(fn, args, kwargs)
+        enqueued_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, partial(self._call, enqueued_at, fn, args, kwargs)
+        )
+
+    async def run_image(self, fn: Callable, image_bytes: bytes, *args, **kwargs) -> Any:
+        """
+        Decode ``image_bytes`` and run ``fn(image, *args)`` on an inference worker
+
+        The thread backend decodes on the worker thread; the process backend
+        decodes in this process and passes the pixels through shared memory.
+        ``fn`` must then be a module-level function so it can be pickled.
+
+        Raises:
+            HTTPException: 503 with ``Retry-After`` if the queue is full
+            ImageDecodeError: If the bytes are not a decodable image
+        """
+        if self.backend == "process":
+            self._reserve()
+            return await self._run_in_process(fn, args, kwargs, image_bytes=image_bytes)
+        return await self.run(_decode_and_call, fn, image_bytes, *args, **kwargs)
+
+    async def warm_up(self):
+        """
+        Run the warmup on every worker and record the outcome
+
+        The thread backend shares one set of models, so the warmup runs
+        once on the pool. Process workers warm up in their initializer;
+        status calls make the pool spawn all of them and are repeated until
+        every worker pid has answered, i.e. finished its initializer.
+        Failures are logged and leave the executor not ready rather than
+        raising.
+        """
+        if self.warmup is None:
+            return
+        self._warmup_status = "running"
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            if self.backend == "process":
+                await self._await_worker_warmups(loop)
+            else:
+                await loop.run_in_executor(self._pool, self.warmup)
+        except Exception as e:
+            logger.error(f"Inference warmup failed: {e}")
+            self._warmup_status = "failed"
+            self._warmup_error = str(e)
+            return
+        self._warmup_seconds = time.perf_counter() - start
+        self._warmup_status = "ready"
+        logger.info(f"Inference workers warmed up in {self._warmup_seconds:.2f}s")
+
+    async def _await_worker_warmups(self, loop: asyncio.AbstractEventLoop):
+        """
+        Return once every worker process has reported a finished warmup
+
+        A worker that is done answers status calls right away, possibly all
+        of them, so one round per worker proves nothing about the others.
+
+        Raises:
+            RuntimeError: With the first warmup error a worker reports
+        """
+        reported = set()
+        while True:
+            statuses = await asyncio.gather(*(
+                loop.run_in_executor(self._pool, _worker_warmup_status)
+                for _ in range(self.max_workers)
+            ))
+            errors = [error for _, error in statuses if error]
+            if errors:
+                raise RuntimeError(errors[0])
+            reported.update(pid for pid, _ in statuses)
+            if len(reported) >= self.max_workers:
+                return
+            await asyncio.sleep(WARMUP_POLL_SECONDS)
+
+    @property
+    def ready(self) -> bool:
+        """Whether the workers can take requests without cold-start cost"""
+        return self._warmup_status in ("ready", "disabled")
+
+    def warmup_state(self) -> Dict[str, Any]:
+        """Warmup status (pending, running, ready, failed or disabled)"""
+        return {
+            "status": self._warmup_status,
+            "seconds": self._warmup_seconds,
+            "error": self._warmup_error,
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._queued
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth and wait times"""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "backend": self.backend,
+                "workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_seconds_avg": self._wait_total / started if started else 0.0,
+                "wait_seconds_max": self._wait_max,
+                "wait_seconds_last": self._wait_last,
+            }
+
+    def shutdown(self):
+        """Stop accepting work and release the worker threads / processes"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache()
+def get_inference_executor() -> InferenceExecutor:
+    """Get the process-wide inference executor"""
+    settings = get_settings()
+    logger.info(
+        f"Starting {settings.INFERENCE_BACKEND} inference executor with "
+        f"{settings.INFERENCE_WORKERS} workers and queue size {settings.INFERENCE_QUEUE_SIZE}"
+    )
+    return InferenceExecutor(
+        max_workers=settings.INFERENCE_WORKERS,
+        max_queue_size=settings.INFERENCE_QUEUE_SIZE,
+        retry_after=settings.INFERENCE_RETRY_AFTER,
+        backend=settings.INFERENCE_BACKEND,
+        warmup=warmup_pipelines if settings.WARMUP_ON_STARTUP else None,
+    )
@@ -0,0 +1,194 @@
+"""Content-addressed cache of OCR responses in Redis
+
+The same page is OCR'd again and again (undo, tab switches, several team
+members opening one chapter). Responses are cached under the SHA-256 of
+the uploaded image bytes, the request language and a fingerprint of the
+model files and pipeline settings that produce the result, so a model
+update or a change of e.g. ``OCR_CLS_MODE`` never serves stale text. A hit is answered without touching the inference executor.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import get_settings
+from app.repositories.cache_repository import CacheRepository
+from app.services.ocr_pipeline import model_files, pipeline_options
+
+KEY_PREFIX = "ocr:v1"
+INDEX_KEY = f"{KEY_PREFIX}:index"
+
+# Request Cache-Control directives that skip the lookup
+BYPASS_DIRECTIVES = ("no-cache", "no-store")
+
+
+class ModelFingerprint:
+    """SHA-256 over model paths, contents and pipeline options, re-hashed only when a file changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file_hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+    def _file_hash(self, path: str) -> str:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return "missing"
+
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._file_hashes.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+
+        with self._lock:
+            self._file_hashes[path] = (signature, file_hash)
+        return file_hash
+
+    def __call__(self, paths: List[str], options: Optional[Dict[str, Any]] = None) -> str:
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(os.path.abspath(path).encode())
+            digest.update(self._file_hash(path).encode())
+        if options:
+            digest.update(json.dumps(options, sort_keys=True).encode())
+        return digest.hexdigest()
+
+
+class OCRResultCache:
+    """Redis cache of serialized ``OCRResponse`` dicts with TTL and size cap"""
+
+    def __init__(self, ttl: int, max_entries: int, max_entry_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.cache = CacheRepository()
+        self.fingerprint = ModelFingerprint()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stored": 0,
+            "skipped_oversize": 0,
+            "evicted": 0,
+        }
+
+    @staticmethod
+    def should_bypass(cache_control: Optional[str]) -> bool:
+        """Whether a request ``Cache-Control`` header asks to skip the cache"""
+        if not cache_control:
+            return False
+        directives = [d.strip().lower() for d in cache_control.split(",")]
+        return any(d in BYPASS_DIRECTIVES for d in directives)
+
+    async def key(self, image_bytes: bytes, language: str) -> str:
+        """
+        Cache key for an image / language pair
+
+        Model files are hashed off the event loop; after the first call
+        only their size and mtime are checked.
+        """
+        language = language.lower()
+        model_hash = await asyncio.to_thread(
+            self.fingerprint, model_files(language), pipeline_options(language)
+        )
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        return f"{KEY_PREFIX}:{model_hash[:16]}:{language}:{image_hash}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached response
+
+        Returns:
+            The cached response dict or None on a miss
+        """
+        cached = await self.cache.get(key)
+        if cached is None:
+            self._stats["misses"] += 1
+            return None
+
+        try:
+            response = json.loads(cached)
+        except ValueError as e:
+            logger.warning(f"Dropping corrupt OCR cache entry {key}: {e}")
+            await self.cache.delete(key)
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["hits"] += 1
+        return response
+
+    async def set(self, key: str, response: Dict[str, Any]) -> bool:
+        """
+        Store a response, evicting the oldest entries beyond ``max_entries``
+
+        Returns:
+            True if stored, False if skipped or Redis failed
+        """
+        value = json.dumps(response, separators=(",", ":")).encode()
+        if len(value) > self.max_entry_bytes:
+            self._stats["skipped_oversize"] += 1
+            logger.debug(f"OCR response of {len(value)} bytes exceeds cache entry limit")
+            return False
+
+        if not await self.cache.set(key, value, ttl=self.ttl):
+            return False
+        self._stats["stored"] += 1
+
+        try:
+            redis = self.cache.redis
+            # Insertion-ordered index; entries whose TTL expired are pruned lazily
+            await redis.zadd(INDEX_KEY, {key: time.time()})
+            await redis.zremrangebyscore(INDEX_KEY, "-inf", time.time() - self.ttl)
+            overflow = await redis.zcard(INDEX_KEY) - self.max_entries
+            if overflow > 0:
+                evicted = [k for k, _ in await redis.zpopmin(INDEX_KEY, overflow)]
+                if evicted:
+                    await redis.delete(*evicted)
+                    self._stats["evicted"] += len(evicted)
+        except Exception as e:
+            logger.warning(f"Redis OCR cache index error: {e}")
+        return True
+
+    def record_bypass(self):
+        """Count a request that skipped the lookup"""
+        self._stats["bypassed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and limits"""
+        stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["ttl"] = self.ttl
+        stats["max_entries"] = self.max_entries
+        stats["max_entry_bytes"] = self.max_entry_bytes
+        return stats
+
+    async def close(self):
+        """Close the Redis connection"""
+        await self.cache.close()
+
+
+@lru_cache()
+def get_ocr_cache() -> Optional[OCRResultCache]:
+    """Get the process-wide OCR result cache, or None if disabled"""
+    settings = get_settings()
+    if not settings.OCR_CACHE_ENABLED:
+        return None
+    return OCRResultCache(
+        ttl=settings.OCR_CACHE_TTL,
+        max_entries=settings.OCR_CACHE_MAX_ENTRIES,
+        max_entry_bytes=settings.OCR_CACHE_MAX_ENTRY_BYTES,
+    )
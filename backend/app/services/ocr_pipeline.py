@@ -0,0 +1,506 @@
+"""OCR pipelines executed on the inference workers"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+from app.core.config import get_settings
+from lib.manga_ocr import MangaOCR, TextDetector
+from lib.onnx_ocr.onnx_paddleocr import ONNXPaddleOcr
+from lib.onnx_ocr.rec_registry import RecognizerRegistry, RecognizerSpec, parse_recognizer_specs
+from lib.onnx_ocr.utils import infer_args
+from lib.ort_session import PIPELINE_MODELS, SessionConfig, configure_sessions, quantized_model_path
+from lib.timing import collect_timings, stage
+
+MANGA_OCR_MODEL_DIR = "manga_ocr_japanese/model_onnx"
+TEXT_DETECTOR_MODEL_DIR = "manga_ocr_japanese/model_detector"
+
+# Models are created on first use by whichever worker thread needs them
+_model_lock = threading.Lock()
+_paddle_ocr = None
+_text_detector = None
+_manga_ocr = None
+_rec_registry = None
+_sessions_configured = False
+
+
+def _session_overrides() -> Dict[str, Dict[str, Any]]:
+    """``ORT_SESSION_OVERRIDES`` with the pipeline precisions filled in per model"""
+    settings = get_settings()
+    overrides = json.loads(settings.ORT_SESSION_OVERRIDES) if settings.ORT_SESSION_OVERRIDES.strip() else {}
+    precisions = {"paddle_ocr": settings.PADDLE_OCR_PRECISION, "manga_ocr": settings.MANGA_OCR_PRECISION}
+    for pipeline, models in PIPELINE_MODELS.items():
+        if precisions[pipeline] == "fp32":
+            continue
+        for name in models:
+            overrides[name] = {"precision": precisions[pipeline], **overrides.get(name, {})}
+    return overrides
+
+
+def _rec_specs() -> Dict[str, RecognizerSpec]:
+    """``RecognizerSpec`` per language from ``OCR_REC_MODELS``"""
+    settings = get_settings()
+    return parse_recognizer_specs(json.loads(settings.OCR_REC_MODELS)) if settings.OCR_REC_MODELS.strip() else {}
+
+
+def _configure_ort_sessions():
+    """Apply the ``ORT_*`` settings before the first model session is created
+
+    Called with ``_model_lock`` held; runs once per process, so every
+    inference worker process picks the options up as well.
+    """
+    global _sessions_configured
+    if _sessions_configured:
+        return
+    settings = get_settings()
+    default = SessionConfig(
+        intra_op_num_threads=settings.ORT_INTRA_OP_THREADS,
+        inter_op_num_threads=settings.ORT_INTER_OP_THREADS,
+        execution_mode=settings.ORT_EXECUTION_MODE,
+        graph_optimization_level=settings.ORT_GRAPH_OPTIMIZATION_LEVEL,
+        enable_cpu_mem_arena=settings.ORT_ENABLE_CPU_MEM_ARENA,
+        enable_mem_pattern=settings.ORT_ENABLE_MEM_PATTERN,
+        allow_spinning=settings.ORT_ALLOW_SPINNING,
+    )
+    overrides = _session_overrides()
+    configure_sessions(default, overrides)
+    logger.info(f"ONNX Runtime session options: {default}, overrides: {overrides}")
+    _sessions_configured = True
+
+
+def get_paddle_ocr() -> ONNXPaddleOcr:
+    """Lazy initialization of the ONNX PaddleOCR pipeline"""
+    global _paddle_ocr
+    if _paddle_ocr is None:
+        with _model_lock:
+            if _paddle_ocr is None:
+                settings = get_settings()
+                _configure_ort_sessions()
+                _paddle_ocr = ONNXPaddleOcr(
+                    use_angle_cls=True,
+                    use_gpu=False,
+                    rec_microbatch=settings.OCR_REC_MICROBATCH,
+                    rec_microbatch_max_wait_ms=settings.OCR_REC_MICROBATCH_MAX_WAIT_MS,
+                    rec_microbatch_max_batch_size=settings.OCR_REC_MICROBATCH_MAX_BATCH_SIZE,
+                    rec_width_buckets=settings.OCR_REC_WIDTH_BUCKETS,
+                    rec_legacy_stats=settings.OCR_REC_LEGACY_STATS,
+                    cls_mode=settings.OCR_CLS_MODE,
+                    cls_lazy_thresh=settings.OCR_CLS_LAZY_THRESHOLD,
+                    det_tiling=settings.OCR_DET_TILING,
+                    det_tile_size=settings.OCR_DET_TILE_SIZE,
+                    det_tile_overlap=settings.OCR_DET_TILE_OVERLAP,
+                    det_tile_aspect=settings.OCR_DET_TILE_ASPECT,
+                )
+    return _paddle_ocr
+
+
+def get_rec_registry() -> RecognizerRegistry:
+    """Per-language recognizers from ``OCR_REC_MODELS``; their sessions load on first use"""
+    global _rec_registry
+    if _rec_registry is None:
+        paddle_ocr = get_paddle_ocr()
+        with _model_lock:
+            if _rec_registry is None:
+                _rec_registry = RecognizerRegistry(
+                    paddle_ocr.args,
+                    _rec_specs(),
+                    memory_budget=get_settings().OCR_REC_MEMORY_BUDGET_MB * 1024 * 1024,
+                )
+    return _rec_registry
+
+
+def get_text_detector() -> TextDetector:
+    """Lazy initialization of TextDetector"""
+    global _text_detector
+    if _text_detector is None:
+        with _model_lock:
+            if _text_detector is None:
+                _configure_ort_sessions()
+                _text_detector = TextDetector(TEXT_DETECTOR_MODEL_DIR)
+    return _text_detector
+
+
+def get_manga_ocr() -> MangaOCR:
+    """Lazy initialization of MangaOCR"""
+    global _manga_ocr
+    if _manga_ocr is None:
+        with _model_lock:
+            if _manga_ocr is None:
+                _configure_ort_sessions()
+                _manga_ocr = MangaOCR(
+                    MANGA_OCR_MODEL_DIR,
+                    download_cache_decoder=get_settings().MANGA_OCR_DOWNLOAD_KV_DECODER
+                )
+    return _manga_ocr
+
+
+def reset_pipelines():
+    """Drop the loaded models; the next request reloads them with the current settings"""
+    global _paddle_ocr, _text_detector, _manga_ocr, _rec_registry, _sessions_configured
+    with _model_lock:
+        _paddle_ocr = _text_detector = _manga_ocr = _rec_registry = None
+        _sessions_configured = False
+
+
+def warmup_pipelines() -> Dict[str, float]:
+    """
+    Create every model session and run synthetic inputs through it
+
+    Covers det, cls and rec at the common recognizer widths, the comic
+    text detector and the MangaOCR encoder/decoders, so the first real
+    request of a worker pays neither session creation nor ORT first-run
+    allocations.
+
+    Returns:
+        dict: Seconds spent per pipeline
+    """
+    durations = {}
+
+    start = time.perf_counter()
+    get_paddle_ocr().warmup()
+    durations["paddle_ocr"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    get_text_detector().warmup()
+    get_manga_ocr().warmup()
+    durations["manga_ocr"] = time.perf_counter() - start
+
+    logger.info(f"Warmed up OCR pipelines: {durations}")
+    return durations
+
+
+def model_files(language: str) -> List[str]:
+    """Model artifacts whose contents determine the OCR output for ``language``
+
+    ONNX files are listed at the precision the pipeline is configured to
+    load, so switching a model to INT8 changes the cache fingerprint.
+    """
+    overrides = _session_overrides()
+
+    def at_precision(path, name):
+        return quantized_model_path(path, overrides.get(name, {}).get("precision", "fp32"))
+
+    if language.lower() == 'jpn':
+        names = [
+            "encoder_model.onnx",
+            "decoder_model.onnx",
+            "decoder_with_past_model.onnx",
+            "decoder_model_merged.onnx",
+        ]
+        files = [
+            at_precision(
+                os.path.join(MANGA_OCR_MODEL_DIR, name),
+                "manga_encoder" if name.startswith("encoder") else "manga_decoder"
+            )
+            for name in names
+        ]
+        files += [os.path.join(MANGA_OCR_MODEL_DIR, name) for name in ("vocab.txt", "generation_config.json")]
+        files.append(at_precision(os.path.join(TEXT_DETECTOR_MODEL_DIR, "comic-text-detector.onnx"), "comic_detector"))
+        return files
+
+    defaults = {action.dest: action.default for action in infer_args()._actions}
+    spec = _rec_specs().get(language.lower())
+    rec_model = spec.rec_model_dir if spec else defaults["rec_model_dir"]
+    rec_dict = spec.rec_char_dict_path if spec else defaults["rec_char_dict_path"]
+    return [
+        at_precision(defaults[f"{name}_model_dir"], name) for name in ("det", "cls")
+    ] + [at_precision(rec_model, "rec"), rec_dict]
+
+
+def pipeline_options(language: str) -> Dict[str, Any]:
+    """Settings besides the model files that change the OCR output for ``language``"""
+    if language.lower() == 'jpn':
+        return {}
+    settings = get_settings()
+    return {
+        "cls_mode": settings.OCR_CLS_MODE,
+        "cls_lazy_threshold": settings.OCR_CLS_LAZY_THRESHOLD,
+        "det_tiling": settings.OCR_DET_TILING,
+        "det_tile_size": settings.OCR_DET_TILE_SIZE,
+        "det_tile_overlap": settings.OCR_DET_TILE_OVERLAP,
+        "det_tile_aspect": settings.OCR_DET_TILE_ASPECT,
+        "rec_width_buckets": settings.OCR_REC_WIDTH_BUCKETS,
+    }
+
+
+def pipeline_stats() -> Dict[str, Any]:
+    """Runtime counters of the loaded OCR pipelines"""
+    stats = {}
+    if _paddle_ocr is not None:
+        stats["crops"] = _paddle_ocr.crop_stats()
+        stats["cls"] = _paddle_ocr.cls_stats()
+        stats["rec_shapes"] = _paddle_ocr.text_recognizer.stats()
+        if _paddle_ocr.rec_batcher is not None:
+            stats["rec_microbatch"] = _paddle_ocr.rec_batcher.stats()
+    if _rec_registry is not None:
+        stats["rec_languages"] = _rec_registry.stats()
+    return stats
+
+
+def polygon_to_bbox(polygon):
+    """
+    Convert a 4-point polygon to bounding box format [x1, y1, x2, y2]
+    """
+    # If polygon is a numpy array, convert to list
+    if hasattr(polygon, 'tolist'):
+        polygon = polygon.tolist()
+
+    # Verify we have valid data
+    if polygon is None or len(polygon) < 4:
+        return [0, 0, 0, 0]
+
+    # Extract all x and y coordinates
+    x_coords = [point[0] for point in polygon]
+    y_coords = [point[1] for point in polygon]
+
+    # Find min and max
+    x1 = min(x_coords)
+    y1 = min(y_coords)
+    x2 = max(x_coords)
+    y2 = max(y_coords)
+
+    return [x1, y1, x2, y2]
+
+
+def recognize_manga_crops(manga_ocr: MangaOCR, crops: List[Image.Image]) -> List[Optional[str]]:
+    """
+    Text of every crop from batched MangaOCR runs
+
+    If the batch fails, the crops are recognized one by one so a single bad
+    crop only loses its own text (``None``) instead of the whole page.
+    """
+    if not crops:
+        return []
+    try:
+        return manga_ocr.batch(crops)
+    except Exception as e:
+        logger.error(f"Batched MangaOCR failed, recognizing {len(crops)} crops one by one: {e}")
+
+    texts = []
+    for index, crop in enumerate(crops):
+        try:
+            texts.append(manga_ocr(crop))
+        except Exception as e:
+            logger.error(f"Error running OCR on crop {index}: {e}")
+            texts.append(None)
+    return texts
+
+
+def run_manga_ocr(img: np.ndarray) -> List[Dict[str, Any]]:
+    """Detect text blocks with TextDetector and recognize them with MangaOCR"""
+    # Convert CV2 image (BGR) to PIL Image (RGB)
+    with stage("color_convert"):
+        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        pil_image = Image.fromarray(img_rgb)
+
+    # Get detector and OCR instances
+    detector = get_text_detector()
+    manga_ocr = get_manga_ocr()
+
+    # Detect text regions with absolute coordinates
+    text_blocks = detector(pil_image)
+    logger.info(f"Detected {len(text_blocks)} text blocks")
+
+    img_width, img_height = pil_image.size
+    padding = 5  # Padding around detected regions
+
+    crops = []
+    crop_blocks = []
+    for block in text_blocks:
+        x1, y1, x2, y2 = block.xyxy
+
+        # Add padding and clamp to image bounds
+        x1 = max(0, int(x1) - padding)
+        y1 = max(0, int(y1) - padding)
+        x2 = min(img_width, int(x2) + padding)
+        y2 = min(img_height, int(y2) + padding)
+
+        # Skip if region is too small
+        if (x2 - x1) < 10 or (y2 - y1) < 10:
+            logger.debug(f"Skipping small region: {x1},{y1},{x2},{y2}")
+            continue
+
+        # Crop the detected region
+        crops.append(pil_image.crop((x1, y1, x2, y2)))
+        crop_blocks.append((block, (x1, y1, x2, y2)))
+
+    # Recognize all crops of the page in batched encoder/decoder runs
+    texts = recognize_manga_crops(manga_ocr, crops)
+
+    ocr_results = []
+    for text, (block, (x1, y1, x2, y2)) in zip(texts, crop_blocks):
+        if text and text.strip():
+            ocr_results.append({
+                "text": text,
+                "confidence": float(block.confidence),
+                "bounding_box": {
+                    "x0": x1,
+                    "y0": y1,
+                    "x1": x2,
+                    "y1": y2
+                }
+            })
+            logger.debug(f"OCR result for block: {text}")
+
+    logger.info(f"MangaOCR processed {len(ocr_results)} text regions")
+    return ocr_results
+
+
+def run_paddle_ocr(img: np.ndarray, language: str = "eng") -> List[Dict[str, Any]]:
+    """Run detection, angle classification and recognition with OnnxOCR
+
+    ``language`` picks its registered recognizer, if any, else ppocrv5.
+    """
+    paddle_ocr = get_paddle_ocr()
+    recognizer = get_rec_registry().get(language)
+    if recognizer is not None:
+        paddle_ocr = paddle_ocr.with_recognizer(recognizer)
+    result = paddle_ocr.ocr(img)
+
+    logger.info(f"OCR result format: {type(result)}")
+
+    # Format results
+    ocr_results = []
+    for line in result[0]:
+        try:
+            # bounding_box is numpy array of shape (4, 2)
+            polygon = line[0]
+            bbox = polygon_to_bbox(polygon)
+            text = line[1][0]
+            confidence = float(line[1][1])
+
+            ocr_results.append({
+                "text": text,
+                "confidence": confidence,
+                "bounding_box": {
+                    "x0": bbox[0],
+                    "y0": bbox[1],
+                    "x1": bbox[2],
+                    "y1": bbox[3]
+                }
+            })
+
+        except Exception as e:
+            logger.error(f"Error processing result: {str(e)}")
+            continue
+
+    return ocr_results
+
+
+def _region_result(text: str, confidence: Optional[float], quad: List[List[float]]) -> Dict[str, Any]:
+    x0, y0, x1, y1 = polygon_to_bbox(quad)
+    return {
+        "text": text,
+        "confidence": None if confidence is None else float(confidence),
+        "bounding_box": {"x0": x0, "y0": y0, "x1": x1, "y1": y1}
+    }
+
+
+def run_manga_ocr_regions(img: np.ndarray, regions: List[List[List[float]]]) -> List[Dict[str, Any]]:
+    """
+    Recognize the bounding rectangle of each region with batched MangaOCR
+
+    MangaOCR reports no score of its own, so the results carry no
+    confidence (``None``).
+    """
+    with stage("color_convert"):
+        pil_image = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+
+    img_width, img_height = pil_image.size
+    crops, kept = [], []
+    for index, quad in enumerate(regions):
+        x0, y0, x1, y1 = polygon_to_bbox(quad)
+        x0, y0 = max(0, int(x0)), max(0, int(y0))
+        x1, y1 = min(img_width, int(np.ceil(x1))), min(img_height, int(np.ceil(y1)))
+        if (x1 - x0) < 2 or (y1 - y0) < 2:
+            continue
+        crops.append(pil_image.crop((x0, y0, x1, y1)))
+        kept.append(index)
+
+    texts = [""] * len(regions)
+    for index, text in zip(kept, recognize_manga_crops(get_manga_ocr(), crops)):
+        texts[index] = text or ""
+    return [_region_result(text, None, quad) for text, quad in zip(texts, regions)]
+
+
+def run_paddle_ocr_regions(
+    img: np.ndarray, language: str, regions: List[List[List[float]]]
+) -> List[Dict[str, Any]]:
+    """Recognize each region with the OnnxOCR recognizer of ``language``"""
+    paddle_ocr = get_paddle_ocr()
+    recognizer = get_rec_registry().get(language)
+    if recognizer is not None:
+        paddle_ocr = paddle_ocr.with_recognizer(recognizer)
+    rec_res = paddle_ocr.recognize_regions(img, regions)
+    return [_region_result(text, score, quad) for (text, score), quad in zip(rec_res, regions)]
+
+
+def run_ocr_regions(img: np.ndarray, language: str, regions: List[List[List[float]]]) -> Dict[str, Any]:
+    """
+    Recognize client-detected regions of a decoded BGR image, skipping detection
+
+    Args:
+        img: Image as a BGR numpy array
+        language: Request language; ``jpn`` uses MangaOCR, others OnnxOCR
+        regions: Four ``[x, y]`` points per region
+
+    Returns:
+        dict: As ``run_ocr``, with ``results[i]`` belonging to
+        ``regions[i]`` (empty text when nothing was recognized)
+    """
+    start_time = time.time()
+
+    with collect_timings() as timings:
+        if language.lower() == 'jpn':
+            ocr_results = run_manga_ocr_regions(img, regions)
+        else:
+            ocr_results = run_paddle_ocr_regions(img, language, regions)
+
+    logger.info(f"Recognized {len(regions)} client regions")
+    return {
+        "processing_time": time.time() - start_time,
+        "results": ocr_results,
+        "timings": dict(timings)
+    }
+
+
+def run_ocr(img: np.ndarray, language: str) -> Dict[str, Any]:
+    """
+    Run the OCR pipeline matching ``language`` on a decoded BGR image
+
+    Args:
+        img: Image as a BGR numpy array
+        language: Request language; ``jpn`` uses TextDetector + MangaOCR,
+            languages in ``OCR_REC_MODELS`` their own recognizer
+
+    Returns:
+        dict: ``processing_time``, ``results`` and per-stage ``timings``
+        (seconds) as in ``OCRResponse``
+    """
+    start_time = time.time()
+
+    with collect_timings() as timings:
+        if language.lower() == 'jpn':
+            logger.info("Using TextDetector + MangaOCR for Japanese text")
+            ocr_results = run_manga_ocr(img)
+        else:
+            logger.info("Using OnnxOCR for non-Japanese text")
+            ocr_results = run_paddle_ocr(img, language)
+
+    processing_time = time.time() - start_time
+    return {
+        "processing_time": processing_time,
+        "results": ocr_results,
+        "timings": dict(timings)
+    }
+
+
+def pipeline_name(language: str) -> str:
+    """Name of the OCR pipeline ``run_ocr`` uses for ``language``"""
+    return "manga_ocr" if language.lower() == 'jpn' else "paddle_ocr"
@@ -0,0 +1,63 @@
+"""Bubble text layout executed on the inference workers"""
+import time
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from lib.text_centralization import process_bubble_from_array
+from lib.timing import collect_timings
+
+
+class SeedPointOutsideImageError(ValueError):
+    """Raised when the seed point does not fall inside the image"""
+
+
+def calculate_text_layout(
+    img: np.ndarray,
+    seed_point: Tuple[float, float],
+    font_path: str,
+    text: str
+) -> Dict[str, Any]:
+    """
+    Calculate text position, size and font size inside a speech bubble
+
+    Args:
+        img: Bubble image as a BGR numpy array
+        seed_point: Point (x, y) inside the bubble
+        font_path: Path to the font file
+        text: Text to place in the bubble
+
+    Returns:
+        dict: Fields of ``TextCoordinatesResponse`` including per-stage ``timings``
+
+    Raises:
+        SeedPointOutsideImageError: If the seed point is outside the image
+    """
+    # Validate seed point is within image bounds
+    if not (0 <= seed_point[0] < img.shape[1] and 0 <= seed_point[1] < img.shape[0]):
+        raise SeedPointOutsideImageError(
+            f"Seed point ({seed_point[0]}, {seed_point[1]}) is outside image bounds"
+        )
+
+    start_time = time.time()
+
+    # Process bubble and get coordinates
+    with collect_timings() as timings:
+        (x, y, h, w), font_size, hyphenations = process_bubble_from_array(
+            image=img,
+            seed_point=seed_point,
+            font_path=font_path,
+            text=text
+        )
+
+    processing_time = time.time() - start_time
+
+    return {
+        "top": float(y),
+        "left": float(x),
+        "width": float(w),
+        "height": float(h),
+        "font_size": float(font_size),
+        "processing_time": processing_time,
+        "timings": dict(timings)
+    }
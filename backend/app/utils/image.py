@@ -0,0 +1,29 @@
+"""Image decoding helpers shared by the inference endpoints"""
+import cv2
+import numpy as np
+
+
+class ImageDecodeError(ValueError):
+    """Raised when uploaded bytes cannot be decoded into an image"""
+
+
+def decode_image(image_bytes: bytes) -> np.ndarray:
+    """
+    Decode encoded image bytes (PNG, JPEG, WebP...) into a BGR array
+
+    Args:
+        image_bytes: Encoded image file contents
+
+    Returns:
+        np.ndarray: Image as an HxWx3 BGR uint8 array
+
+    Raises:
+        ImageDecodeError: If the bytes are not a decodable image
+    """
+    image_np = np.frombuffer(image_bytes, dtype=np.uint8)
+    if image_np.size == 0:
+        raise ImageDecodeError("Empty image")
+    img = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ImageDecodeError("Could not decode image")
+    return img
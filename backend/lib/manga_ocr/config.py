@@ -1,12 +1,34 @@
 import json
+import logging
 import os
+import shutil
+import urllib.request
 from typing import Tuple
 
-class MangaOCRConfig:
-    """Configuration for Manga OCR model"""
+logger = logging.getLogger(__name__)
+
+CACHE_DECODER_URL = "https://huggingface.co/l0wgear/manga-ocr-2025-onnx/resolve/main/decoder_with_past_model.onnx"
+
+# Seconds without data after which the optional decoder download is abandoned
+DOWNLOAD_TIMEOUT = 30
+
 
-    def __init__(self, model_dir: str = "manga_ocr_japanese/model_onnx"):
+class MangaOCRConfig:
+    """Configuration for Manga OCR model
+
+    ``download_cache_decoder`` opts into fetching the KV-cache decoder when
+    it is missing; by default only a decoder already on disk is used.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = "manga_ocr_japanese/model_onnx",
+        use_cache: bool = True,
+        download_cache_decoder: bool = False
+    ):
         self.model_dir = model_dir
+        self.use_cache = use_cache
+        self.download_cache_decoder = download_cache_decoder
         self._load_config()
 
     def _load_config(self):
@@ -66,6 +88,10 @@ class MangaOCRConfig:
         self.decoder_path = os.path.join(self.model_dir, "decoder_model.onnx")
         self.vocab_path = os.path.join(self.model_dir, "vocab.txt")
 
+        # Optional decoders with past key/values (KV cache)
+        self.decoder_with_past_path = os.path.join(self.model_dir, "decoder_with_past_model.onnx")
+        self.decoder_merged_path = os.path.join(self.model_dir, "decoder_model_merged.onnx")
+
         # Ensure model files exist, download if not
         self._ensure_model_files()
 
@@ -85,4 +111,41 @@ class MangaOCRConfig:
                     urllib.request.urlretrieve(url, file_path)
                     print(f"Downloaded {os.path.basename(file_path)} successfully")
                 except Exception as e:
-                    raise RuntimeError(f"Failed to download {os.path.basename(file_path)}: {e}")
\ No newline at end of file
+                    raise RuntimeError(f"Failed to download {os.path.basename(file_path)}: {e}")
+
+    def ensure_cache_decoder(self) -> bool:
+        """
+        Make ``decoder_with_past_model.onnx`` available if opted in
+
+        Called by the model only when its plain decoder emits ``present.*``,
+        i.e. when the file would actually be used. A failed download is
+        recorded in ``<file>.unavailable`` so later startups and the other
+        worker processes fall back to full-recompute decoding at once
+        instead of retrying; delete that file to try again.
+
+        Returns:
+            bool: Whether the KV-cache decoder file exists
+        """
+        path = self.decoder_with_past_path
+        marker = path + ".unavailable"
+        if os.path.exists(path):
+            return True
+        if not self.download_cache_decoder or os.path.exists(marker):
+            return False
+
+        tmp_path = f"{path}.{os.getpid()}.part"
+        logger.info(f"Downloading {os.path.basename(path)}")
+        try:
+            with urllib.request.urlopen(CACHE_DECODER_URL, timeout=DOWNLOAD_TIMEOUT) as response, \
+                    open(tmp_path, "wb") as f:
+                shutil.copyfileobj(response, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with open(marker, "w") as f:
+                f.write(f"{e}\n")
+            logger.warning(f"KV-cache decoder not available, using full-recompute decoding: {e}")
+            return False
+        logger.info(f"Downloaded {os.path.basename(path)} successfully")
+        return True
@@ -7,6 +7,9 @@ from .detector_preprocessor import TextDetectorPreprocessor
 from .detector_model import TextDetectorModel
 from .text_block import TextBlock
 from .utils.db_utils import SegDetectorRepresenter
+from .utils.yolo_utils import nms_indices
+from ..onnx_ocr.det_tiling import Tile, crop_tile, plan_tiles, seam_groups, uncut_mask
+from ..timing import stage
 
 class TextDetector:
     """Main Text Detector class for Manga/Comics"""
@@ -22,22 +25,29 @@ class TextDetector:
 
     def __call__(self, image: Union[Image.Image, np.ndarray]) -> List[TextBlock]:
         """Detect text in image and return list of TextBlocks"""
-        # Convert PIL to CV if needed
-        if isinstance(image, Image.Image):
-            cv_img = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            im_w, im_h = image.size
-        else:
-            cv_img = image
-            im_h, im_w = image.shape[:2]
+        with stage("comic_det_preprocess"):
+            # Convert PIL to CV if needed
+            if isinstance(image, Image.Image):
+                cv_img = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+                im_w, im_h = image.size
+            else:
+                cv_img = image
+                im_h, im_w = image.shape[:2]
 
-        # 1. Preprocess
-        img_in, ratio, (dw, dh) = self.preprocessor.preprocess(cv_img)
+        if self.use_tiles(im_h, im_w):
+            detections = self.detect_tiled(cv_img)
+        else:
+            with stage("comic_det_preprocess"):
+                # 1. Preprocess
+                img_in, ratio, (dw, dh) = self.preprocessor.preprocess(cv_img)
 
-        # 2. Inference
-        blks, mask, lines_map = self.model.run(img_in)
+            # 2. Inference
+            with stage("comic_det_infer"):
+                blks, mask, lines_map = self.model.run(img_in)
 
-        # 3. Postprocess YOLO (Blocks)
-        detections = self.model.postprocess_boxes(blks, ratio, dw, dh, im_w, im_h)
+            # 3. Postprocess YOLO (Blocks)
+            with stage("comic_det_postprocess"):
+                detections = self.model.postprocess_boxes(blks, ratio, dw, dh, im_w, im_h)
 
         # 4. Postprocess DBNet (Lines/Mask)
         # Extract lines for each block
@@ -60,6 +70,79 @@ class TextDetector:
 
         return text_blocks
 
+    def use_tiles(self, im_h: int, im_w: int) -> bool:
+        """Whether letterboxing the page would leave most of the input as padding"""
+        return max(im_h, im_w) > self.config.tile_aspect * min(im_h, im_w)
+
+    def tiles(self, im_h: int, im_w: int) -> List[Tile]:
+        """Overlapping square tiles as wide as the short side of the page"""
+        side = min(im_h, im_w)
+        return plan_tiles(im_h, im_w, side, int(side * self.config.tile_overlap))
+
+    def detect_tiled(self, cv_img: np.ndarray) -> np.ndarray:
+        """
+        Detect a long page tile by tile
+
+        Tiles are letterboxed and run ``tile_batch`` at a time. Per-tile
+        detections (after their own NMS) are moved to page coordinates.
+        Boxes cut by a tile edge inside the overlap are dropped, because the
+        neighbouring tile sees them whole. Boxes two tiles share are joined
+        into their union and a final NMS runs over the page.
+
+        Returns:
+            [N, 6] (x1, y1, x2, y2, conf, cls) detections in page coordinates
+        """
+        im_h, im_w = cv_img.shape[:2]
+        tiles = self.tiles(im_h, im_w)
+
+        detections, owners = [], []
+        for start in range(0, len(tiles), self.config.tile_batch):
+            chunk = tiles[start:start + self.config.tile_batch]
+            with stage("comic_det_preprocess"):
+                batch, ratios, pads = self.preprocessor.preprocess_batch([crop_tile(cv_img, tile) for tile in chunk])
+
+            with stage("comic_det_infer"):
+                blks, mask, lines_map = self.model.run(batch)
+
+            with stage("comic_det_postprocess"):
+                for i, tile in enumerate(chunk):
+                    (dw, dh) = pads[i]
+                    tile_dets = self.model.postprocess_boxes(blks[i:i + 1], ratios[i], dw, dh, tile.w, tile.h)
+                    corners = tile_dets[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+                    tile_dets = tile_dets[uncut_mask(corners, tile)]
+                    tile_dets[:, [0, 2]] += tile.x
+                    tile_dets[:, [1, 3]] += tile.y
+                    detections.append(tile_dets)
+                    owners.append(np.full(len(tile_dets), start + i))
+
+        with stage("comic_det_postprocess"):
+            detections = np.concatenate(detections)
+            owners = np.concatenate(owners)
+            if len(detections) == 0:
+                return detections
+
+            groups = seam_groups(
+                detections[:, :2], detections[:, 2:4], owners, tiles, self.config.tile_merge_iou
+            )
+            merged = []
+            for group in dict.fromkeys(groups.tolist()):
+                members = detections[groups == group]
+                best = members[np.argmax(members[:, 4])].copy()
+                best[:2] = members[:, :2].min(axis=0)
+                best[2:4] = members[:, 2:4].max(axis=0)
+                merged.append(best)
+            merged = np.stack(merged)
+
+            # Offset boxes by class as in non_max_suppression so classes never suppress each other
+            offsets = merged[:, 5:6] * max(im_h, im_w)
+            return merged[nms_indices(merged[:, :4] + offsets, merged[:, 4], self.config.nms_thresh)]
+
+    def warmup(self):
+        """Run one synthetic page so the detector session is allocated before real requests"""
+        page = np.full((1536, 1024, 3), 255, dtype=np.uint8)
+        page[200:260, 100:900] = 0
+        self(page)
+
     def crop_detected_regions(self, image: Image.Image, padding: int = 5) -> List[Tuple[Image.Image, TextBlock]]:
         """Crop detected text regions from image"""
         blocks = self(image)
@@ -17,6 +17,14 @@ class TextDetectorConfig:
         self.nms_thresh = 0.35
         self.mask_thresh = 0.3
         self.box_thresh = 0.6
+
+        # Long pages (long side > tile_aspect x short side) are detected on
+        # overlapping square tiles as wide as the short side, instead of being
+        # letterboxed whole into input_size
+        self.tile_aspect = 2.0
+        self.tile_overlap = 0.2  # Fraction of the tile side
+        self.tile_batch = 8  # Tiles per TextDetectorModel.run call
+        self.tile_merge_iou = 0.5  # IoU inside the shared region that joins boxes of two tiles
         
         self._ensure_model_exists()
 
@@ -1,7 +1,7 @@
-import onnxruntime as ort
 import numpy as np
 from .detector_config import TextDetectorConfig
 from .utils.yolo_utils import non_max_suppression
+from ..ort_session import create_session
 
 class TextDetectorModel:
     """ONNX-based Comic Text Detector model"""
@@ -14,10 +14,20 @@ class TextDetectorModel:
     def _load_model(self):
         """Load ONNX model"""
         # OpenCV DNN is used in the original repo, but we use onnxruntime for consistency
-        self.session = ort.InferenceSession(self.config.model_path)
+        self.session = create_session(self.config.model_path, "comic_detector")
+        # Exports with a fixed batch dimension get their batches one image at a time
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.max_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
 
     def run(self, img_in: np.ndarray):
-        """Run detector inference"""
+        """Run detector inference on a [N, 3, H, W] batch"""
+        if self.max_batch is not None and img_in.shape[0] > self.max_batch:
+            chunks = [
+                self.run(img_in[start:start + self.max_batch])
+                for start in range(0, img_in.shape[0], self.max_batch)
+            ]
+            return tuple(np.concatenate(outputs) for outputs in zip(*chunks))
+
         # The model outputs: blks (yolo-like), mask, lines_map
         # In typical ONNX export of this model, outputs are in a list
         outputs = self.session.run(None, {"images": img_in})
@@ -28,7 +38,7 @@ class TextDetectorModel:
         return blks, mask, lines_map
 
     def postprocess_boxes(self, blks, ratio, dw, dh, im_w, im_h):
-        """Postprocess YOLO detections to image coordinates"""
+        """Postprocess the YOLO detections of one image ([1, N, C] blks) to image coordinates"""
         detections = non_max_suppression(blks, self.config.conf_thresh, self.config.nms_thresh)[0]
         
         if detections.shape[0] == 0:
@@ -39,6 +39,17 @@ class TextDetectorPreprocessor:
         img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)  # add border
         return img, r, (dw, dh)
 
+    def preprocess_batch(self, images: List[np.ndarray]) -> Tuple[np.ndarray, List[float], List[Tuple[float, float]]]:
+        """Letterbox several BGR images into one [N, 3, H, W] tensor"""
+        batch = np.empty((len(images), 3, self.input_size[0], self.input_size[1]), dtype=np.float32)
+        ratios, pads = [], []
+        for i, img in enumerate(images):
+            img_lb, ratio, pad = self.letterbox(img, new_shape=self.input_size, auto=False, stride=64)
+            np.divide(img_lb[:, :, ::-1].transpose((2, 0, 1)), 255.0, out=batch[i], dtype=np.float32)
+            ratios.append(ratio)
+            pads.append(pad)
+        return batch, ratios, pads
+
     def preprocess(self, image: Union[Image.Image, np.ndarray]) -> Tuple[np.ndarray, float, Tuple[float, float]]:
         """Preprocess image for detector input"""
         if isinstance(image, Image.Image):
@@ -1,9 +1,15 @@
-import onnxruntime as ort
 import numpy as np
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ..ort_session import create_session
+
+_ORT_DTYPES = {
+    "tensor(float)": np.float32,
+    "tensor(float16)": np.float16,
+}
+
 
 class MangaOCRModel:
     """ONNX-based Manga OCR model"""
@@ -12,38 +18,159 @@ class MangaOCRModel:
         self.config = config
         self.encoder_session = None
         self.decoder_session = None
+        self.decoder_with_past_session = None
+        self.decoder_merged_session = None
         self.vocab = None
         self._load_model()
 
     def _load_model(self):
         """Load ONNX models and vocabulary"""
-        self.encoder_session = ort.InferenceSession(self.config.encoder_path)
-        self.decoder_session = ort.InferenceSession(self.config.decoder_path)
+        self.encoder_session = create_session(self.config.encoder_path, "manga_encoder")
+        self.decoder_session = create_session(self.config.decoder_path, "manga_decoder")
+        if getattr(self.config, "use_cache", False):
+            self._load_cache_decoder()
 
         with open(self.config.vocab_path, 'r', encoding='utf-8') as f:
             self.vocab = f.read().splitlines()
 
-    def generate_tokens(self, encoder_hidden_states: np.ndarray) -> List[int]:
-        """Generate token sequence using greedy decoding"""
-        current_token = np.array([[self.config.decoder_start_token_id]], dtype=np.int64)
-        generated_tokens = [self.config.decoder_start_token_id]
+    def _load_cache_decoder(self):
+        """Load a decoder that consumes past key/values, if one is available.
+
+        ``decoder_with_past_model.onnx`` is preferred: the first step runs the
+        plain decoder (which must emit ``present.*``) and every following step
+        feeds only the newest token. A merged decoder with ``use_cache_branch``
+        covers both steps with a single session. The with-past decoder is
+        only downloaded (if the config opts in) when it would be used.
+        """
+        decoder_outputs = [node.name for node in self.decoder_session.get_outputs()]
+        has_present = any(name.startswith("present") for name in decoder_outputs)
+
+        if has_present and self.config.ensure_cache_decoder():
+            self.decoder_with_past_session = create_session(self.config.decoder_with_past_path, "manga_decoder")
+        elif os.path.exists(self.config.decoder_merged_path):
+            self.decoder_merged_session = create_session(self.config.decoder_merged_path, "manga_decoder")
+
+    @property
+    def uses_cache(self) -> bool:
+        """Whether a KV-cache decoder is loaded"""
+        return self.decoder_with_past_session is not None or self.decoder_merged_session is not None
+
+    def generate_tokens(self, encoder_hidden_states: np.ndarray, use_cache: Optional[bool] = None) -> List[int]:
+        """Generate token sequence using greedy decoding
+
+        Uses the KV-cache decoder when one is loaded, otherwise (or when
+        ``use_cache`` is False) re-feeds the whole sequence on every step.
+        """
+        return self.generate_tokens_batch(encoder_hidden_states[:1], use_cache=use_cache)[0]
+
+    def generate_tokens_batch(self, encoder_hidden_states: np.ndarray,
+                              use_cache: Optional[bool] = None) -> List[List[int]]:
+        """Batched greedy decoding over ``[B, S, D]`` encoder hidden states
+
+        Every active sequence has the same length at each step, so no padding
+        is fed to the decoder. Sequences that emit EOS are masked out of the
+        token matrix (left as ``pad_token_id``) and dropped from the active
+        batch together with their encoder states and past key/values.
+        """
+        if use_cache is None:
+            use_cache = self.uses_cache
+        use_cache = use_cache and self.uses_cache
+
+        batch_size = encoder_hidden_states.shape[0]
+        max_length = self.config.max_length
+        tokens = np.full((batch_size, max_length + 1), self.config.pad_token_id, dtype=np.int64)
+        tokens[:, 0] = self.config.decoder_start_token_id
+        lengths = np.ones(batch_size, dtype=np.int64)
+
+        active = np.arange(batch_size)
+        active_states = encoder_hidden_states
+        past = None
+
+        for step in range(max_length):
+            if use_cache:
+                input_ids = tokens[active, step:step + 1]
+                logits, past = self._decoder_step(input_ids, active_states, past)
+            else:
+                input_ids = tokens[active, :step + 1]
+                logits = self.decoder_session.run(None, {
+                    "input_ids": input_ids,
+                    "encoder_hidden_states": active_states
+                })[0]
+
+            next_tokens = np.argmax(logits[:, -1, :], axis=-1)
+            running = next_tokens != self.config.eos_token_id
+            tokens[active[running], step + 1] = next_tokens[running]
+            lengths[active[running]] += 1
+
+            if not running.all():
+                active = active[running]
+                if active.size == 0:
+                    break
+                active_states = active_states[running]
+                if past is not None:
+                    past = {name: value[running] for name, value in past.items()}
+
+        return [tokens[i, :lengths[i]].tolist() for i in range(batch_size)]
+
+    def _decoder_step(self, input_ids: np.ndarray, encoder_hidden_states: np.ndarray,
+                      past: Optional[Dict[str, np.ndarray]]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Run one KV-cache decoder step and return (logits, updated past)"""
+        if self.decoder_merged_session is not None:
+            session = self.decoder_merged_session
+            feed = self._base_feed(session, input_ids, encoder_hidden_states)
+            if past is None:
+                feed.update(self._empty_past(session, input_ids.shape[0]))
+                feed["use_cache_branch"] = np.array([False])
+            else:
+                feed.update(past)
+                feed["use_cache_branch"] = np.array([True])
+        elif past is None:
+            session = self.decoder_session
+            feed = self._base_feed(session, input_ids, encoder_hidden_states)
+        else:
+            session = self.decoder_with_past_session
+            feed = self._base_feed(session, input_ids, encoder_hidden_states)
+            feed.update(past)
+
+        output_names = [node.name for node in session.get_outputs()]
+        outputs = session.run(output_names, feed)
 
-        for _ in range(self.config.max_length):
-            decoder_outputs = self.decoder_session.run(None, {
-                "input_ids": current_token,
-                "encoder_hidden_states": encoder_hidden_states
-            })
+        # present.* outputs become past_key_values.* inputs of the next step;
+        # cross-attention entries not re-emitted by the decoder are kept as-is
+        new_past = dict(past) if past is not None else {}
+        for name, value in zip(output_names[1:], outputs[1:]):
+            if name.startswith("present"):
+                new_past[name.replace("present", "past_key_values", 1)] = value
 
-            next_token_logits = decoder_outputs[0][:, -1, :]
-            next_token = np.argmax(next_token_logits, axis=-1)[0]
+        return outputs[0], new_past
 
-            if next_token == self.config.eos_token_id:
-                break
+    def _base_feed(self, session, input_ids: np.ndarray, encoder_hidden_states: np.ndarray) -> Dict[str, np.ndarray]:
+        """Build the non-cache inputs a decoder session expects"""
+        input_names = {node.name for node in session.get_inputs()}
+        feed = {"input_ids": input_ids}
+        if "encoder_hidden_states" in input_names:
+            feed["encoder_hidden_states"] = encoder_hidden_states
+        if "encoder_attention_mask" in input_names:
+            feed["encoder_attention_mask"] = np.ones(encoder_hidden_states.shape[:2], dtype=np.int64)
+        return feed
 
-            generated_tokens.append(int(next_token))
-            current_token = np.array([generated_tokens], dtype=np.int64)
+    def _empty_past(self, session, batch_size: int) -> Dict[str, np.ndarray]:
+        """Zero-length past key/values for the first step of a merged decoder"""
+        decoder_config = self.config.config.get("decoder", {}) if hasattr(self.config, "config") else {}
+        num_heads = decoder_config.get("num_attention_heads")
+        hidden_size = decoder_config.get("hidden_size")
+        head_dim = hidden_size // num_heads if num_heads and hidden_size else None
 
-        return generated_tokens
+        past = {}
+        for node in session.get_inputs():
+            if not node.name.startswith("past_key_values"):
+                continue
+            shape = list(node.shape)
+            heads = shape[1] if isinstance(shape[1], int) else num_heads
+            dim = shape[3] if isinstance(shape[3], int) else head_dim
+            dtype = _ORT_DTYPES.get(node.type, np.float32)
+            past[node.name] = np.zeros((batch_size, heads, 0, dim), dtype=dtype)
+        return past
 
     def decode_tokens(self, tokens: List[int]) -> str:
         """Decode tokens to text"""
@@ -57,4 +184,4 @@ class MangaOCRModel:
     def run_encoder(self, pixel_values: np.ndarray) -> np.ndarray:
         """Run encoder inference"""
         outputs = self.encoder_session.run(None, {"pixel_values": pixel_values})
-        return outputs[0]  # Return encoder hidden states
\ No newline at end of file
+        return outputs[0]  # Return encoder hidden states
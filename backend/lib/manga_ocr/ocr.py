@@ -1,13 +1,20 @@
 from PIL import Image
+from typing import List, Tuple
 from .config import MangaOCRConfig
 from .preprocessor import MangaOCRPreprocessor
 from .model import MangaOCRModel
+from ..timing import stage
 
 class MangaOCR:
     """Main Manga OCR class"""
 
-    def __init__(self, model_dir: str = "manga_ocr_japanese/model_onnx"):
-        self.config = MangaOCRConfig(model_dir)
+    def __init__(
+        self,
+        model_dir: str = "manga_ocr_japanese/model_onnx",
+        use_cache: bool = True,
+        download_cache_decoder: bool = False
+    ):
+        self.config = MangaOCRConfig(model_dir, use_cache=use_cache, download_cache_decoder=download_cache_decoder)
         self.preprocessor = MangaOCRPreprocessor(
             image_size=self.config.image_size,
             image_mean=self.config.image_mean,
@@ -17,12 +24,43 @@ class MangaOCR:
 
     def __call__(self, image: Image.Image) -> str:
         """Process image and return OCR text"""
-        pixel_values = self.preprocessor.preprocess(image)
-        encoder_hidden_states = self.model.run_encoder(pixel_values)
-        tokens = self.model.generate_tokens(encoder_hidden_states)
-        text = self.model.decode_tokens(tokens)
+        with stage("manga_preprocess"):
+            pixel_values = self.preprocessor.preprocess(image)
+        with stage("manga_encoder"):
+            encoder_hidden_states = self.model.run_encoder(pixel_values)
+        with stage("manga_decoder"):
+            tokens = self.model.generate_tokens(encoder_hidden_states)
+        with stage("manga_detokenize"):
+            text = self.model.decode_tokens(tokens)
         return text
 
+    def batch(self, images: List[Image.Image], batch_size: int = 32) -> List[str]:
+        """Process several images with batched encoder and decoder runs
+
+        Crops are stacked into one ``pixel_values`` tensor per chunk of
+        ``batch_size``, so a page costs a few large ORT calls instead of one
+        encoder run and one decode loop per crop.
+        """
+        texts = []
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            with stage("manga_preprocess"):
+                pixel_values = self.preprocessor.preprocess_batch(chunk)
+            with stage("manga_encoder"):
+                encoder_hidden_states = self.model.run_encoder(pixel_values)
+            with stage("manga_decoder"):
+                token_batch = self.model.generate_tokens_batch(encoder_hidden_states)
+            with stage("manga_detokenize"):
+                for tokens in token_batch:
+                    texts.append(self.model.decode_tokens(tokens))
+        return texts
+
+    def warmup(self, batch_sizes: Tuple[int, ...] = (1, 8)):
+        """Run blank crops through the encoder and decoders at common batch sizes"""
+        blank = Image.new("RGB", self.config.image_size, (255, 255, 255))
+        for batch_size in batch_sizes:
+            self.batch([blank] * batch_size)
+
     @classmethod
     def from_image_path(cls, image_path: str, model_dir: str = "manga_ocr_japanese/model_onnx") -> str:
         """Process image from file path"""
@@ -1,6 +1,6 @@
 import numpy as np
 from PIL import Image
-from typing import Tuple
+from typing import List, Tuple
 
 class MangaOCRPreprocessor:
     """Image preprocessor for Manga OCR"""
@@ -14,6 +14,21 @@ class MangaOCRPreprocessor:
 
     def preprocess(self, image: Image.Image) -> np.ndarray:
         """Preprocess image for model input"""
+        # Add batch dimension
+        img_array = np.expand_dims(self._to_chw(image), axis=0)
+
+        return img_array
+
+    def preprocess_batch(self, images: List[Image.Image]) -> np.ndarray:
+        """Preprocess several images into a single ``[N, C, H, W]`` tensor"""
+        height, width = self.image_size[1], self.image_size[0]
+        batch = np.empty((len(images), 3, height, width), dtype=np.float32)
+        for i, image in enumerate(images):
+            batch[i] = self._to_chw(image)
+        return batch
+
+    def _to_chw(self, image: Image.Image) -> np.ndarray:
+        """Resize and normalize one image into CHW layout"""
         # Ensure RGB
         if image.mode != 'RGB':
             image = image.convert('RGB')
@@ -33,7 +48,4 @@ class MangaOCRPreprocessor:
         # Transpose to CHW format
         img_array = np.transpose(img_array, (2, 0, 1))
 
-        # Add batch dimension
-        img_array = np.expand_dims(img_array, axis=0)
-
-        return img_array
\ No newline at end of file
+        return img_array
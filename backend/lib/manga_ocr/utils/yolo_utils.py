@@ -35,59 +35,57 @@ def box_iou(box1, box2):
     inter = np.prod(np.clip(rb - lt, a_min=0, a_max=None), axis=2)
     return inter / (area1[:, None] + area2 - inter)  # iou = inter / (area1 + area2 - inter)
 
+def nms_indices(boxes, scores, iou_thres):
+    """Indices kept by greedy NMS over [N, 4] xyxy boxes, highest score first"""
+    indices = np.argsort(-scores, kind="stable")
+    keep = []
+    while indices.size > 0:
+        i = indices[0]
+        keep.append(i)
+        if indices.size == 1:
+            break
+
+        ious = box_iou(boxes[i:i+1], boxes[indices[1:]])[0]
+        indices = indices[1:][ious < iou_thres]
+    return np.asarray(keep, dtype=np.int64)
+
 def non_max_suppression(prediction, conf_thres=0.4, iou_thres=0.35):
     """Performs Non-Maximum Suppression (NMS) on inference results
     Returns:
-        detections: [N, 6] (x1, y1, x2, y2, conf, cls)
+        detections: one [N, 6] (x1, y1, x2, y2, conf, cls) array per image of the batch
     """
-    
-    # Filter by confidence
-    xc = prediction[..., 4] > conf_thres
-    
+    return [_image_nms(image_pred, conf_thres, iou_thres) for image_pred in prediction]
+
+def _image_nms(x, conf_thres, iou_thres):
     # Settings
     max_wh = 4096  # (pixels) maximum box width and height
     max_det = 300  # maximum number of detections per image
-    
-    # NOTE: Output of YOLO in ONNX can be [1, 25200, 6] or similar
-    # We assume batch size 1
-    x = prediction[0]
-    x = x[xc[0]]
-    
+
+    # Filter by confidence
+    x = x[x[:, 4] > conf_thres]
+
     if not x.shape[0]:
-        return [np.zeros((0, 6))]
-    
+        return np.zeros((0, 6))
+
     # Compute conf
     x[:, 5:] *= x[:, 4:5]  # conf = obj_conf * cls_conf
-    
+
     # Box (center x, center y, width, height) to (x1, y1, x2, y2)
     box = xywh2xyxy(x[:, :4])
-    
+
     # Detections matrix [n, 6] (x1, y1, x2, y2, conf, cls)
     conf = np.max(x[:, 5:], axis=1, keepdims=True)
     j = np.argmax(x[:, 5:], axis=1, keepdims=True)
     x = np.concatenate((box, conf, j.astype(np.float32)), axis=1)[conf.flatten() > conf_thres]
-    
+
     if not x.shape[0]:
-        return [np.zeros((0, 6))]
-    
+        return np.zeros((0, 6))
+
     # Sort by confidence
     x = x[x[:, 4].argsort()[::-1]]
-    
+
     # Batched NMS (naive implementation)
     c = x[:, 5:6] * max_wh  # classes
     boxes, scores = x[:, :4] + c, x[:, 4]  # boxes (offset by class), scores
-    
-    n = boxes.shape[0]
-    keep = []
-    indices = np.arange(n)
-    
-    while indices.size > 0:
-        i = indices[0]
-        keep.append(i)
-        if indices.size == 1:
-            break
-        
-        ious = box_iou(boxes[i:i+1], boxes[indices[1:]])[0]
-        indices = indices[1:][ious < iou_thres]
-        
-    return [x[keep][:max_det]]
+
+    return x[nms_indices(boxes, scores, iou_thres)][:max_det]
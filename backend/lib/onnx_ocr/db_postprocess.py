@@ -39,6 +39,7 @@ class DBPostProcess(object):
                  use_dilation=False,
                  score_mode="fast",
                  box_type='quad',
+                 vectorized=True,
                  **kwargs):
         self.thresh = thresh
         self.box_thresh = box_thresh
@@ -47,6 +48,8 @@ class DBPostProcess(object):
         self.min_size = 3
         self.score_mode = score_mode
         self.box_type = box_type
+        # Batched quad extraction for the "fast" score mode
+        self.vectorized = vectorized
         assert score_mode in [
             "slow", "fast"
         ], "Score mode must be in [slow, fast] but got: {}".format(score_mode)
@@ -148,6 +151,78 @@ class DBPostProcess(object):
             scores.append(score)
         return np.array(boxes, dtype="int32"), scores
 
+    def boxes_from_bitmap_vectorized(self, pred, _bitmap, dest_width, dest_height):
+        '''
+        Batched equivalent of ``boxes_from_bitmap`` for score_mode "fast"
+
+        Only ``minAreaRect`` still runs per contour. Small rectangles are
+        rejected before any scoring, axis-aligned boxes are scored from an
+        integral image of ``pred`` (rotated ones still fill a polygon mask)
+        and unclipping is done in closed form (``unclip_rects``) instead of
+        Shapely + pyclipper + a second ``minAreaRect``. Boxes match
+        ``boxes_from_bitmap`` within a pixel of the probability map; scores
+        match to float rounding.
+        '''
+        bitmap = _bitmap
+        height, width = bitmap.shape
+
+        contours = cv2.findContours((bitmap * 255).astype(np.uint8), cv2.RETR_LIST,
+                                    cv2.CHAIN_APPROX_SIMPLE)[-2]
+        contours = contours[:self.max_candidates]
+        if len(contours) == 0:
+            return np.array([], dtype="int32"), []
+
+        rects = np.array(
+            [(cx, cy, w, h, angle) for (cx, cy), (w, h), angle in map(cv2.minAreaRect, contours)],
+            dtype=np.float32)
+        rects = rects[np.minimum(rects[:, 2], rects[:, 3]) >= self.min_size]
+        if len(rects) == 0:
+            return np.array([], dtype="int32"), []
+
+        points = order_mini_boxes(rect_points(rects))
+        scores = self.box_scores_fast(pred, points, rects[:, 4])
+        keep = scores >= self.box_thresh
+        rects, points, scores = rects[keep], points[keep], scores[keep]
+
+        expanded = unclip_rects(rects, points, self.unclip_ratio)
+        keep = np.minimum(expanded[:, 2], expanded[:, 3]) >= self.min_size + 2
+        expanded, scores = expanded[keep], scores[keep]
+        if len(expanded) == 0:
+            return np.array([], dtype="int32"), []
+
+        box = order_mini_boxes(rect_points(expanded))
+        box[:, :, 0] = np.clip(
+            np.round(box[:, :, 0] / width * dest_width), 0, dest_width)
+        box[:, :, 1] = np.clip(
+            np.round(box[:, :, 1] / height * dest_height), 0, dest_height)
+        return box.astype("int32"), scores.tolist()
+
+    def box_scores_fast(self, bitmap, boxes, angles):
+        '''
+        ``box_score_fast`` of every box; axis-aligned boxes via an integral image
+        '''
+        h, w = bitmap.shape[:2]
+        scores = np.empty(len(boxes), dtype=np.float64)
+        aligned = np.mod(angles, 90) == 0
+
+        if aligned.any():
+            integral = cv2.integral(np.ascontiguousarray(bitmap, dtype=np.float32), sdepth=cv2.CV_64F)
+            aligned_boxes = boxes[aligned]
+            # Same pixel span fillPoly covers for the integer-cast corners
+            xmin = np.clip(np.floor(aligned_boxes[:, :, 0].min(axis=1)), 0, w - 1).astype(np.int64)
+            ymin = np.clip(np.floor(aligned_boxes[:, :, 1].min(axis=1)), 0, h - 1).astype(np.int64)
+            xmax = np.clip(np.ceil(aligned_boxes[:, :, 0].max(axis=1)), 0, w - 1).astype(np.int64)
+            ymax = np.clip(np.ceil(aligned_boxes[:, :, 1].max(axis=1)), 0, h - 1).astype(np.int64)
+            x1 = np.minimum(xmin + (aligned_boxes[:, :, 0].max(axis=1) - xmin).astype(np.int64), xmax)
+            y1 = np.minimum(ymin + (aligned_boxes[:, :, 1].max(axis=1) - ymin).astype(np.int64), ymax)
+            total = (integral[y1 + 1, x1 + 1] - integral[ymin, x1 + 1]
+                     - integral[y1 + 1, xmin] + integral[ymin, xmin])
+            scores[aligned] = total / ((x1 - xmin + 1) * (y1 - ymin + 1))
+
+        for index in np.flatnonzero(~aligned):
+            scores[index] = self.box_score_fast(bitmap, boxes[index])
+        return scores
+
     def unclip(self, box, unclip_ratio):
         poly = Polygon(box)
         distance = poly.area * unclip_ratio / poly.length
@@ -236,6 +311,9 @@ class DBPostProcess(object):
             if self.box_type == 'poly':
                 boxes, scores = self.polygons_from_bitmap(pred[batch_index],
                                                           mask, src_w, src_h)
+            elif self.box_type == 'quad' and self.vectorized and self.score_mode == "fast":
+                boxes, scores = self.boxes_from_bitmap_vectorized(
+                    pred[batch_index], mask, src_w, src_h)
             elif self.box_type == 'quad':
                 boxes, scores = self.boxes_from_bitmap(pred[batch_index], mask,
                                                        src_w, src_h)
@@ -246,6 +324,114 @@ class DBPostProcess(object):
         return boxes_batch
 
 
+def rect_points(rects):
+    '''
+    ``cv2.boxPoints`` for an (N, 5) array of (cx, cy, w, h, angle) rects
+
+    Calls OpenCV per rect rather than re-deriving the corners: a float32
+    corner at 42.999996 instead of 43.0 moves the floored integral-image
+    window of ``box_scores_fast`` by a row and changes the score.
+    '''
+    points = np.empty((len(rects), 4, 2), dtype=np.float32)
+    for index, (cx, cy, w, h, angle) in enumerate(np.asarray(rects, dtype=np.float32).tolist()):
+        points[index] = cv2.boxPoints(((cx, cy), (w, h), angle))
+    return points
+
+
+def _round_half_away(values):
+    # Clipper's Round(): halves go away from zero
+    return np.trunc(values + np.copysign(0.5, values))
+
+
+def _clipper_round_outlines(quads, distance, arc_tolerance=0.25):
+    '''
+    Outline pyclipper's ``JT_ROUND`` offset produces for integer quads
+
+    Mirrors ``ClipperOffset``: positive orientation, unit edge normals and
+    ``round(steps_per_rad * angle)`` arc points per corner, rotated from
+    the incoming edge normal, then the outgoing edge normal, rounded like
+    Clipper. Corners with fewer steps repeat their last point.
+    '''
+    # Clipper's Orientation() is Area() >= 0 with Y pointing down
+    prev = np.roll(quads, 1, axis=1)
+    area = -0.5 * ((prev[:, :, 0] + quads[:, :, 0]) * (prev[:, :, 1] - quads[:, :, 1])).sum(axis=1)
+    quads = np.where((area < 0)[:, None, None], quads[:, ::-1], quads)
+
+    edges = np.roll(quads, -1, axis=1) - quads
+    normals = np.stack([edges[:, :, 1], -edges[:, :, 0]], axis=-1)
+    normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+    normals_in = np.roll(normals, 1, axis=1)
+
+    tolerance = np.minimum(arc_tolerance, distance * 0.25)
+    steps = np.minimum(np.pi / np.arccos(1 - tolerance / distance), distance * np.pi)
+    step_angle = 2 * np.pi / steps
+    sin_a = normals_in[..., 0] * normals[..., 1] - normals[..., 0] * normals_in[..., 1]
+    cos_a = (normals_in * normals).sum(axis=-1)
+    corner_steps = np.maximum(
+        _round_half_away(steps[:, None] / (2 * np.pi) * np.abs(np.arctan2(sin_a, cos_a))), 1
+    ).astype(np.int64)
+
+    count = int(corner_steps.max())
+    index = np.minimum(np.arange(count), corner_steps[..., None] - 1)
+    phi = np.arctan2(normals_in[..., 1], normals_in[..., 0])[..., None] + index * step_angle[:, None, None]
+    radius = distance[:, None, None]
+    arcs = np.stack([
+        quads[:, :, 0, None] + radius * np.cos(phi),
+        quads[:, :, 1, None] + radius * np.sin(phi),
+    ], axis=-1)
+    ends = quads + normals * distance[:, None, None]
+    outline = np.concatenate([arcs, ends[:, :, None]], axis=2)
+    return _round_half_away(outline).reshape(len(quads), -1, 1, 2).astype(np.float32)
+
+
+def unclip_rects(rects, points, unclip_ratio):
+    '''
+    ``get_mini_boxes(unclip(points))`` without Shapely or pyclipper
+
+    pyclipper truncates the corners to integers and offsets them by
+    ``area * ratio / perimeter`` with round joins. For axis-aligned rects
+    the min-area rect of that outline is the truncated rect grown by the
+    distance on every side, rounded like Clipper, so it is computed in
+    closed form. For rotated rects the outline is rebuilt for all boxes at
+    once and only ``minAreaRect`` runs per box.
+    '''
+    w, h = rects[:, 2].astype(np.float64), rects[:, 3].astype(np.float64)
+    distance = w * h * unclip_ratio / (2 * (w + h))
+    corners = np.trunc(points.astype(np.float64))
+    expanded = np.empty((len(rects), 5), dtype=np.float32)
+
+    aligned = np.mod(rects[:, 4], 90) == 0
+    if aligned.any():
+        lo = _round_half_away(corners[aligned].min(axis=1) - distance[aligned, None])
+        hi = _round_half_away(corners[aligned].max(axis=1) + distance[aligned, None])
+        expanded[aligned] = np.column_stack([(lo + hi) / 2, hi - lo, np.zeros(len(lo))])
+
+    rotated = np.flatnonzero(~aligned)
+    if len(rotated):
+        outlines = _clipper_round_outlines(corners[rotated], distance[rotated])
+        for row, index in enumerate(rotated):
+            (cx, cy), (rw, rh), angle = cv2.minAreaRect(outlines[row])
+            expanded[index] = (cx, cy, rw, rh, angle)
+    return expanded
+
+
+def order_mini_boxes(points):
+    '''
+    Corner order of ``DBPostProcess.get_mini_boxes`` for (N, 4, 2) boxes
+    '''
+    order = np.argsort(points[:, :, 0], axis=1, kind="stable")
+    points = np.take_along_axis(points, order[:, :, None], axis=1)
+    left_down = points[:, 1, 1] > points[:, 0, 1]
+    right_down = points[:, 3, 1] > points[:, 2, 1]
+    index = np.stack([
+        np.where(left_down, 0, 1),
+        np.where(right_down, 2, 3),
+        np.where(right_down, 3, 2),
+        np.where(left_down, 1, 0),
+    ], axis=1)
+    return np.take_along_axis(points, index[:, :, None], axis=1)
+
+
 class DistillationDBPostProcess(object):
     def __init__(self,
                  model_name=["student"],
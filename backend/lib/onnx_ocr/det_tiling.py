@@ -0,0 +1,192 @@
+"""
+Overlapping tiles for detecting text on tall or huge pages at native resolution
+
+Fitting an 800 x 12000 webtoon strip into ``det_limit_side_len=960``
+shrinks it about 12x and small text vanishes. Instead the page is cut into
+overlapping tiles of at most ``tile_size`` pixels per side (multiples of
+32, all the same shape so they batch), each tile is detected at scale 1
+and the per-tile boxes are put back into page coordinates:
+
+- a box cut by an interior tile edge is dropped when it lies inside the
+  overlap, because the neighbouring tile holds it whole;
+- boxes of two tiles that cover the same text in their shared region are
+  merged, which removes duplicates and joins lines longer than the overlap.
+"""
+
+import math
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# Pixels from an interior tile edge within which a box counts as cut
+EDGE_MARGIN = 2
+
+# IoU, inside the region two tiles share, above which their boxes are one text
+MERGE_IOU = 0.5
+
+# Origin and size of a tile plus its overlap with the previous / next tile on each axis
+Tile = namedtuple("Tile", ["y", "x", "h", "w", "top", "bottom", "left", "right"])
+
+
+def tile_starts(length, tile, overlap):
+    """
+    Start offsets of the fewest ``tile``-pixel tiles covering ``length``
+
+    Neighbours overlap by at least ``overlap``; the slack is spread evenly.
+    """
+    if length <= tile:
+        return [0]
+    count = int(math.ceil((length - overlap) / (tile - overlap)))
+    return [int(round(i * (length - tile) / (count - 1))) for i in range(count)]
+
+
+def _overlaps(starts, tile, i):
+    before = starts[i - 1] + tile - starts[i] if i > 0 else 0
+    after = starts[i] + tile - starts[i + 1] if i < len(starts) - 1 else 0
+    return before, after
+
+
+def plan_tiles(height, width, tile_size, overlap):
+    """
+    Tiles covering a ``height`` x ``width`` page
+
+    Every tile has the same shape: ``tile_size``, or the page side rounded
+    up to a multiple of 32 when that is smaller.
+    """
+    if not 0 <= overlap < tile_size:
+        raise ValueError(f"Tile overlap must be in [0, {tile_size}), got {overlap}")
+    tile_h = min(tile_size, int(math.ceil(height / 32) * 32))
+    tile_w = min(tile_size, int(math.ceil(width / 32) * 32))
+    ys = tile_starts(height, tile_h, overlap)
+    xs = tile_starts(width, tile_w, overlap)
+
+    tiles = []
+    for i, y in enumerate(ys):
+        top, bottom = _overlaps(ys, tile_h, i)
+        for j, x in enumerate(xs):
+            left, right = _overlaps(xs, tile_w, j)
+            tiles.append(Tile(y, x, tile_h, tile_w, top, bottom, left, right))
+    return tiles
+
+
+def crop_tile(img, tile):
+    """Pixels of ``tile``; edges replicated where the page is smaller than the tile"""
+    crop = img[tile.y:tile.y + tile.h, tile.x:tile.x + tile.w]
+    pad_h, pad_w = tile.h - crop.shape[0], tile.w - crop.shape[1]
+    if pad_h or pad_w:
+        crop = cv2.copyMakeBorder(crop, 0, pad_h, 0, pad_w, cv2.BORDER_REPLICATE)
+    return crop
+
+
+def uncut_mask(boxes, tile, margin=EDGE_MARGIN):
+    """
+    Which ``[N, 4, 2]`` tile-coordinate boxes to keep
+
+    Drops boxes touching an interior edge that end inside the overlap with
+    the tile beyond that edge.
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=bool)
+    mins = boxes.min(axis=1)
+    maxs = boxes.max(axis=1)
+    drop = np.zeros(len(boxes), dtype=bool)
+    if tile.top:
+        drop |= (mins[:, 1] <= margin) & (maxs[:, 1] < tile.top - margin)
+    if tile.bottom:
+        drop |= (maxs[:, 1] >= tile.h - 1 - margin) & (mins[:, 1] > tile.h - tile.bottom + margin)
+    if tile.left:
+        drop |= (mins[:, 0] <= margin) & (maxs[:, 0] < tile.left - margin)
+    if tile.right:
+        drop |= (maxs[:, 0] >= tile.w - 1 - margin) & (mins[:, 0] > tile.w - tile.right + margin)
+    return ~drop
+
+
+def _clipped_iou(a_min, a_max, b_min, b_max, region_min, region_max):
+    """IoU matrix of two sets of axis-aligned boxes, both clipped to a region"""
+    a_min, a_max = np.clip(a_min, region_min, region_max), np.clip(a_max, region_min, region_max)
+    b_min, b_max = np.clip(b_min, region_min, region_max), np.clip(b_max, region_min, region_max)
+    area_a = np.prod(a_max - a_min, axis=1)
+    area_b = np.prod(b_max - b_min, axis=1)
+    inter = np.clip(
+        np.minimum(a_max[:, None], b_max[None]) - np.maximum(a_min[:, None], b_min[None]), 0, None
+    ).prod(axis=2)
+    union = area_a[:, None] + area_b[None] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+def seam_groups(mins, maxs, owners, tiles, iou=MERGE_IOU):
+    """
+    Group page-coordinate boxes that are the same text seen by overlapping tiles
+
+    Args:
+        mins, maxs: ``[N, 2]`` top-left and bottom-right corners (x, y)
+        owners: Index into ``tiles`` of the tile each box came from
+        tiles: The ``Tile`` list
+        iou: IoU, with both boxes clipped to the region their tiles share,
+            at or above which two boxes are joined
+
+    Returns:
+        int array ``[N]``: the same label for every box of a group
+    """
+    parent = np.arange(len(mins))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, tile_a in enumerate(tiles):
+        for b in range(a + 1, len(tiles)):
+            tile_b = tiles[b]
+            region_min = np.float32([max(tile_a.x, tile_b.x), max(tile_a.y, tile_b.y)])
+            region_max = np.float32([
+                min(tile_a.x + tile_a.w, tile_b.x + tile_b.w), min(tile_a.y + tile_a.h, tile_b.y + tile_b.h)
+            ])
+            if np.any(region_max <= region_min):
+                continue
+            touches = np.all(maxs > region_min, axis=1) & np.all(mins < region_max, axis=1)
+            in_a = np.flatnonzero((owners == a) & touches)
+            in_b = np.flatnonzero((owners == b) & touches)
+            if len(in_a) == 0 or len(in_b) == 0:
+                continue
+            scores = _clipped_iou(mins[in_a], maxs[in_a], mins[in_b], maxs[in_b], region_min, region_max)
+            for i, j in zip(*np.nonzero(scores >= iou)):
+                parent[find(in_a[i])] = find(in_b[j])
+
+    return np.array([find(i) for i in range(len(mins))], dtype=np.int64)
+
+
+def merge_tile_boxes(tile_boxes, tiles, iou=MERGE_IOU):
+    """
+    Page-coordinate boxes from per-tile boxes
+
+    Args:
+        tile_boxes: ``[N_i, 4, 2]`` boxes in tile coordinates, one array per tile
+        tiles: The ``Tile`` of each array
+        iou: Clipped IoU above which boxes of overlapping tiles are merged
+
+    Returns:
+        float32 array ``[N, 4, 2]``; merged groups become the minimum-area
+        rectangle of all their points
+    """
+    boxes, owners = [], []
+    for index, (tile, points) in enumerate(zip(tiles, tile_boxes)):
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 4, 2)
+        boxes.append(points + np.float32([tile.x, tile.y]))
+        owners.append(np.full(len(points), index))
+    if not boxes or sum(len(b) for b in boxes) == 0:
+        return np.zeros((0, 4, 2), dtype=np.float32)
+    boxes = np.concatenate(boxes)
+    owners = np.concatenate(owners)
+
+    groups = seam_groups(boxes.min(axis=1), boxes.max(axis=1), owners, tiles, iou)
+    merged = []
+    for group in dict.fromkeys(groups.tolist()):
+        members = boxes[groups == group]
+        if len(members) == 1:
+            merged.append(members[0])
+        else:
+            merged.append(cv2.boxPoints(cv2.minAreaRect(members.reshape(-1, 2))))
+    return np.asarray(merged, dtype=np.float32)
@@ -53,7 +53,7 @@ class ONNXPaddleOcr(TextSystem):
                 img, cls_res_tmp = self.text_classifier(img)
                 if not rec:
                     cls_res.append(cls_res_tmp)
-            rec_res = self.text_recognizer(img)
+            rec_res = self.recognize(img)
             ocr_res.append(rec_res)
 
             if not rec:
@@ -1,17 +1,32 @@
-import onnxruntime
+from ..ort_session import create_session, get_session_config
 
 class PredictBase(object):
     def __init__(self):
         pass
 
-    def get_onnx_session(self, model_dir, use_gpu):
+    def get_onnx_session(self, model_dir, use_gpu, name, args=None):
+        """
+        Create the ORT session of model ``name`` (``det``, ``cls`` or ``rec``)
+
+        Options come from ``lib.ort_session``; a non-zero ``args.cpu_threads``
+        and ``args.enable_mkldnn`` override them for the PaddleOCR models.
+        """
         # 使用gpu
         if use_gpu:
             providers =[('CUDAExecutionProvider',{"cudnn_conv_algo_search": "DEFAULT"}),'CPUExecutionProvider']
         else:
             providers =['CPUExecutionProvider']
 
-        onnx_session = onnxruntime.InferenceSession(model_dir, None,providers=providers)
+        config = get_session_config(name)
+        if args is not None:
+            overrides = {}
+            if getattr(args, "cpu_threads", 0):
+                overrides["intra_op_num_threads"] = args.cpu_threads
+            if getattr(args, "enable_mkldnn", False):
+                overrides["enable_mkldnn"] = True
+            config = config.updated(overrides)
+
+        onnx_session = create_session(model_dir, name, providers=providers, config=config)
 
         # print("providers:", onnxruntime.get_device())
         return onnx_session
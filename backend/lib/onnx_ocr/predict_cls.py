@@ -1,10 +1,10 @@
 import cv2
-import copy
 import numpy as np
 import math
 
 from .cls_postprocess import ClsPostProcess
 from .predict_base import PredictBase
+from .staging import normalize_into, staging_buffer
 
 
 class TextClassifier(PredictBase):
@@ -15,10 +15,14 @@ class TextClassifier(PredictBase):
         self.postprocess_op = ClsPostProcess(label_list=args.label_list)
 
         # 初始化模型
-        self.cls_onnx_session = self.get_onnx_session(args.cls_model_dir, args.use_gpu)
+        self.cls_onnx_session = self.get_onnx_session(args.cls_model_dir, args.use_gpu, "cls", args)
         self.cls_input_name = self.get_input_name(self.cls_onnx_session)
         self.cls_output_name = self.get_output_name(self.cls_onnx_session)
 
+    def is_rotated(self, label, score):
+        """Whether a crop classified as ``(label, score)`` is turned by 180 degrees"""
+        return "180" in label and score > self.cls_thresh
+
     def resize_norm_img(self, img):
         imgC, imgH, imgW = self.cls_image_shape
         h = img.shape[0]
@@ -41,8 +45,29 @@ class TextClassifier(PredictBase):
         padding_im[:, :, 0:resized_w] = resized_image
         return padding_im
 
+    def norm_img_batch(self, img_list, batch_indices):
+        """
+        ``[B, C, H, W]`` input of one batch, built in this thread's staging buffer
+
+        Values are identical to stacking ``resize_norm_img`` results; the
+        returned array is reused by the next batch on the same thread.
+        """
+        imgC, imgH, imgW = self.cls_image_shape
+        if imgC == 1:
+            return np.concatenate([
+                self.resize_norm_img(img_list[ino])[np.newaxis, :] for ino in batch_indices
+            ])
+
+        batch = staging_buffer("cls", (len(batch_indices), imgC, imgH, imgW))
+        for row, ino in enumerate(batch_indices):
+            h, w = img_list[ino].shape[:2]
+            resized_w = min(int(math.ceil(imgH * (w / float(h)))), imgW)
+            normalize_into(cv2.resize(img_list[ino], (resized_w, imgH)), batch[row])
+        return batch
+
     def __call__(self, img_list):
-        img_list = copy.deepcopy(img_list)
+        # Rotated crops replace entries of this new list; the crops themselves are never written
+        img_list = list(img_list)
         img_num = len(img_list)
         # Calculate the aspect ratio of all text bars
         width_list = []
@@ -57,19 +82,7 @@ class TextClassifier(PredictBase):
         for beg_img_no in range(0, img_num, batch_num):
 
             end_img_no = min(img_num, beg_img_no + batch_num)
-            norm_img_batch = []
-            max_wh_ratio = 0
-
-            for ino in range(beg_img_no, end_img_no):
-                h, w = img_list[indices[ino]].shape[0:2]
-                wh_ratio = w * 1.0 / h
-                max_wh_ratio = max(max_wh_ratio, wh_ratio)
-            for ino in range(beg_img_no, end_img_no):
-                norm_img = self.resize_norm_img(img_list[indices[ino]])
-                norm_img = norm_img[np.newaxis, :]
-                norm_img_batch.append(norm_img)
-            norm_img_batch = np.concatenate(norm_img_batch)
-            norm_img_batch = norm_img_batch.copy()
+            norm_img_batch = self.norm_img_batch(img_list, indices[beg_img_no:end_img_no])
 
             input_feed = self.get_input_feed(self.cls_input_name, norm_img_batch)
             outputs = self.cls_onnx_session.run(
@@ -82,7 +95,7 @@ class TextClassifier(PredictBase):
             for rno in range(len(cls_result)):
                 label, score = cls_result[rno]
                 cls_res[indices[beg_img_no + rno]] = [label, score]
-                if "180" in label and score > self.cls_thresh:
+                if self.is_rotated(label, score):
                     img_list[indices[beg_img_no + rno]] = cv2.rotate(
                         img_list[indices[beg_img_no + rno]], 1
                     )
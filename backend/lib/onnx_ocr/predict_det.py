@@ -1,13 +1,23 @@
 import numpy as np
 from .imaug import transform, create_operators
 from .db_postprocess import DBPostProcess
+from .det_tiling import crop_tile, merge_tile_boxes, plan_tiles, uncut_mask
 from .predict_base import PredictBase
+from ..timing import stage
 
 
 class TextDetector(PredictBase):
     def __init__(self, args):
         self.args = args
         self.det_algorithm = args.det_algorithm
+        normalize = {
+            "NormalizeImage": {
+                "std": [0.229, 0.224, 0.225],
+                "mean": [0.485, 0.456, 0.406],
+                "scale": "1./255.",
+                "order": "hwc",
+            }
+        }
         pre_process_list = [
             {
                 "DetResizeForTest": {
@@ -15,14 +25,7 @@ class TextDetector(PredictBase):
                     "limit_type": args.det_limit_type,
                 }
             },
-            {
-                "NormalizeImage": {
-                    "std": [0.229, 0.224, 0.225],
-                    "mean": [0.485, 0.456, 0.406],
-                    "scale": "1./255.",
-                    "order": "hwc",
-                }
-            },
+            normalize,
             {"ToCHWImage": None},
             {"KeepKeys": {"keep_keys": ["image", "shape"]}},
         ]
@@ -35,15 +38,26 @@ class TextDetector(PredictBase):
         postprocess_params["use_dilation"] = args.use_dilation
         postprocess_params["score_mode"] = args.det_db_score_mode
         postprocess_params["box_type"] = args.det_box_type
+        postprocess_params["vectorized"] = getattr(args, "det_db_vectorized", True)
 
         # 实例化预处理操作类
         self.preprocess_op = create_operators(pre_process_list)
+        # Tiles are detected at native resolution: no resize
+        self.tile_preprocess_op = create_operators([normalize, {"ToCHWImage": None}, {"KeepKeys": {"keep_keys": ["image"]}}])
+        self.tiling = getattr(args, "det_tiling", False)
+        self.tile_size = getattr(args, "det_tile_size", 960)
+        self.tile_overlap = getattr(args, "det_tile_overlap", 160)
+        self.tile_batch = getattr(args, "det_tile_batch", 4)
+        self.tile_threshold = getattr(args, "det_tile_threshold", 2.0)
+        self.tile_aspect = getattr(args, "det_tile_aspect", 2.0)
+        if self.tiling and not 0 <= self.tile_overlap < self.tile_size:
+            raise ValueError(f"det_tile_overlap must be in [0, det_tile_size), got {self.tile_overlap}")
         # self.postprocess_op = build_post_process(postprocess_params)
         # 实例化后处理操作类
         self.postprocess_op = DBPostProcess(**postprocess_params)
 
         # 初始化模型
-        self.det_onnx_session = self.get_onnx_session(args.det_model_dir, args.use_gpu)
+        self.det_onnx_session = self.get_onnx_session(args.det_model_dir, args.use_gpu, "det", args)
         self.det_input_name = self.get_input_name(self.det_onnx_session)
         self.det_output_name = self.get_output_name(self.det_onnx_session)
 
@@ -91,30 +105,86 @@ class TextDetector(PredictBase):
         dt_boxes = np.array(dt_boxes_new)
         return dt_boxes
 
+    def use_tiles(self, image_shape):
+        """
+        Whether the image is a strip that fitting into ``det_limit_side_len``
+        would shrink past the tiling threshold
+
+        Only elongated pages (long side at least ``det_tile_aspect`` times
+        the short one) qualify; a high-resolution scan of a regular page
+        would need dozens of tiles and is resized as before.
+        """
+        long_side, short_side = max(image_shape[:2]), min(image_shape[:2])
+        return (
+            self.tiling
+            and self.args.det_box_type == "quad"
+            and self.args.det_limit_type == "max"
+            and long_side > self.args.det_limit_side_len * self.tile_threshold
+            and long_side >= short_side * self.tile_aspect
+        )
+
+    def detect_tiled(self, img):
+        """
+        Detect on overlapping native-resolution tiles, ``det_tile_batch`` per session run
+
+        Returns:
+            float32 array [N, 4, 2] of page-coordinate boxes, not yet ordered or clipped
+        """
+        tiles = plan_tiles(img.shape[0], img.shape[1], self.tile_size, self.tile_overlap)
+        tile_boxes = []
+        for start in range(0, len(tiles), self.tile_batch):
+            chunk = tiles[start:start + self.tile_batch]
+            with stage("det_preprocess"):
+                batch = np.stack([
+                    transform({"image": crop_tile(img, tile)}, self.tile_preprocess_op)[0] for tile in chunk
+                ])
+                shape_list = np.array([[tile.h, tile.w, 1.0, 1.0] for tile in chunk])
+
+            with stage("det_infer"):
+                input_feed = self.get_input_feed(self.det_input_name, batch)
+                outputs = self.det_onnx_session.run(self.det_output_name, input_feed=input_feed)
+
+            with stage("det_postprocess"):
+                post_result = self.postprocess_op({"maps": outputs[0]}, shape_list)
+                for tile, result in zip(chunk, post_result):
+                    boxes = np.asarray(result["points"], dtype=np.float32).reshape(-1, 4, 2)
+                    tile_boxes.append(boxes[uncut_mask(boxes, tile)])
+
+        with stage("det_postprocess"):
+            return merge_tile_boxes(tile_boxes, tiles)
+
     def __call__(self, img):
-        ori_im = img.copy()
+        # ``img`` is only read: the preprocessing ops all return new arrays
+        src_shape = img.shape
+        if self.use_tiles(src_shape):
+            dt_boxes = self.detect_tiled(img)
+            with stage("det_postprocess"):
+                return self.filter_tag_det_res(dt_boxes, src_shape)
+
         data = {"image": img}
 
-        data = transform(data, self.preprocess_op)
-        img, shape_list = data
-        if img is None:
-            return None, 0
-        img = np.expand_dims(img, axis=0)
-        shape_list = np.expand_dims(shape_list, axis=0)
-        img = img.copy()
+        with stage("det_preprocess"):
+            data = transform(data, self.preprocess_op)
+            img, shape_list = data
+            if img is None:
+                return None, 0
+            img = np.ascontiguousarray(np.expand_dims(img, axis=0))
+            shape_list = np.expand_dims(shape_list, axis=0)
 
-        input_feed = self.get_input_feed(self.det_input_name, img)
-        outputs = self.det_onnx_session.run(self.det_output_name, input_feed=input_feed)
+        with stage("det_infer"):
+            input_feed = self.get_input_feed(self.det_input_name, img)
+            outputs = self.det_onnx_session.run(self.det_output_name, input_feed=input_feed)
 
-        preds = {}
-        preds["maps"] = outputs[0]
+        with stage("det_postprocess"):
+            preds = {}
+            preds["maps"] = outputs[0]
 
-        post_result = self.postprocess_op(preds, shape_list)
-        dt_boxes = post_result[0]["points"]
+            post_result = self.postprocess_op(preds, shape_list)
+            dt_boxes = post_result[0]["points"]
 
-        if self.args.det_box_type == "poly":
-            dt_boxes = self.filter_tag_det_res_only_clip(dt_boxes, ori_im.shape)
-        else:
-            dt_boxes = self.filter_tag_det_res(dt_boxes, ori_im.shape)
+            if self.args.det_box_type == "poly":
+                dt_boxes = self.filter_tag_det_res_only_clip(dt_boxes, src_shape)
+            else:
+                dt_boxes = self.filter_tag_det_res(dt_boxes, src_shape)
 
         return dt_boxes
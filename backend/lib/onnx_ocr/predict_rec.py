@@ -1,11 +1,16 @@
 import cv2
 import numpy as np
 import math
+import threading
 from PIL import Image
 
 
 from .rec_postprocess import CTCLabelDecode
 from .predict_base import PredictBase
+from .staging import normalize_into, staging_buffer
+
+# Algorithms whose preprocessing differs from the CTC resize + pad path
+_CUSTOM_RESIZE_ALGORITHMS = ("NRTR", "ViTSTR", "RFL", "RARE")
 
 
 class TextRecognizer(PredictBase):
@@ -19,11 +24,28 @@ class TextRecognizer(PredictBase):
         )
 
         # 初始化模型
-        self.rec_onnx_session = self.get_onnx_session(args.rec_model_dir, args.use_gpu)
+        self.rec_onnx_session = self.get_onnx_session(args.rec_model_dir, args.use_gpu, "rec", args)
         self.rec_input_name = self.get_input_name(self.rec_onnx_session)
         self.rec_output_name = self.get_output_name(self.rec_onnx_session)
 
-    def resize_norm_img(self, img, max_wh_ratio):
+        # Fixed input widths crops are padded to; empty keeps per-batch widths
+        self.width_buckets = parse_width_buckets(getattr(args, "rec_width_buckets", ""))
+        # Also plan every call the per-batch-width way, only to fill the legacy_* stats
+        self.compare_legacy = getattr(args, "rec_legacy_stats", False)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "crops": 0,
+            "batches": 0,
+            "input_columns": 0,
+            "content_columns": 0,
+            "legacy_batches": 0,
+            "legacy_input_columns": 0,
+            "legacy_content_columns": 0,
+        }
+        self._widths = set()
+        self._legacy_widths = set()
+
+    def resize_norm_img(self, img, max_wh_ratio, img_w=None):
         imgC, imgH, imgW = self.rec_image_shape
         if self.rec_algorithm == "NRTR" or self.rec_algorithm == "ViTSTR":
             img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -52,7 +74,7 @@ class TextRecognizer(PredictBase):
             return resized_image
 
         assert imgC == img.shape[2]
-        imgW = int((imgH * max_wh_ratio))
+        imgW = img_w if img_w is not None else int((imgH * max_wh_ratio))
 
         # w = self.rec_onnx_session.get_inputs()[0].shape[3:][0]
         # w = self.rec_onnx_session.get_inputs()[0].shape[3:][0]
@@ -277,7 +299,137 @@ class TextRecognizer(PredictBase):
 
         return img
 
-    def __call__(self, img_list):
+    def norm_img_batch(self, img_list, batch_indices, max_wh_ratio, img_w=None):
+        """
+        ``[B, C, H, W]`` input of one batch, built in this thread's staging buffer
+
+        Values are identical to stacking ``resize_norm_img`` results; the
+        returned array is reused by the next batch on the same thread.
+        """
+        if self.rec_algorithm in _CUSTOM_RESIZE_ALGORITHMS:
+            return np.concatenate([
+                self.resize_norm_img(img_list[ino], max_wh_ratio, img_w)[np.newaxis, :]
+                for ino in batch_indices
+            ])
+
+        imgC, imgH, imgW = self.rec_image_shape
+        if img_w is None:
+            img_w = int((imgH * max_wh_ratio))
+        batch = staging_buffer("rec", (len(batch_indices), imgC, imgH, img_w))
+        for row, ino in enumerate(batch_indices):
+            img = img_list[ino]
+            assert imgC == img.shape[2]
+            h, w = img.shape[:2]
+            resized_w = min(int(math.ceil(imgH * (w / float(h)))), img_w)
+            normalize_into(cv2.resize(img, (resized_w, imgH)), batch[row])
+        return batch
+
+    def _content_width(self, img):
+        """Width of ``img`` once resized to the model height"""
+        h, w = img.shape[0:2]
+        return int(math.ceil(self.rec_image_shape[1] * (w / float(h))))
+
+    def _plan_legacy(self, img_list, indices, batch_num):
+        """Width-sorted batches, each padded to its own widest crop"""
+        imgC, imgH, imgW = self.rec_image_shape[:3]
+        batches = []
+        for beg_img_no in range(0, len(img_list), batch_num):
+            batch_indices = indices[beg_img_no:beg_img_no + batch_num]
+            max_wh_ratio = imgW / imgH
+            for ino in batch_indices:
+                h, w = img_list[ino].shape[0:2]
+                max_wh_ratio = max(max_wh_ratio, w * 1.0 / h)
+            batches.append((batch_indices, max_wh_ratio, None))
+        return batches
+
+    def _plan_buckets(self, img_list, indices, batch_num):
+        """
+        Batches of crops sharing the smallest width bucket that fits them
+
+        Crops are never fed narrower than the model width (320 for
+        ``3, 48, 320``), the minimum of the per-batch plan, so buckets below
+        it go unused and short crops see the same input as before. Crops
+        wider than the largest bucket are grouped by their width rounded up
+        to a multiple of it. Each bucket is split into full batches of
+        ``batch_num`` (the last one may be partial).
+        """
+        imgH, imgW = self.rec_image_shape[1:3]
+        largest = self.width_buckets[-1]
+        groups = {}
+        for ino in indices:
+            width = max(self._content_width(img_list[ino]), imgW)
+            bucket = next((b for b in self.width_buckets if b >= width), None)
+            if bucket is None:
+                bucket = int(math.ceil(width / float(largest))) * largest
+            groups.setdefault(bucket, []).append(ino)
+
+        batches = []
+        for bucket in sorted(groups):
+            members = groups[bucket]
+            for beg in range(0, len(members), batch_num):
+                batches.append((members[beg:beg + batch_num], bucket / float(imgH), bucket))
+        return batches
+
+    def _record(self, img_list, batches, legacy_batches):
+        """Count padded vs. content columns of the executed and (unless None) the per-batch-width plan"""
+        imgH = self.rec_image_shape[1]
+
+        def columns(plan):
+            input_columns = content_columns = 0
+            widths = set()
+            for batch_indices, max_wh_ratio, img_w in plan:
+                width = img_w if img_w is not None else int(imgH * max_wh_ratio)
+                widths.add(width)
+                input_columns += width * len(batch_indices)
+                content_columns += sum(
+                    min(self._content_width(img_list[ino]), width) for ino in batch_indices
+                )
+            return input_columns, content_columns, widths
+
+        input_columns, content_columns, widths = columns(batches)
+        if legacy_batches is batches:
+            legacy = (input_columns, content_columns, widths)
+        elif legacy_batches is not None:
+            legacy = columns(legacy_batches)
+
+        with self._stats_lock:
+            stats = self._stats
+            stats["crops"] += len(img_list)
+            stats["batches"] += len(batches)
+            stats["input_columns"] += input_columns
+            stats["content_columns"] += content_columns
+            self._widths |= widths
+            if legacy_batches is not None:
+                stats["legacy_batches"] += len(legacy_batches)
+                stats["legacy_input_columns"] += legacy[0]
+                stats["legacy_content_columns"] += legacy[1]
+                self._legacy_widths |= legacy[2]
+
+    def stats(self):
+        """
+        Padding and input-shape counters
+
+        ``legacy_*`` values describe the per-batch-width plan for the same
+        crops, so the bucketed plan can be compared against it. With width
+        buckets they are only tracked when ``rec_legacy_stats`` is set.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["distinct_widths"] = len(self._widths)
+            stats["legacy_distinct_widths"] = len(self._legacy_widths)
+        stats["width_buckets"] = list(self.width_buckets)
+        prefixes = ("", "legacy_")
+        if self.width_buckets and not self.compare_legacy:
+            stats = {key: value for key, value in stats.items() if not key.startswith("legacy_")}
+            prefixes = ("",)
+        for prefix in prefixes:
+            total = stats[prefix + "input_columns"]
+            stats[prefix + "padding_ratio"] = (
+                1.0 - stats[prefix + "content_columns"] / total if total else 0.0
+            )
+        return stats
+
+    def __call__(self, img_list, batch_num=None):
         img_num = len(img_list)
         # Calculate the aspect ratio of all text bars
         width_list = []
@@ -286,32 +438,19 @@ class TextRecognizer(PredictBase):
         # Sorting can speed up the recognition process
         indices = np.argsort(np.array(width_list))
         rec_res = [["", 0.0]] * img_num
-        batch_num = self.rec_batch_num
+        if batch_num is None:
+            batch_num = self.rec_batch_num
+
+        if self.width_buckets:
+            batches = self._plan_buckets(img_list, indices, batch_num)
+            legacy_batches = self._plan_legacy(img_list, indices, batch_num) if self.compare_legacy else None
+        else:
+            batches = legacy_batches = self._plan_legacy(img_list, indices, batch_num)
+        self._record(img_list, batches, legacy_batches)
+
+        for batch_indices, max_wh_ratio, img_w in batches:
+            norm_img_batch = self.norm_img_batch(img_list, batch_indices, max_wh_ratio, img_w)
 
-        for beg_img_no in range(0, img_num, batch_num):
-            end_img_no = min(img_num, beg_img_no + batch_num)
-            norm_img_batch = []
-            imgC, imgH, imgW = self.rec_image_shape[:3]
-            max_wh_ratio = imgW / imgH
-            # max_wh_ratio = 0
-            for ino in range(beg_img_no, end_img_no):
-                h, w = img_list[indices[ino]].shape[0:2]
-                wh_ratio = w * 1.0 / h
-                max_wh_ratio = max(max_wh_ratio, wh_ratio)
-            for ino in range(beg_img_no, end_img_no):
-                norm_img = self.resize_norm_img(img_list[indices[ino]], max_wh_ratio)
-                norm_img = norm_img[np.newaxis, :]
-                norm_img_batch.append(norm_img)
-
-            norm_img_batch = np.concatenate(norm_img_batch)
-            norm_img_batch = norm_img_batch.copy()
-
-            # img = img[:, :, ::-1].transpose(2, 0, 1)
-            # img = img[:, :, ::-1]
-            # img = img.transpose(2, 0, 1)
-            # img = img.astype(np.float32)
-            # img = np.expand_dims(img, axis=0)
-            # print(img.shape)
             input_feed = self.get_input_feed(self.rec_input_name, norm_img_batch)
             outputs = self.rec_onnx_session.run(
                 self.rec_output_name, input_feed=input_feed
@@ -321,6 +460,18 @@ class TextRecognizer(PredictBase):
 
             rec_result = self.postprocess_op(preds)
             for rno in range(len(rec_result)):
-                rec_res[indices[beg_img_no + rno]] = rec_result[rno]
+                rec_res[batch_indices[rno]] = rec_result[rno]
 
         return rec_res
+
+
+def parse_width_buckets(value):
+    """Sorted bucket widths from ``"320,480,..."`` or a sequence; empty disables"""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = [part for part in value.split(",") if part.strip()]
+    buckets = sorted({int(width) for width in value})
+    if buckets and buckets[0] <= 0:
+        raise ValueError(f"Recognizer width buckets must be positive: {buckets}")
+    return tuple(buckets)
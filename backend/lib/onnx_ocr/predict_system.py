@@ -1,23 +1,51 @@
+import contextlib
+import copy
 import os
+import threading
 import cv2
-import copy
+import numpy as np
 from . import predict_det
 from . import predict_cls
 from . import predict_rec
-from .utils import get_rotate_crop_image, get_minarea_rect_crop
+from .rec_batcher import RecognitionBatcher
+from .utils import AXIS_ALIGNED_TOLERANCE, get_crops
+from ..timing import stage
+
+# Recognizer input widths (pixels at the model height) warmed up ahead of
+# real requests; ORT allocates buffers on the first run of every shape
+WARMUP_REC_WIDTHS = (320, 480, 640, 960, 1280)
 
 
 class TextSystem(object):
     def __init__(self, args):
         self.text_detector = predict_det.TextDetector(args)
         self.text_recognizer = predict_rec.TextRecognizer(args)
+        self.rec_batcher = None
+        if getattr(args, "rec_microbatch", False):
+            self.rec_batcher = RecognitionBatcher(
+                self.text_recognizer,
+                max_batch_size=args.rec_microbatch_max_batch_size,
+                max_wait_ms=args.rec_microbatch_max_wait_ms,
+            )
         self.use_angle_cls = args.use_angle_cls
         self.drop_score = args.drop_score
+        # "eager" classifies every crop before recognition, "lazy" only the
+        # crops recognized with a score below cls_lazy_thresh
+        self.cls_mode = getattr(args, "cls_mode", "eager")
+        self.cls_lazy_thresh = getattr(args, "cls_lazy_thresh", 0.8)
+        if self.cls_mode not in ("eager", "lazy"):
+            raise ValueError(f"cls_mode must be 'eager' or 'lazy', got {self.cls_mode}")
         if self.use_angle_cls:
             self.text_classifier = predict_cls.TextClassifier(args)
 
         self.args = args
         self.crop_image_res_index = 0
+        self.crop_tolerance = getattr(args, "crop_axis_tolerance", AXIS_ALIGNED_TOLERANCE)
+        self._stats_lock = threading.Lock()
+        self._crop_stats = {"slice": 0, "warp": 0}
+        self._cls_stats = {"crops": 0, "classified": 0, "rotated": 0, "improved": 0}
+        if getattr(args, "warmup", False):
+            self.warmup()
 
     def draw_crop_rec_res(self, output_dir, img_crop_list, rec_res):
         os.makedirs(output_dir, exist_ok=True)
@@ -32,33 +60,93 @@ class TextSystem(object):
 
         self.crop_image_res_index += bbox_num
 
+    def warmup(self, rec_widths=None):
+        """Run synthetic inputs through det, cls and rec at each common width
+
+        The widths default to the recognizer's width buckets, if any.
+        Bypasses the micro-batcher so warmup never mixes with live requests.
+        """
+        rec_widths = rec_widths or self.text_recognizer.width_buckets or WARMUP_REC_WIDTHS
+        page = np.full((960, 640, 3), 255, dtype=np.uint8)
+        for top in range(80, 880, 80):
+            page[top:top + 24, 60:580] = 0
+        self.text_detector(page)
+
+        img_h = self.text_recognizer.rec_image_shape[1]
+        crops = []
+        for width in rec_widths:
+            crop = np.full((img_h, width, 3), 255, dtype=np.uint8)
+            crop[img_h // 4:img_h * 3 // 4, width // 10:width * 9 // 10] = 0
+            crops.append(crop)
+        if self.use_angle_cls:
+            self.text_classifier(crops)
+        for crop in crops:
+            self.text_recognizer([crop])
+            self.text_recognizer([crop] * self.text_recognizer.rec_batch_num)
+
+    def crop_stats(self):
+        """How many boxes were cropped by a plain slice vs. a perspective warp"""
+        with self._stats_lock:
+            return dict(self._crop_stats)
+
+    def cls_stats(self):
+        """
+        Angle classification counters
+
+        ``crops`` seen, ``classified`` by the angle classifier, ``rotated``
+        by 180 degrees, and, in lazy mode, ``improved`` when the rotated
+        crop was re-recognized with a higher score.
+        """
+        with self._stats_lock:
+            return dict(self._cls_stats)
+
+    def with_recognizer(self, recognizer):
+        """
+        The same system recognizing with ``recognizer`` (e.g. another language)
+
+        Detection, classification and the counters are shared with ``self``.
+        The micro-batcher belongs to the default recognizer, so the returned
+        system recognizes each page on its own.
+        """
+        if recognizer is self.text_recognizer:
+            return self
+        system = copy.copy(self)
+        system.text_recognizer = recognizer
+        system.rec_batcher = None
+        return system
+
+    def recognize(self, img_list):
+        """Recognize crops, through the cross-request micro-batcher when enabled"""
+        if self.rec_batcher is not None:
+            return self.rec_batcher(img_list)
+        return self.text_recognizer(img_list)
+
     def __call__(self, img, cls=True):
-        ori_im = img.copy()
+        """
+        Detect, classify and recognize the text lines of ``img``
+
+        ``img`` is treated as read-only and never copied: detection resizes
+        it into a new array and crops are sliced or warped out of it.
+        """
+        with self.in_flight():
+            return self._detect_and_recognize(img, cls)
+
+    def in_flight(self):
+        """Tell the micro-batcher a page may still hand in crops"""
+        if self.rec_batcher is None:
+            return contextlib.nullcontext()
+        return self.rec_batcher.page()
+
+    def _detect_and_recognize(self, img, cls):
         # 文字检测
         dt_boxes = self.text_detector(img)
 
         if dt_boxes is None:
             return None, None
 
-        img_crop_list = []
-
-        dt_boxes = sorted_boxes(dt_boxes)
-
-        # 图片裁剪
-        for bno in range(len(dt_boxes)):
-            tmp_box = copy.deepcopy(dt_boxes[bno])
-            if self.args.det_box_type == "quad":
-                img_crop = get_rotate_crop_image(ori_im, tmp_box)
-            else:
-                img_crop = get_minarea_rect_crop(ori_im, tmp_box)
-            img_crop_list.append(img_crop)
-
-        # 方向分类
-        if self.use_angle_cls and cls:
-            img_crop_list, angle_list = self.text_classifier(img_crop_list)
+        dt_boxes = sorted_boxes(dt_boxes, getattr(self.args, "reading_order", "ltr"))
 
-        # 图像识别
-        rec_res = self.text_recognizer(img_crop_list)
+        img_crop_list, rec_res = self.recognize_crops(img, dt_boxes, cls)
 
         if self.args.save_crop_res:
             self.draw_crop_rec_res(self.args.crop_res_save_dir, img_crop_list, rec_res)
@@ -72,26 +160,162 @@ class TextSystem(object):
         return filter_boxes, filter_rec_res
 
 
-def sorted_boxes(dt_boxes):
+    def recognize_crops(self, img, dt_boxes, cls=True, box_type=None):
+        """
+        Crop ``dt_boxes`` out of ``img``, classify their angle and recognize them
+
+        ``box_type`` defaults to the detector's ``det_box_type``.
+
+        Returns:
+            tuple: (crops, rec_res), one entry per box in order
+        """
+        # 图片裁剪
+        with stage("crop"):
+            img_crop_list, counts = get_crops(img, dt_boxes, box_type or self.args.det_box_type, self.crop_tolerance)
+        with self._stats_lock:
+            for path, count in counts.items():
+                self._crop_stats[path] += count
+
+        classify = self.use_angle_cls and cls
+        cls_counts = {"crops": len(img_crop_list), "classified": 0, "rotated": 0, "improved": 0}
+
+        # 方向分类
+        if classify and self.cls_mode == "eager":
+            with stage("cls"):
+                img_crop_list, angle_list = self.text_classifier(img_crop_list)
+            cls_counts["classified"] = len(img_crop_list)
+            cls_counts["rotated"] = sum(self.text_classifier.is_rotated(*angle) for angle in angle_list)
+
+        # 图像识别
+        with stage("rec"):
+            rec_res = self.recognize(img_crop_list)
+
+        if classify and self.cls_mode == "lazy":
+            img_crop_list, rec_res = self.reclassify_uncertain(img_crop_list, rec_res, cls_counts)
+
+        with self._stats_lock:
+            for key, count in cls_counts.items():
+                self._cls_stats[key] += count
+        return img_crop_list, rec_res
+
+    def recognize_regions(self, img, boxes, cls=True):
+        """
+        Recognize caller-supplied regions of ``img``, skipping detection
+
+        Args:
+            img: Page image (H, W, C); only read
+            boxes: ``[N, 4, 2]`` quads in any point order
+            cls: Whether to run the angle classifier (if initialized)
+
+        Returns:
+            list: ``(text, score)`` per box in order, not filtered by
+            ``drop_score``; boxes under 2 pixels per side after clipping
+            to the page give ``("", 0.0)``
+        """
+        img_height, img_width = img.shape[0:2]
+        quads, kept = [], []
+        for index, box in enumerate(boxes):
+            quad = self.text_detector.order_points_clockwise(np.asarray(box, dtype=np.float32))
+            quad = self.text_detector.clip_det_res(quad, img_height, img_width)
+            if min(np.linalg.norm(quad[0] - quad[1]), np.linalg.norm(quad[0] - quad[3])) < 2:
+                continue
+            quads.append(quad)
+            kept.append(index)
+
+        rec_res = [("", 0.0)] * len(boxes)
+        if quads:
+            with self.in_flight():
+                _, recognized = self.recognize_crops(img, quads, cls, box_type="quad")
+            for index, result in zip(kept, recognized):
+                rec_res[index] = result
+        return rec_res
+
+    def reclassify_uncertain(self, img_crop_list, rec_res, counts):
+        """
+        Second pass of lazy angle classification
+
+        Crops recognized with a score below ``cls_lazy_thresh`` go through
+        the angle classifier; those it turns by 180 degrees are recognized
+        again and take the new result, as in eager mode. ``improved``
+        counts the ones whose score went up.
+
+        Returns:
+            tuple: (crops, rec_res) with the rotations applied
+        """
+        uncertain = [i for i, (_, score) in enumerate(rec_res) if score < self.cls_lazy_thresh]
+        counts["classified"] = len(uncertain)
+        if not uncertain:
+            return img_crop_list, rec_res
+
+        with stage("cls"):
+            classified, angle_list = self.text_classifier([img_crop_list[i] for i in uncertain])
+        rotated = [
+            (i, crop) for i, crop, angle in zip(uncertain, classified, angle_list)
+            if self.text_classifier.is_rotated(*angle)
+        ]
+        counts["rotated"] = len(rotated)
+        if not rotated:
+            return img_crop_list, rec_res
+
+        with stage("rec"):
+            retried = self.recognize([crop for _, crop in rotated])
+        img_crop_list, rec_res = list(img_crop_list), list(rec_res)
+        for (i, crop), result in zip(rotated, retried):
+            counts["improved"] += int(result[1] > rec_res[i][1])
+            img_crop_list[i], rec_res[i] = crop, result
+        return img_crop_list, rec_res
+
+
+def sorted_boxes(dt_boxes, reading_order="ltr", line_tolerance=10):
     """
-    Sort text boxes in order from top to bottom, left to right
+    Sort text boxes in reading order: lines from top to bottom, boxes within
+    a line from left to right (``ltr``) or right to left (``rtl``, manga)
     args:
         dt_boxes(array):detected text boxes with shape [4, 2]
+        reading_order(str): ``ltr`` or ``rtl``
+        line_tolerance(float): max vertical gap between boxes of one line
     return:
         sorted boxes(array) with shape [4, 2]
+
+    Boxes are sorted by the y of their first point once, then split into
+    lines wherever consecutive boxes are ``line_tolerance`` or more apart,
+    and each line is sorted by x. For ``ltr`` this is the order of the
+    original sort + adjacent-swap pass: a line whose boxes all lie within
+    the tolerance is exactly its stable x sort, and the rare taller chains
+    replay the swap pass on that line only.
     """
-    num_boxes = dt_boxes.shape[0]
-    sorted_boxes = sorted(dt_boxes, key=lambda x: (x[0][1], x[0][0]))
-    _boxes = list(sorted_boxes)
+    if reading_order not in ("ltr", "rtl"):
+        raise ValueError("reading_order must be 'ltr' or 'rtl', got: {}".format(reading_order))
+    if len(dt_boxes) == 0:
+        return []
+
+    boxes = np.asarray(dt_boxes)
+    ys = boxes[:, 0, 1]
+    xs = boxes[:, 0, 0]
+    order = np.lexsort((xs, ys))
+    breaks = np.flatnonzero(np.diff(ys[order]) >= line_tolerance) + 1
+
+    result = []
+    for line in np.split(order, breaks):
+        if reading_order == "rtl":
+            # Right edge (second point) first
+            line = line[np.argsort(-boxes[line, 1, 0], kind="stable")]
+        elif ys[line[-1]] - ys[line[0]] < line_tolerance:
+            line = line[np.argsort(xs[line], kind="stable")]
+        else:
+            line = _swap_pass(list(line), xs, ys, line_tolerance)
+        result.extend(dt_boxes[i] for i in line)
+    return result
+
 
-    for i in range(num_boxes - 1):
+def _swap_pass(line, xs, ys, line_tolerance):
+    """Original adjacent-swap pass over one (y, x)-sorted line of box indices"""
+    for i in range(len(line) - 1):
         for j in range(i, -1, -1):
-            if abs(_boxes[j + 1][0][1] - _boxes[j][0][1]) < 10 and (
-                _boxes[j + 1][0][0] < _boxes[j][0][0]
+            if abs(ys[line[j + 1]] - ys[line[j]]) < line_tolerance and (
+                xs[line[j + 1]] < xs[line[j]]
             ):
-                tmp = _boxes[j]
-                _boxes[j] = _boxes[j + 1]
-                _boxes[j + 1] = tmp
+                line[j], line[j + 1] = line[j + 1], line[j]
             else:
                 break
-    return _boxes
+    return line
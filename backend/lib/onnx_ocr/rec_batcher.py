@@ -0,0 +1,131 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# Granularity at which the scheduler re-checks whether more crops can come
+_POLL_SECONDS = 0.001
+
+
+class RecognitionBatcher(object):
+    """
+    Dynamic micro-batching in front of a TextRecognizer.
+
+    Callers from different threads (concurrent requests) hand in their crops
+    and block on a future. A single scheduler thread collects crops for up to
+    ``max_wait_ms`` or until ``max_batch_size`` crops are pending, runs them
+    through the recognizer width-sorted, in inference batches of at most
+    ``max_batch_size`` crops, and routes each slice of the results back to
+    its caller.
+
+    The scheduler only waits while other pages are in flight (see
+    ``page``) and may still hand in crops; a lone request, e.g. on a
+    process-backend worker that runs one page at a time, is dispatched
+    immediately.
+    """
+
+    def __init__(self, recognizer, max_batch_size=32, max_wait_ms=5.0):
+        self.recognizer = recognizer
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pages = 0
+        self._stats = {
+            "requests": 0,
+            "crops": 0,
+            "batches": 0,
+            "full_batches": 0,
+            "max_batch_crops": 0,
+            "wait_seconds_total": 0.0,
+        }
+        self._thread = threading.Thread(
+            target=self._loop, name="rec-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def __call__(self, img_list):
+        if len(img_list) == 0:
+            return []
+        future = Future()
+        self._queue.put((list(img_list), future, time.perf_counter()))
+        return future.result()
+
+    @contextmanager
+    def page(self):
+        """Mark a page as in flight from detection until its last recognition"""
+        with self._lock:
+            self._pages += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pages -= 1
+
+    def _others_in_flight(self, pending):
+        with self._lock:
+            return self._pages > len(pending)
+
+    def _loop(self):
+        max_wait = self.max_wait_ms / 1000.0
+        while True:
+            first = self._queue.get()
+            pending = [first]
+            crop_num = len(first[0])
+            deadline = time.perf_counter() + max_wait
+            while crop_num < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0 or not self._others_in_flight(pending):
+                        break
+                    try:
+                        item = self._queue.get(timeout=min(remaining, _POLL_SECONDS))
+                    except queue.Empty:
+                        continue
+                pending.append(item)
+                crop_num += len(item[0])
+            self._run(pending, crop_num)
+
+    def _run(self, pending, crop_num):
+        started = time.perf_counter()
+        img_list = [img for crops, _, _ in pending for img in crops]
+        # A single page can bring hundreds of crops; the recognizer splits
+        # them into batches of the cap instead of one huge padded tensor
+        batch_num = min(max(crop_num, 1), self.max_batch_size)
+        try:
+            rec_res = self.recognizer(img_list, batch_num=batch_num)
+        except Exception as e:
+            for _, future, _ in pending:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for crops, future, _ in pending:
+            future.set_result(rec_res[offset:offset + len(crops)])
+            offset += len(crops)
+
+        with self._lock:
+            stats = self._stats
+            stats["requests"] += len(pending)
+            stats["crops"] += crop_num
+            stats["batches"] += -(-crop_num // batch_num)
+            stats["full_batches"] += crop_num // self.max_batch_size
+            stats["max_batch_crops"] = max(stats["max_batch_crops"], batch_num)
+            stats["wait_seconds_total"] += sum(started - queued for _, _, queued in pending)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats["batches"]
+        stats["max_wait_ms"] = self.max_wait_ms
+        stats["max_batch_size"] = self.max_batch_size
+        stats["queue_depth"] = self._queue.qsize()
+        stats["avg_batch_crops"] = stats["crops"] / batches if batches else 0.0
+        stats["avg_requests_per_batch"] = stats["requests"] / batches if batches else 0.0
+        stats["avg_wait_seconds"] = (
+            stats["wait_seconds_total"] / stats["requests"] if stats["requests"] else 0.0
+        )
+        return stats
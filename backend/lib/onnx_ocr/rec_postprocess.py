@@ -35,6 +35,9 @@ class BaseRecLabelDecode(object):
         for i, char in enumerate(dict_character):
             self.dict[char] = i
         self.character = dict_character
+        # Object array so a whole batch of indices is looked up in one take
+        self.character_array = np.empty(len(dict_character), dtype=object)
+        self.character_array[:] = dict_character
 
     def pred_reverse(self, pred):
         pred_re = []
@@ -56,7 +59,48 @@ class BaseRecLabelDecode(object):
         return dict_character
 
     def decode(self, text_index, text_prob=None, is_remove_duplicate=False):
-        """convert text-index into text-label."""
+        """convert text-index into text-label.
+
+        A ``[B, T]`` index array is decoded in one pass: duplicate and
+        ignored-token removal is a single batched mask and the characters
+        of all rows are gathered with one take. Per row only the join and
+        the confidence mean remain, computed on the same contiguous values
+        as before so results are identical to the per-item loop.
+        """
+        text_index = np.asarray(text_index)
+        if text_index.ndim != 2:
+            return self._decode_rows(text_index, text_prob, is_remove_duplicate)
+
+        batch_size, seq_len = text_index.shape
+        if batch_size == 0:
+            return []
+        selection = np.ones(text_index.shape, dtype=bool)
+        if is_remove_duplicate:
+            selection[:, 1:] = text_index[:, 1:] != text_index[:, :-1]
+        selection &= ~np.isin(text_index, self.get_ignored_tokens())
+
+        bounds = np.cumsum(selection.sum(axis=1))[:-1]
+        char_rows = np.split(self.character_array[text_index[selection]], bounds)
+        if text_prob is not None:
+            conf_rows = np.split(np.asarray(text_prob)[selection], bounds)
+        else:
+            conf_rows = [[1] * seq_len] * batch_size
+
+        result_list = []
+        for char_list, conf_list in zip(char_rows, conf_rows):
+            if len(conf_list) == 0:
+                conf_list = [0]
+
+            text = "".join(char_list)
+
+            if self.reverse:  # for arabic rec
+                text = self.pred_reverse(text)
+
+            result_list.append((text, np.mean(conf_list).tolist()))
+        return result_list
+
+    def _decode_rows(self, text_index, text_prob=None, is_remove_duplicate=False):
+        """Per-item decode for ragged index sequences"""
         result_list = []
         ignored_tokens = self.get_ignored_tokens()
         batch_size = len(text_index)
@@ -100,8 +144,9 @@ class CTCLabelDecode(BaseRecLabelDecode):
             preds = preds[-1]
         # if isinstance(preds, paddle.Tensor):
         #     preds = preds.numpy()
+        # Gather the max at the argmax instead of a second reduction over C
         preds_idx = preds.argmax(axis=2)
-        preds_prob = preds.max(axis=2)
+        preds_prob = np.take_along_axis(preds, preds_idx[..., None], axis=2)[..., 0]
         text = self.decode(preds_idx, preds_prob, is_remove_duplicate=True)
         if label is None:
             return text
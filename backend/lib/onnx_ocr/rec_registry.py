@@ -0,0 +1,160 @@
+"""
+Per-language text recognizers, loaded on first use and evicted LRU
+
+The PaddleOCR system keeps one default recognizer (ppocrv5). Languages with
+a specialised model (Korean, Latin, ...) are registered here as a
+``RecognizerSpec``; their ``TextRecognizer`` is only created when the first
+request in that language arrives. Resident recognizers are charged their
+model file size against ``memory_budget`` bytes, and once the total goes
+over it the least recently used ones are dropped until it fits again.
+
+A recognizer that is evicted while a request is still running on it stays
+alive until that request releases it; the next request reloads it.
+"""
+
+import argparse
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+from .predict_rec import TextRecognizer
+
+# Relative model / dictionary paths are resolved against the bundled models
+MODELS_DIR = Path(__file__).resolve().parent / "models"
+
+# Recognizer configuration of one language; ``None`` keeps the default argument
+RecognizerSpec = namedtuple(
+    "RecognizerSpec",
+    ["rec_model_dir", "rec_char_dict_path", "rec_image_shape", "use_space_char"],
+    defaults=(None, None),
+)
+
+
+def _resolve(path):
+    return path if os.path.isabs(path) else str(MODELS_DIR / path)
+
+
+def parse_recognizer_specs(config):
+    """
+    ``RecognizerSpec`` per lower-cased language from a mapping such as
+    ``{"kor": {"rec_model_dir": "korean/rec.onnx", "rec_char_dict_path": "korean/dict.txt"}}``
+
+    Raises:
+        ValueError: If an entry misses a required key or has an unknown one
+    """
+    specs = {}
+    for language, entry in config.items():
+        unknown = set(entry) - set(RecognizerSpec._fields)
+        if unknown:
+            raise ValueError(f"Unknown recognizer options for {language}: {sorted(unknown)}")
+        missing = [key for key in ("rec_model_dir", "rec_char_dict_path") if key not in entry]
+        if missing:
+            raise ValueError(f"Recognizer for {language} needs {missing}")
+        spec = RecognizerSpec(**entry)
+        specs[language.lower()] = spec._replace(
+            rec_model_dir=_resolve(spec.rec_model_dir),
+            rec_char_dict_path=_resolve(spec.rec_char_dict_path),
+        )
+    return specs
+
+
+class RecognizerRegistry(object):
+    """
+    Lazily created ``TextRecognizer`` per language under a memory budget
+
+    Args:
+        args: Base PaddleOCR arguments; each spec overrides its fields
+        specs: ``RecognizerSpec`` per language
+        memory_budget: Bytes of model files kept resident (``0`` = unlimited).
+            The recognizer just requested is never evicted, even when it
+            alone is over the budget.
+    """
+
+    def __init__(self, args, specs, memory_budget=0):
+        self.args = args
+        self.specs = {language.lower(): spec for language, spec in specs.items()}
+        self.memory_budget = memory_budget
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._resident = OrderedDict()  # language -> (recognizer, bytes), oldest first
+        self._stats = {"hits": 0, "loads": 0, "evictions": 0}
+
+    def __contains__(self, language):
+        return language.lower() in self.specs
+
+    def recognizer_args(self, language):
+        """Arguments the recognizer of ``language`` is created with"""
+        spec = self.specs[language.lower()]
+        args = argparse.Namespace(**vars(self.args))
+        for key, value in spec._asdict().items():
+            if value is not None:
+                setattr(args, key, value)
+        return args
+
+    def model_files(self, language):
+        """Model and dictionary files of the recognizer of ``language``"""
+        spec = self.specs[language.lower()]
+        return [spec.rec_model_dir, spec.rec_char_dict_path]
+
+    def get(self, language):
+        """
+        Recognizer of ``language``, created on first use
+
+        Returns:
+            TextRecognizer, or None when ``language`` has no registered model
+        """
+        language = language.lower()
+        if language not in self.specs:
+            return None
+
+        with self._lock:
+            entry = self._resident.get(language)
+            if entry is not None:
+                self._resident.move_to_end(language)
+                self._stats["hits"] += 1
+                return entry[0]
+            # One load per language; other languages keep being served meanwhile
+            loading = self._loading.setdefault(language, threading.Lock())
+
+        with loading:
+            with self._lock:
+                entry = self._resident.get(language)
+                if entry is not None:
+                    self._resident.move_to_end(language)
+                    self._stats["hits"] += 1
+                    return entry[0]
+
+            args = self.recognizer_args(language)
+            recognizer = TextRecognizer(args)
+            size = os.path.getsize(args.rec_model_dir) if os.path.exists(args.rec_model_dir) else 0
+
+            with self._lock:
+                self._resident[language] = (recognizer, size)
+                self._stats["loads"] += 1
+                self._evict(keep=language)
+                self._loading.pop(language, None)
+        return recognizer
+
+    def _evict(self, keep):
+        """Drop least recently used recognizers until the budget holds; needs ``_lock``"""
+        if not self.memory_budget:
+            return
+        for language in list(self._resident):
+            if self.resident_bytes() <= self.memory_budget:
+                break
+            if language != keep:
+                del self._resident[language]
+                self._stats["evictions"] += 1
+
+    def resident_bytes(self):
+        return sum(size for _, size in self._resident.values())
+
+    def stats(self):
+        """Hits, loads and evictions plus the resident languages, least recently used first"""
+        with self._lock:
+            return {
+                **self._stats,
+                "resident": list(self._resident),
+                "resident_bytes": self.resident_bytes(),
+            }
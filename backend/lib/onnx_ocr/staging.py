@@ -0,0 +1,53 @@
+"""
+Reusable input tensors for the recognition and classification batches
+
+Each crop is resized and normalized straight into a row of a per-thread
+``[B, C, H, W]`` staging buffer instead of going through a float copy, a
+transposed copy, a fresh padding array per crop and a concatenate plus
+copy per batch. The buffer is only valid until the next batch built on
+the same thread, which is fine because ``session.run`` consumes it
+synchronously.
+"""
+
+import threading
+
+import numpy as np
+
+# Larger batches (very wide overflow crops) get a one-off array rather
+# than pinning the memory for the lifetime of the thread
+MAX_STAGING_ELEMENTS = 8 * 1024 * 1024
+
+_local = threading.local()
+
+
+def staging_buffer(name, shape, dtype=np.float32):
+    """Contiguous array of ``shape`` backed by this thread's buffer ``name``
+
+    The contents are undefined; callers overwrite every element.
+    """
+    size = int(np.prod(shape))
+    if size > MAX_STAGING_ELEMENTS:
+        return np.empty(shape, dtype=dtype)
+
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    buffer = buffers.get(name)
+    if buffer is None or buffer.size < size or buffer.dtype != dtype:
+        buffer = buffers[name] = np.empty(size, dtype=dtype)
+    return buffer[:size].reshape(shape)
+
+
+def normalize_into(resized, dst):
+    """
+    Write a resized HWC crop into the CHW row ``dst`` and zero its padding
+
+    Same float32 operations, in the same order, as the per-crop
+    ``resize_norm_img`` path: ``/ 255``, ``- 0.5``, ``/ 0.5``.
+    """
+    resized_w = resized.shape[1]
+    content = dst[:, :, :resized_w]
+    np.divide(resized.transpose((2, 0, 1)), 255, out=content, dtype=np.float32)
+    np.subtract(content, 0.5, out=content)
+    np.divide(content, 0.5, out=content)
+    dst[:, :, resized_w:] = 0
@@ -9,51 +9,30 @@ from pathlib import Path
 module_dir = Path(__file__).resolve().parent
 
 
-def get_rotate_crop_image(img, points):
+# Largest deviation, in pixels, of a quad's edges from the image axes for
+# which the crop is a plain slice instead of a perspective warp
+AXIS_ALIGNED_TOLERANCE = 1.0
+
+
+def get_rotate_crop_image(img, points, tolerance=AXIS_ALIGNED_TOLERANCE):
     """
-    img_height, img_width = img.shape[0:2]
-    left = int(np.min(points[:, 0]))
-    right = int(np.max(points[:, 0]))
-    top = int(np.min(points[:, 1]))
-    bottom = int(np.max(points[:, 1]))
-    img_crop = img[top:bottom, left:right, :].copy()
-    points[:, 0] = points[:, 0] - left
-    points[:, 1] = points[:, 1] - top
+    Crop the quad ``points`` (clockwise from top-left) out of ``img``
+
+    Axis-aligned quads are sliced, everything else is warped; see
+    ``get_crops``.
     """
     assert len(points) == 4, "shape of points must be 4*2"
-    img_crop_width = int(
-        max(
-            np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])
-        )
-    )
-    img_crop_height = int(
-        max(
-            np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])
-        )
-    )
-    pts_std = np.float32(
-        [
-            [0, 0],
-            [img_crop_width, 0],
-            [img_crop_width, img_crop_height],
-            [0, img_crop_height],
-        ]
-    )
-    M = cv2.getPerspectiveTransform(points, pts_std)
-    dst_img = cv2.warpPerspective(
-        img,
-        M,
-        (img_crop_width, img_crop_height),
-        borderMode=cv2.BORDER_REPLICATE,
-        flags=cv2.INTER_CUBIC,
-    )
-    dst_img_height, dst_img_width = dst_img.shape[0:2]
-    if dst_img_height * 1.0 / dst_img_width >= 1.5:
-        dst_img = np.rot90(dst_img)
-    return dst_img
+    crops, _ = get_crops(img, [points], "quad", tolerance)
+    return crops[0]
 
 
-def get_minarea_rect_crop(img, points):
+def get_minarea_rect_crop(img, points, tolerance=AXIS_ALIGNED_TOLERANCE):
+    crops, _ = get_crops(img, [points], "poly", tolerance)
+    return crops[0]
+
+
+def minarea_rect_quad(points):
+    """Minimum-area rectangle of a polygon as a quad, clockwise from top-left"""
     bounding_box = cv2.minAreaRect(np.array(points).astype(np.int32))
     points = sorted(list(cv2.boxPoints(bounding_box)), key=lambda x: x[0])
 
@@ -71,9 +50,108 @@ def get_minarea_rect_crop(img, points):
         index_b = 3
         index_c = 2
 
-    box = [points[index_a], points[index_b], points[index_c], points[index_d]]
-    crop_img = get_rotate_crop_image(img, np.array(box))
-    return crop_img
+    return np.array([points[index_a], points[index_b], points[index_c], points[index_d]])
+
+
+def axis_aligned_mask(quads, tolerance=AXIS_ALIGNED_TOLERANCE):
+    """
+    Which ``[N, 4, 2]`` quads (clockwise from top-left) are upright rectangles
+
+    Top and bottom edges must be horizontal and left and right edges
+    vertical within ``tolerance`` pixels.
+    """
+    quads = np.asarray(quads, dtype=np.float32).reshape(-1, 4, 2)
+    x, y = quads[:, :, 0], quads[:, :, 1]
+    return (
+        (np.abs(y[:, 0] - y[:, 1]) <= tolerance)
+        & (np.abs(y[:, 3] - y[:, 2]) <= tolerance)
+        & (np.abs(x[:, 0] - x[:, 3]) <= tolerance)
+        & (np.abs(x[:, 1] - x[:, 2]) <= tolerance)
+        & (x[:, 1] > x[:, 0])
+        & (y[:, 3] > y[:, 0])
+    )
+
+
+def get_crops(img, boxes, box_type="quad", tolerance=AXIS_ALIGNED_TOLERANCE):
+    """
+    Crop every detected box of a page
+
+    Boxes whose quad is axis-aligned within ``tolerance`` pixels become a
+    slice (a view into ``img``, no resampling); the rest go through
+    ``cv2.warpPerspective``. Both give a crop of the same size, and crops
+    at least 1.5 times taller than wide are rotated by 90 degrees.
+
+    Args:
+        img: Page image (H, W, C); only read
+        boxes: Quads clockwise from top-left (``"quad"``) or polygons
+            cropped by their minimum-area rectangle (``"poly"``)
+        box_type: ``"quad"`` or ``"poly"``
+        tolerance: Axis tolerance in pixels; ``None`` warps every box
+
+    Returns:
+        tuple: (crops, counts) where counts is ``{"slice": n, "warp": n}``
+    """
+    if box_type == "quad":
+        quads = [np.asarray(box, dtype=np.float32) for box in boxes]
+    else:
+        quads = [minarea_rect_quad(box).astype(np.float32) for box in boxes]
+    if not quads:
+        return [], {"slice": 0, "warp": 0}
+
+    quads_array = np.stack(quads)
+    widths = np.maximum(
+        np.linalg.norm(quads_array[:, 0] - quads_array[:, 1], axis=1),
+        np.linalg.norm(quads_array[:, 2] - quads_array[:, 3], axis=1)
+    ).astype(np.int64)
+    heights = np.maximum(
+        np.linalg.norm(quads_array[:, 0] - quads_array[:, 3], axis=1),
+        np.linalg.norm(quads_array[:, 1] - quads_array[:, 2], axis=1)
+    ).astype(np.int64)
+
+    img_height, img_width = img.shape[0:2]
+    if tolerance is None:
+        sliced = np.zeros(len(quads), dtype=bool)
+    else:
+        lefts = np.rint((quads_array[:, 0, 0] + quads_array[:, 3, 0]) / 2).astype(np.int64)
+        tops = np.rint((quads_array[:, 0, 1] + quads_array[:, 1, 1]) / 2).astype(np.int64)
+        # Boxes reaching past the page keep the warp and its replicated border
+        sliced = (
+            axis_aligned_mask(quads_array, tolerance)
+            & (lefts >= 0) & (tops >= 0) & (widths > 0) & (heights > 0)
+            & (lefts + widths <= img_width) & (tops + heights <= img_height)
+        )
+
+    crops = []
+    for i, quad in enumerate(quads):
+        if sliced[i]:
+            crop = img[tops[i]:tops[i] + heights[i], lefts[i]:lefts[i] + widths[i]]
+        else:
+            crop = _warp_crop(img, quad, int(widths[i]), int(heights[i]))
+        if crop.shape[0] * 1.0 / crop.shape[1] >= 1.5:
+            crop = np.rot90(crop)
+        crops.append(crop)
+
+    slices = int(sliced.sum())
+    return crops, {"slice": slices, "warp": len(quads) - slices}
+
+
+def _warp_crop(img, points, img_crop_width, img_crop_height):
+    pts_std = np.float32(
+        [
+            [0, 0],
+            [img_crop_width, 0],
+            [img_crop_width, img_crop_height],
+            [0, img_crop_height],
+        ]
+    )
+    M = cv2.getPerspectiveTransform(points, pts_std)
+    return cv2.warpPerspective(
+        img,
+        M,
+        (img_crop_width, img_crop_height),
+        borderMode=cv2.BORDER_REPLICATE,
+        flags=cv2.INTER_CUBIC,
+    )
 
 
 def resize_img(img, input_size=600):
@@ -273,6 +351,8 @@ def infer_args():
     parser.add_argument("--det_limit_side_len", type=float, default=960)
     parser.add_argument("--det_limit_type", type=str, default="max")
     parser.add_argument("--det_box_type", type=str, default="quad")
+    parser.add_argument("--reading_order", type=str, default="ltr")  # "ltr" or "rtl" (manga)
+    parser.add_argument("--crop_axis_tolerance", type=float, default=AXIS_ALIGNED_TOLERANCE)  # px, slice instead of warp
 
     # DB parmas
     parser.add_argument("--det_db_thresh", type=float, default=0.3)
@@ -281,6 +361,14 @@ def infer_args():
     parser.add_argument("--max_batch_size", type=int, default=10)
     parser.add_argument("--use_dilation", type=str2bool, default=False)
     parser.add_argument("--det_db_score_mode", type=str, default="fast")
+    parser.add_argument("--det_db_vectorized", type=str2bool, default=True)
+    # Tall / wide strips: detect overlapping native-resolution tiles instead of shrinking
+    parser.add_argument("--det_tiling", type=str2bool, default=False)
+    parser.add_argument("--det_tile_size", type=int, default=960)
+    parser.add_argument("--det_tile_overlap", type=int, default=160)
+    parser.add_argument("--det_tile_batch", type=int, default=4)
+    parser.add_argument("--det_tile_threshold", type=float, default=2.0)  # tile when the max-side resize shrinks more than this
+    parser.add_argument("--det_tile_aspect", type=float, default=2.0)  # ... and the long side is this many times the short one
 
     # EAST parmas
     parser.add_argument("--det_east_score_thresh", type=float, default=0.8)
@@ -313,6 +401,11 @@ def infer_args():
     parser.add_argument("--rec_image_inverse", type=str2bool, default=True)
     parser.add_argument("--rec_image_shape", type=str, default="3, 48, 320")
     parser.add_argument("--rec_batch_num", type=int, default=6)
+    parser.add_argument("--rec_microbatch", type=str2bool, default=False)
+    parser.add_argument("--rec_microbatch_max_batch_size", type=int, default=32)
+    parser.add_argument("--rec_microbatch_max_wait_ms", type=float, default=5.0)
+    parser.add_argument("--rec_width_buckets", type=str, default="")  # e.g. "320,480,640,960"
+    parser.add_argument("--rec_legacy_stats", type=str2bool, default=False)  # also count the per-batch-width plan
     parser.add_argument("--max_text_length", type=int, default=25)
     parser.add_argument(
         "--rec_char_dict_path",
@@ -352,9 +445,11 @@ def infer_args():
     parser.add_argument("--label_list", type=list, default=["0", "180"])
     parser.add_argument("--cls_batch_num", type=int, default=6)
     parser.add_argument("--cls_thresh", type=float, default=0.9)
+    parser.add_argument("--cls_mode", type=str, default="eager")  # "eager" or "lazy" (only low-confidence crops)
+    parser.add_argument("--cls_lazy_thresh", type=float, default=0.8)
 
     parser.add_argument("--enable_mkldnn", type=str2bool, default=False)
-    parser.add_argument("--cpu_threads", type=int, default=10)
+    parser.add_argument("--cpu_threads", type=int, default=0)  # 0: lib.ort_session options
     parser.add_argument("--use_pdserving", type=str2bool, default=False)
     parser.add_argument("--warmup", type=str2bool, default=False)
 
@@ -0,0 +1,213 @@
+"""
+ONNX Runtime session factory shared by every model of the pipelines
+
+All ``InferenceSession`` objects (PaddleOCR det/cls/rec, the MangaOCR
+encoder/decoder and the comic text detector) are created here so their
+``SessionOptions`` come from one place. The application configures the
+defaults and per-model overrides once with ``configure_sessions``; the
+library never reads application settings itself.
+
+Model names: ``det``, ``cls``, ``rec``, ``manga_encoder``,
+``manga_decoder`` (plain, with-past and merged decoders) and
+``comic_detector``.
+
+A model's ``precision`` selects which file is loaded: ``fp32`` is the
+path as given, ``int8`` the ``<name>.int8.onnx`` sibling written by
+``scripts/quantize_models.py``, which tags it in the ONNX metadata.
+"""
+
+import os
+import threading
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, List, Mapping, Optional
+
+import onnxruntime as ort
+
+MODEL_NAMES = ("det", "cls", "rec", "manga_encoder", "manga_decoder", "comic_detector")
+
+PIPELINE_MODELS = {
+    "paddle_ocr": ("det", "cls", "rec"),
+    "manga_ocr": ("comic_detector", "manga_encoder", "manga_decoder"),
+}
+
+PRECISIONS = ("fp32", "int8")
+
+# ONNX metadata keys written by scripts/quantize_models.py
+PRECISION_METADATA_KEY = "komiix.precision"
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+@dataclass(frozen=True)
+class SessionConfig:
+    """SessionOptions of one model; ``0`` thread counts keep the ORT default"""
+
+    intra_op_num_threads: int = 0
+    inter_op_num_threads: int = 0
+    execution_mode: str = "sequential"
+    graph_optimization_level: str = "all"
+    enable_cpu_mem_arena: bool = True
+    enable_mem_pattern: bool = True
+    allow_spinning: bool = True
+    enable_mkldnn: bool = False
+    precision: str = "fp32"
+
+    def updated(self, overrides: Mapping[str, Any]) -> "SessionConfig":
+        """Copy with ``overrides`` applied; unknown keys raise ``ValueError``"""
+        known = {field.name for field in fields(self)}
+        unknown = set(overrides) - known
+        if unknown:
+            raise ValueError(f"Unknown ONNX Runtime session option(s): {', '.join(sorted(unknown))}")
+        config = replace(self, **overrides)
+        config.validate()
+        return config
+
+    def validate(self):
+        """Raise ``ValueError`` for values ORT would reject or misread"""
+        if self.execution_mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Unknown execution_mode: {self.execution_mode} (expected one of {tuple(EXECUTION_MODES)})"
+            )
+        if self.graph_optimization_level not in GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(
+                f"Unknown graph_optimization_level: {self.graph_optimization_level} "
+                f"(expected one of {tuple(GRAPH_OPTIMIZATION_LEVELS)})"
+            )
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {self.precision} (expected one of {PRECISIONS})")
+        if self.intra_op_num_threads < 0 or self.inter_op_num_threads < 0:
+            raise ValueError("Thread counts must be >= 0")
+
+
+_lock = threading.Lock()
+_default_config = SessionConfig()
+_model_configs: Dict[str, SessionConfig] = {}
+
+
+def configure_sessions(
+    default: Optional[SessionConfig] = None,
+    overrides: Optional[Mapping[str, Mapping[str, Any]]] = None
+):
+    """
+    Set the options used for sessions created from now on
+
+    Args:
+        default: Options for every model without an override
+        overrides: Per-model option dicts applied on top of ``default``,
+            e.g. ``{"rec": {"intra_op_num_threads": 2}}``
+
+    Raises:
+        ValueError: On unknown model names, option names or values
+    """
+    global _default_config, _model_configs
+    default = default or SessionConfig()
+    default.validate()
+    configs = {}
+    for name, options in (overrides or {}).items():
+        if name not in MODEL_NAMES:
+            raise ValueError(f"Unknown ONNX model name: {name} (expected one of {MODEL_NAMES})")
+        configs[name] = default.updated(options)
+    with _lock:
+        _default_config = default
+        _model_configs = configs
+
+
+def get_session_config(name: str) -> SessionConfig:
+    """Options configured for model ``name``"""
+    with _lock:
+        return _model_configs.get(name, _default_config)
+
+
+def build_session_options(config: SessionConfig) -> ort.SessionOptions:
+    """Translate a ``SessionConfig`` into ``onnxruntime.SessionOptions``"""
+    config.validate()
+    options = ort.SessionOptions()
+    if config.intra_op_num_threads:
+        options.intra_op_num_threads = config.intra_op_num_threads
+    if config.inter_op_num_threads:
+        options.inter_op_num_threads = config.inter_op_num_threads
+    options.execution_mode = EXECUTION_MODES[config.execution_mode]
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[config.graph_optimization_level]
+    options.enable_cpu_mem_arena = config.enable_cpu_mem_arena
+    options.enable_mem_pattern = config.enable_mem_pattern
+    spinning = "1" if config.allow_spinning else "0"
+    options.add_session_config_entry("session.intra_op.allow_spinning", spinning)
+    options.add_session_config_entry("session.inter_op.allow_spinning", spinning)
+    return options
+
+
+def _providers(config: SessionConfig, providers: Optional[List[Any]]) -> List[Any]:
+    providers = list(providers or ["CPUExecutionProvider"])
+    if config.enable_mkldnn and "DnnlExecutionProvider" in ort.get_available_providers():
+        providers.insert(0, "DnnlExecutionProvider")
+    return providers
+
+
+def quantized_model_path(model_path: str, precision: str) -> str:
+    """Path of the ``precision`` variant of ``model_path`` (``det.onnx`` -> ``det.int8.onnx``)"""
+    if precision == "fp32":
+        return model_path
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.{precision}{ext}"
+
+
+def resolve_model_path(model_path: str, precision: str) -> str:
+    """
+    File to load for ``model_path`` at ``precision``
+
+    Raises:
+        FileNotFoundError: If the quantized variant has not been generated
+    """
+    path = quantized_model_path(model_path, precision)
+    if precision != "fp32" and not os.path.exists(path):
+        raise FileNotFoundError(
+            f"No {precision} variant of {model_path} at {path}; generate it with scripts/quantize_models.py"
+        )
+    return path
+
+
+def create_session(
+    model_path: str,
+    name: str,
+    providers: Optional[List[Any]] = None,
+    config: Optional[SessionConfig] = None
+) -> ort.InferenceSession:
+    """
+    Create an ``InferenceSession`` with the options configured for ``name``
+
+    Args:
+        model_path: Path to the FP32 ``.onnx`` file; the configured
+            precision picks the variant actually loaded
+        name: Model name from ``MODEL_NAMES``
+        providers: Execution providers (CPU only by default)
+        config: Explicit options instead of the configured ones
+
+    Returns:
+        onnxruntime.InferenceSession
+
+    Raises:
+        FileNotFoundError: If the configured precision has no model file
+        ValueError: If that file is not tagged with the configured precision
+    """
+    config = config or get_session_config(name)
+    path = resolve_model_path(model_path, config.precision)
+    session = ort.InferenceSession(
+        path,
+        sess_options=build_session_options(config),
+        providers=_providers(config, providers)
+    )
+    if config.precision != "fp32":
+        tagged = session.get_modelmeta().custom_metadata_map.get(PRECISION_METADATA_KEY)
+        if tagged != config.precision:
+            raise ValueError(f"{path} is tagged as {tagged or 'untagged'}, expected {config.precision}")
+    return session
@@ -11,6 +11,8 @@ from PIL import ImageFont
 import pyphen
 from typing import Tuple, List, Optional
 
+from .timing import stage
+
 
 def get_bubble_mask(image: np.ndarray, seed_point: Tuple[int, int]) -> np.ndarray:
     """
@@ -347,11 +349,13 @@ def process_bubble_from_array(
         raise ValueError("Image array is None")
         
     # 2. Get Mask
-    mask = get_bubble_mask(image, seed_point)
-    mask_area = np.count_nonzero(mask)
+    with stage("bubble_mask"):
+        mask = get_bubble_mask(image, seed_point)
+        mask_area = np.count_nonzero(mask)
     
     # 3. Get Largest Inscribed Rectangle
-    rx, ry, rw, rh = get_largest_inscribed_rect(mask)
+    with stage("inscribed_rect"):
+        rx, ry, rw, rh = get_largest_inscribed_rect(mask)
     rect_area = rw * rh
     
     # 4. Apply 80% Area Rule
@@ -372,6 +376,7 @@ def process_bubble_from_array(
         final_y = center_y - final_h // 2
     
     # 5. Calculate Font Size with Hyphenation
-    font_size, hyphenations = calculate_optimal_font_size(text, font_path, final_w, final_h)
+    with stage("font_fit"):
+        font_size, hyphenations = calculate_optimal_font_size(text, font_path, final_w, final_h)
     
     return (final_x, final_y, final_h, final_w), font_size, hyphenations
@@ -0,0 +1,57 @@
+"""
+Per-stage wall-clock timers for the inference pipelines
+
+Pipelines wrap their stages in ``stage("name")``. Durations are only
+recorded inside a ``collect_timings()`` block on the same thread, so
+callers that never ask for timings pay a single attribute lookup per
+stage. Repeated stages (e.g. one encoder run per chunk) accumulate.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+_local = threading.local()
+
+
+@contextmanager
+def collect_timings(initial: Optional[Dict[str, float]] = None) -> Iterator[Dict[str, float]]:
+    """
+    Collect stage durations (seconds) recorded on this thread
+
+    Nested blocks share the outermost dict, so a caller that already
+    collects (e.g. the inference executor) sees the stages of the code it
+    runs.
+
+    Args:
+        initial: Durations measured elsewhere to seed the dict with
+    """
+    timings = getattr(_local, "timings", None)
+    if timings is not None:
+        if initial:
+            timings.update(initial)
+        yield timings
+        return
+
+    timings = dict(initial or {})
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as stage ``name`` if timings are being collected"""
+    timings = getattr(_local, "timings", None)
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
@@ -0,0 +1,413 @@
+"""
+Reproducible latency benchmark for the OCR pipelines
+
+Runs the ONNXPaddleOcr path and the TextDetector + MangaOCR path (the same
+``run_ocr`` the API uses) over a fixed corpus of synthetic manga-like pages
+generated locally from fixed seeds, so no network or sample data is needed.
+
+Reports p50/p95/p99 latency, pages per second and peak RSS per pipeline and
+per stage (via ``lib.timing``), can save the run as a JSON baseline and
+compares against a stored baseline with a one-sided Mann-Whitney U test.
+
+Usage:
+    python scripts/benchmark_ocr.py --save-baseline benchmarks/baseline.json
+    python scripts/benchmark_ocr.py --baseline benchmarks/baseline.json
+
+Exits with status 1 when a statistically significant regression is found.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+from loguru import logger
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+TARGETS = {
+    "paddle_ocr": "eng",
+    "manga_ocr": "jpn",
+}
+
+PAGE_SIZE = (1200, 850)  # (height, width), a typical scanned manga page downscaled
+PERCENTILES = (50, 95, 99)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class BaselineError(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+def _draw_text_lines(page: np.ndarray, rng: np.random.Generator, x: int, y: int, w: int, h: int, vertical: bool):
+    """Fill a bubble area with glyph-like text lines"""
+    words = ["THE", "WAIT", "NO WAY", "WHAT?!", "HEY", "RUN", "I KNOW", "SORRY", "LOOK"]
+    if vertical:
+        # Vertical columns of blocky glyphs, right to left as in Japanese manga
+        column_w = 14
+        for cx in range(x + w - column_w, x, -column_w - 6):
+            for cy in range(y, y + h - 14, 16):
+                if rng.random() < 0.8:
+                    gx, gy = cx + int(rng.integers(0, 3)), cy + int(rng.integers(0, 3))
+                    cv2.rectangle(page, (gx, gy), (gx + 10, gy + 11), 0, 1)
+                    cv2.line(page, (gx + 2, gy + 5), (gx + 8, gy + 5), 0, 1)
+    else:
+        line_h = 22
+        for ly in range(y + line_h, y + h, line_h + 6):
+            line_words = list(rng.choice(words, size=int(rng.integers(1, 3))))
+            text = " ".join(line_words)
+            # Keep the line inside the bubble
+            while len(line_words) > 1 and cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0][0] > w:
+                line_words.pop()
+                text = " ".join(line_words)
+            cv2.putText(page, text, (x, ly), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 2, cv2.LINE_AA)
+
+
+def generate_page(seed: int, vertical: bool = False) -> np.ndarray:
+    """
+    Generate one synthetic manga-like page (BGR)
+
+    Panels with borders, screentone and hatching, and white speech bubbles
+    holding text lines. Identical for a given seed on every machine.
+    """
+    rng = np.random.default_rng(seed)
+    height, width = PAGE_SIZE
+    page = np.full((height, width), 255, dtype=np.uint8)
+
+    # Panel grid
+    rows = int(rng.integers(2, 4))
+    row_edges = np.linspace(20, height - 20, rows + 1).astype(int)
+    for r in range(rows):
+        cols = int(rng.integers(1, 3))
+        col_edges = np.linspace(20, width - 20, cols + 1).astype(int)
+        for c in range(cols):
+            x0, x1 = col_edges[c] + 6, col_edges[c + 1] - 6
+            y0, y1 = row_edges[r] + 6, row_edges[r + 1] - 6
+
+            # Screentone dots and hatching inside the panel
+            tone = rng.integers(0, 255, size=(y1 - y0, x1 - x0), dtype=np.uint8)
+            page[y0:y1, x0:x1] = np.where(tone < 40, 120, 255).astype(np.uint8)
+            for _ in range(int(rng.integers(5, 15))):
+                p0 = (int(rng.integers(x0, x1)), int(rng.integers(y0, y1)))
+                p1 = (int(rng.integers(x0, x1)), int(rng.integers(y0, y1)))
+                cv2.line(page, p0, p1, 60, int(rng.integers(1, 3)))
+            cv2.rectangle(page, (x0, y0), (x1, y1), 0, 3)
+
+            # Speech bubble with text
+            bw = int(min(x1 - x0 - 20, rng.integers(160, 260)))
+            bh = int(min(y1 - y0 - 20, rng.integers(90, 160)))
+            if bw < 80 or bh < 60:
+                continue
+            bx = int(rng.integers(x0 + 10, x1 - bw - 9))
+            by = int(rng.integers(y0 + 10, y1 - bh - 9))
+            center = (bx + bw // 2, by + bh // 2)
+            cv2.ellipse(page, center, (bw // 2, bh // 2), 0, 0, 360, 255, -1)
+            cv2.ellipse(page, center, (bw // 2, bh // 2), 0, 0, 360, 0, 2)
+            _draw_text_lines(
+                page, rng,
+                bx + bw // 5, by + bh // 5, bw * 3 // 5, bh * 3 // 5,
+                vertical
+            )
+
+    return cv2.cvtColor(page, cv2.COLOR_GRAY2BGR)
+
+
+def generate_corpus(pages: int, vertical: bool) -> List[np.ndarray]:
+    """Fixed corpus: page ``i`` always uses seed ``i``"""
+    return [generate_page(seed, vertical=vertical) for seed in range(pages)]
+
+
+def corpus_hash(corpus: List[np.ndarray]) -> str:
+    """Fingerprint of the corpus pixels, stored with baselines"""
+    digest = hashlib.sha256()
+    for page in corpus:
+        digest.update(page.tobytes())
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency percentiles (seconds) of a list of samples"""
+    values = np.asarray(samples, dtype=np.float64)
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary["mean"] = float(values.mean())
+    summary["count"] = int(values.size)
+    return summary
+
+
+def mann_whitney_greater(current: List[float], baseline: List[float]) -> float:
+    """
+    One-sided Mann-Whitney U test that ``current`` tends to be larger
+
+    Normal approximation with tie correction, which is accurate for the
+    sample sizes the benchmark produces (tens to hundreds).
+
+    Returns:
+        p-value of H1: current latencies are stochastically greater
+    """
+    x = np.asarray(current, dtype=np.float64)
+    y = np.asarray(baseline, dtype=np.float64)
+    n1, n2 = x.size, y.size
+    if n1 == 0 or n2 == 0:
+        raise ValueError("Both samples must be non-empty")
+
+    combined = np.concatenate([x, y])
+    order = np.argsort(combined, kind="mergesort")
+    ranks = np.empty(combined.size, dtype=np.float64)
+    ranks[order] = np.arange(1, combined.size + 1)
+    # Average ranks of ties
+    _, inverse, counts = np.unique(combined, return_inverse=True, return_counts=True)
+    rank_sums = np.bincount(inverse, weights=ranks)
+    ranks = rank_sums[inverse] / counts[inverse]
+
+    u1 = ranks[:n1].sum() - n1 * (n1 + 1) / 2.0
+    n = n1 + n2
+    tie_term = float((counts ** 3 - counts).sum()) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return 1.0
+    # Continuity correction towards the null
+    z = (u1 - n1 * n2 / 2.0 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    alpha: float,
+    min_slowdown: float
+) -> List[Dict[str, Any]]:
+    """
+    Compare every pipeline and stage present in both runs
+
+    A series regresses when its latencies are significantly greater
+    (p < ``alpha``) and the median slowed down by more than ``min_slowdown``.
+    """
+    findings = []
+    for target, result in current["results"].items():
+        base = baseline["results"].get(target)
+        if base is None or result.get("skipped") or base.get("skipped"):
+            continue
+        series = [("total", result["samples"], base["samples"])]
+        for stage_name, samples in result.get("stage_samples", {}).items():
+            if stage_name in base.get("stage_samples", {}):
+                series.append((stage_name, samples, base["stage_samples"][stage_name]))
+
+        for name, samples, base_samples in series:
+            p_value = mann_whitney_greater(samples, base_samples)
+            base_median = float(np.median(base_samples))
+            slowdown = float(np.median(samples)) / base_median - 1.0 if base_median > 0 else 0.0
+            findings.append({
+                "target": target,
+                "series": name,
+                "p_value": p_value,
+                "median_change": slowdown,
+                "regression": p_value < alpha and slowdown > min_slowdown,
+            })
+    return findings
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_target(
+    fn: Callable[[np.ndarray], Any],
+    corpus: List[np.ndarray],
+    repeat: int,
+    warmup: int
+) -> Dict[str, Any]:
+    """Time ``fn`` over the corpus ``repeat`` times after ``warmup`` pages"""
+    from lib.timing import collect_timings
+
+    for page in corpus[:warmup]:
+        fn(page)
+
+    samples = []
+    stage_samples: Dict[str, List[float]] = {}
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for page in corpus:
+            with collect_timings() as timings:
+                page_start = time.perf_counter()
+                fn(page)
+                samples.append(time.perf_counter() - page_start)
+            for stage_name, seconds in timings.items():
+                stage_samples.setdefault(stage_name, []).append(seconds)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "samples": samples,
+        "stage_samples": stage_samples,
+        "summary": summarize(samples),
+        "stages": {name: summarize(values) for name, values in stage_samples.items()},
+        "pages_per_second": len(samples) / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Library versions that commonly move latency"""
+    import onnxruntime as ort
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "onnxruntime": ort.__version__,
+    }
+
+
+def main(
+    targets: List[str],
+    pages: int,
+    repeat: int,
+    warmup: int,
+    output: Optional[Path],
+    baseline_path: Optional[Path],
+    save_baseline: Optional[Path],
+    alpha: float,
+    min_slowdown: float,
+    dump_corpus: Optional[Path]
+) -> int:
+    from app.services.ocr_pipeline import run_ocr
+
+    run = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": environment(),
+        "config": {"pages": pages, "repeat": repeat, "warmup": warmup, "page_size": list(PAGE_SIZE)},
+        "corpus": {},
+        "results": {},
+    }
+
+    for target in targets:
+        language = TARGETS[target]
+        corpus = generate_corpus(pages, vertical=(language == "jpn"))
+        run["corpus"][target] = corpus_hash(corpus)
+        if dump_corpus:
+            dump_dir = dump_corpus / target
+            dump_dir.mkdir(parents=True, exist_ok=True)
+            for i, page in enumerate(corpus):
+                cv2.imwrite(str(dump_dir / f"page_{i:03d}.png"), page)
+
+        logger.info(f"Benchmarking {target} on {pages} pages x {repeat} runs")
+        try:
+            result = run_target(lambda img: run_ocr(img, language), corpus, repeat, warmup)
+        except Exception as e:
+            # Missing models are not fatal: report and move on to the next pipeline
+            logger.error(f"Skipping {target}: {str(e)}")
+            run["results"][target] = {"skipped": True, "error": str(e)}
+            continue
+
+        run["results"][target] = result
+        summary = result["summary"]
+        logger.info(
+            f"{target}: p50={summary['p50'] * 1000:.1f}ms p95={summary['p95'] * 1000:.1f}ms "
+            f"p99={summary['p99'] * 1000:.1f}ms {result['pages_per_second']:.2f} pages/s "
+            f"peak RSS {result['peak_rss_mb']:.0f} MiB"
+        )
+        for stage_name, stage_summary in sorted(result["stages"].items()):
+            logger.info(
+                f"  {stage_name:<24} p50={stage_summary['p50'] * 1000:8.2f}ms "
+                f"p95={stage_summary['p95'] * 1000:8.2f}ms"
+            )
+
+    if all(result.get("skipped") for result in run["results"].values()):
+        raise BenchmarkError("No pipeline could be benchmarked")
+
+    for path in (output, save_baseline):
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(run, indent=2))
+            logger.info(f"Results saved to {path}")
+
+    if not baseline_path:
+        return 0
+
+    try:
+        baseline = json.loads(baseline_path.read_text())
+    except (OSError, ValueError) as e:
+        raise BaselineError(f"Cannot read baseline {baseline_path}: {e}")
+
+    for target, digest in run["corpus"].items():
+        if baseline.get("corpus", {}).get(target) not in (None, digest):
+            logger.warning(f"Corpus of {target} differs from the baseline; comparison is not like for like")
+    if baseline.get("environment") != run["environment"]:
+        logger.warning(f"Environment changed since baseline: {baseline.get('environment')}")
+
+    findings = compare(run, baseline, alpha, min_slowdown)
+    regressions = [f for f in findings if f["regression"]]
+    for finding in findings:
+        log = logger.error if finding["regression"] else logger.info
+        log(
+            f"{finding['target']}/{finding['series']}: median {finding['median_change'] * 100:+.1f}% "
+            f"(p={finding['p_value']:.4f}){' REGRESSION' if finding['regression'] else ''}"
+        )
+
+    if regressions:
+        logger.error(f"{len(regressions)} significant regressions against {baseline_path}")
+        return 1
+    logger.info("No significant regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the OCR pipelines on a synthetic corpus")
+    parser.add_argument('--targets', nargs='+', choices=sorted(TARGETS), default=sorted(TARGETS), help='Pipelines to benchmark')
+    parser.add_argument('--pages', type=int, default=20, help='Pages in the synthetic corpus')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the corpus')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed pages before measuring')
+    parser.add_argument('--output', type=Path, help='Write the results JSON here')
+    parser.add_argument('--baseline', type=Path, help='Baseline JSON to compare against')
+    parser.add_argument('--save-baseline', type=Path, help='Save this run as a baseline')
+    parser.add_argument('--alpha', type=float, default=0.01, help='Significance level of the regression test')
+    parser.add_argument('--min-slowdown', type=float, default=0.05, help='Ignore median slowdowns below this fraction')
+    parser.add_argument('--dump-corpus', type=Path, help='Also write the corpus pages as PNGs here')
+    args = parser.parse_args()
+
+    try:
+        sys.exit(main(
+            targets=args.targets,
+            pages=args.pages,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            output=args.output,
+            baseline_path=args.baseline,
+            save_baseline=args.save_baseline,
+            alpha=args.alpha,
+            min_slowdown=args.min_slowdown,
+            dump_corpus=args.dump_corpus
+        ))
+    except (BenchmarkError, BaselineError) as e:
+        logger.error(f"Error in benchmark: {str(e)}")
+        sys.exit(1)
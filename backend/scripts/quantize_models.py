@@ -0,0 +1,466 @@
+"""
+INT8 variants of the OCR models, gated on accuracy and latency
+
+Quantizes the FP32 models (PaddleOCR det/cls/rec, the comic text detector
+and the MangaOCR encoder/decoders) with ONNX Runtime and writes each one as
+``<model>.int8.onnx`` next to the original, tagged in the ONNX metadata
+with its precision, quantization mode, calibration set and the hash of
+the FP32 source. Static quantization calibrates on the inputs the FP32
+models actually receive while running the pipelines over a local
+calibration set: images from ``--calibration-dir`` or, without one,
+synthetic pages from seeds disjoint from the benchmark corpus.
+
+Then every quantized model is evaluated on its own over the benchmark
+corpus of ``scripts/benchmark_ocr.py``: character accuracy of the page
+text against the FP32 run, and page latency against FP32. The report
+(JSON plus a Markdown table) lists which models pass the gate and the
+``ORT_SESSION_OVERRIDES`` entries that enable INT8 for exactly those.
+
+Usage:
+    python scripts/quantize_models.py --models det rec cls --calibration-dir samples/pages
+    python scripts/quantize_models.py --skip-quantize --report benchmarks/quantization.json
+
+Requires the ``onnx`` package (used by ``onnxruntime.quantization``).
+"""
+
+import argparse
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+from loguru import logger
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from lib.ort_session import MODEL_NAMES, PIPELINE_MODELS, PRECISION_METADATA_KEY, quantized_model_path  # noqa: E402
+from scripts.benchmark_ocr import TARGETS, environment, generate_corpus, generate_page, summarize  # noqa: E402
+
+MODEL_TARGETS = {name: target for target, names in PIPELINE_MODELS.items() for name in names}
+
+# Convolutional models calibrate well; the recurrent recognizer and the
+# transformer encoder/decoders keep dynamic activation ranges
+DEFAULT_MODES = {
+    "det": "static",
+    "cls": "static",
+    "rec": "dynamic",
+    "comic_detector": "static",
+    "manga_encoder": "dynamic",
+    "manga_decoder": "dynamic",
+}
+# Autoregressive decoders only support dynamic quantization here
+DYNAMIC_ONLY = {"manga_decoder"}
+
+CALIBRATION_SEED_OFFSET = 10000
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+
+
+class QuantizationError(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Models
+# ---------------------------------------------------------------------------
+
+def model_paths(name: str) -> List[str]:
+    """FP32 files of model ``name`` as the pipelines load them"""
+    from app.services.ocr_pipeline import MANGA_OCR_MODEL_DIR, TEXT_DETECTOR_MODEL_DIR
+    from lib.onnx_ocr.utils import infer_args
+
+    if name in ("det", "cls", "rec"):
+        return [getattr(infer_args().parse_args([]), f"{name}_model_dir")]
+    if name == "comic_detector":
+        return [os.path.join(TEXT_DETECTOR_MODEL_DIR, "comic-text-detector.onnx")]
+    if name == "manga_encoder":
+        return [os.path.join(MANGA_OCR_MODEL_DIR, "encoder_model.onnx")]
+    decoders = ("decoder_model.onnx", "decoder_with_past_model.onnx", "decoder_model_merged.onnx")
+    return [os.path.join(MANGA_OCR_MODEL_DIR, decoder) for decoder in decoders]
+
+
+def quantization_mode(name: str, mode: str) -> str:
+    """Mode used for model ``name`` when ``--mode`` is ``mode``"""
+    if name in DYNAMIC_ONLY:
+        return "dynamic"
+    return DEFAULT_MODES[name] if mode == "auto" else mode
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def quantization_metadata(source: str, mode: str, calibration: str) -> Dict[str, str]:
+    """ONNX ``metadata_props`` entries of a quantized model"""
+    return {
+        PRECISION_METADATA_KEY: "int8",
+        "komiix.quantization": mode,
+        "komiix.source": os.path.basename(source),
+        "komiix.source_sha256": file_sha256(source),
+        "komiix.calibration": calibration,
+        "komiix.created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def quantize_file(source: str, target: str, mode: str, feeds: Optional[List[Dict[str, np.ndarray]]], calibration: str):
+    """Quantize one ONNX file to INT8 and tag it"""
+    try:
+        import onnx
+        from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+    except ImportError as e:
+        raise QuantizationError(f"Quantization needs the onnx package: {e}")
+
+    if mode == "static":
+        if not feeds:
+            raise QuantizationError(f"No calibration inputs recorded for {source}")
+        quantize_static(
+            source, target, FeedReader(feeds),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+    else:
+        quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+
+    model = onnx.load(target)
+    props = {prop.key: prop.value for prop in model.metadata_props}
+    props.update(quantization_metadata(source, mode, calibration))
+    onnx.helper.set_model_props(model, props)
+    onnx.save(model, target)
+
+
+class FeedReader:
+    """``CalibrationDataReader`` over recorded input feeds"""
+
+    def __init__(self, feeds: List[Dict[str, np.ndarray]]):
+        self._feeds = iter(feeds)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        return next(self._feeds, None)
+
+
+# ---------------------------------------------------------------------------
+# Pipelines
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def session_overrides(overrides: Dict[str, Dict[str, Any]]) -> Iterator[None]:
+    """Reload the pipelines with ``overrides`` on top of the configured ORT settings"""
+    from app.core.config import get_settings
+    from app.services.ocr_pipeline import reset_pipelines
+
+    settings = get_settings()
+    merged = json.loads(settings.ORT_SESSION_OVERRIDES) if settings.ORT_SESSION_OVERRIDES.strip() else {}
+    for name in MODEL_NAMES:
+        options = {**merged.get(name, {}), "precision": "fp32", **overrides.get(name, {})}
+        merged[name] = options
+    saved = {key: os.environ.get(key) for key in ("ORT_SESSION_OVERRIDES", "OCR_REC_MICROBATCH")}
+    os.environ["ORT_SESSION_OVERRIDES"] = json.dumps(merged)
+    # Single-threaded runs: the micro-batcher would only add its wait
+    os.environ["OCR_REC_MICROBATCH"] = "false"
+    get_settings.cache_clear()
+    reset_pipelines()
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        get_settings.cache_clear()
+        reset_pipelines()
+
+
+class RecordingSession:
+    """Forwards to an ``InferenceSession`` and keeps a copy of the first input feeds"""
+
+    def __init__(self, session, limit: int):
+        self.session = session
+        self.limit = limit
+        self.feeds: List[Dict[str, np.ndarray]] = []
+
+    def run(self, output_names, input_feed, *args, **kwargs):
+        if len(self.feeds) < self.limit:
+            # Batches may live in reused staging buffers
+            self.feeds.append({key: np.array(value, copy=True) for key, value in input_feed.items()})
+        return self.session.run(output_names, input_feed, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+def _session_owner(name: str):
+    """(object, attribute) holding the FP32 session of model ``name``"""
+    from app.services import ocr_pipeline
+
+    if name == "det":
+        return ocr_pipeline.get_paddle_ocr().text_detector, "det_onnx_session"
+    if name == "cls":
+        return ocr_pipeline.get_paddle_ocr().text_classifier, "cls_onnx_session"
+    if name == "rec":
+        return ocr_pipeline.get_paddle_ocr().text_recognizer, "rec_onnx_session"
+    if name == "comic_detector":
+        return ocr_pipeline.get_text_detector().model, "session"
+    if name == "manga_encoder":
+        return ocr_pipeline.get_manga_ocr().model, "encoder_session"
+    raise QuantizationError(f"No calibration recorder for {name}")
+
+
+def load_calibration_pages(target: str, directory: Optional[Path], limit: int) -> List[np.ndarray]:
+    """Up to ``limit`` local pages, or synthetic ones outside the benchmark seeds"""
+    if directory is None:
+        vertical = TARGETS[target] == "jpn"
+        return [generate_page(CALIBRATION_SEED_OFFSET + i, vertical=vertical) for i in range(limit)]
+
+    paths = sorted(p for p in directory.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)[:limit]
+    pages = [page for page in (cv2.imread(str(p)) for p in paths) if page is not None]
+    if not pages:
+        raise QuantizationError(f"No readable images in {directory}")
+    return pages
+
+
+def record_calibration(
+    names: List[str],
+    calibration_dir: Optional[Path],
+    pages: int,
+    max_feeds: int
+) -> Dict[str, List[Dict[str, np.ndarray]]]:
+    """Input feeds each model receives while the FP32 pipelines run the calibration set"""
+    from app.services.ocr_pipeline import run_ocr
+
+    feeds = {}
+    with session_overrides({}):
+        recorders = {}
+        for name in names:
+            owner, attribute = _session_owner(name)
+            recorders[name] = RecordingSession(getattr(owner, attribute), max_feeds)
+            setattr(owner, attribute, recorders[name])
+
+        for target in sorted({MODEL_TARGETS[name] for name in names}):
+            for page in load_calibration_pages(target, calibration_dir, pages):
+                run_ocr(page, TARGETS[target])
+
+        for name, recorder in recorders.items():
+            feeds[name] = recorder.feeds
+            logger.info(f"Recorded {len(recorder.feeds)} calibration inputs for {name}")
+    return feeds
+
+
+# ---------------------------------------------------------------------------
+# Accuracy and latency
+# ---------------------------------------------------------------------------
+
+def edit_distance(reference: str, hypothesis: str) -> int:
+    """Levenshtein distance between two strings"""
+    if len(reference) < len(hypothesis):
+        reference, hypothesis = hypothesis, reference
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_char != hyp_char)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def character_accuracy(references: List[str], hypotheses: List[str]) -> float:
+    """``1 - CER`` over a corpus, clamped at 0; 1.0 when there is no reference text"""
+    characters = sum(len(reference) for reference in references)
+    if characters == 0:
+        return 1.0 if not any(hypotheses) else 0.0
+    errors = sum(edit_distance(ref, hyp) for ref, hyp in zip(references, hypotheses))
+    return max(0.0, 1.0 - errors / characters)
+
+
+def passes_gate(accuracy: float, median_change: float, min_accuracy: float, min_speedup: float) -> bool:
+    """INT8 is worth enabling when accuracy holds and the median page gets faster"""
+    return accuracy >= min_accuracy and -median_change >= min_speedup
+
+
+def run_corpus(target: str, corpus: List[np.ndarray], repeat: int, warmup: int) -> Dict[str, Any]:
+    """Page texts of the first pass and page latencies over ``repeat`` passes"""
+    from app.services.ocr_pipeline import run_ocr
+
+    language = TARGETS[target]
+    for page in corpus[:warmup]:
+        run_ocr(page, language)
+
+    texts, samples = [], []
+    for run in range(repeat):
+        for page in corpus:
+            start = time.perf_counter()
+            response = run_ocr(page, language)
+            samples.append(time.perf_counter() - start)
+            if run == 0:
+                texts.append("\n".join(result["text"] for result in response["results"]))
+    return {"texts": texts, "samples": samples, "summary": summarize(samples)}
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    """Comparison table of the report"""
+    lines = [
+        "# INT8 quantization report",
+        "",
+        f"Created {report['created']}, {report['config']['pages']} pages x {report['config']['repeat']} runs.",
+        "",
+        "| Model | Mode | Char accuracy | FP32 p50 (ms) | INT8 p50 (ms) | Median change | Gate |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    for name, result in report["models"].items():
+        if "error" in result:
+            lines.append(f"| {name} | {result.get('mode', '-')} | - | - | - | - | error: {result['error']} |")
+            continue
+        lines.append(
+            f"| {name} | {result['mode']} | {result['char_accuracy']:.4f} "
+            f"| {result['fp32']['p50'] * 1000:.1f} | {result['int8']['p50'] * 1000:.1f} "
+            f"| {result['median_change'] * 100:+.1f}% | {'pass' if result['passed'] else 'fail'} |"
+        )
+    lines += ["", f"ORT_SESSION_OVERRIDES: `{json.dumps(report['recommended_overrides'])}`", ""]
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def main(
+    models: List[str],
+    mode: str,
+    calibration_dir: Optional[Path],
+    calibration_pages: int,
+    max_calibration_feeds: int,
+    skip_quantize: bool,
+    pages: int,
+    repeat: int,
+    warmup: int,
+    min_accuracy: float,
+    min_speedup: float,
+    report_path: Path
+) -> int:
+    modes = {name: quantization_mode(name, mode) for name in models}
+    results: Dict[str, Dict[str, Any]] = {name: {"mode": modes[name]} for name in models}
+
+    available = []
+    for name in models:
+        sources = [path for path in model_paths(name) if os.path.exists(path)]
+        if not sources:
+            logger.error(f"Skipping {name}: FP32 model not found at {model_paths(name)}")
+            results[name]["error"] = "FP32 model not found"
+            continue
+        results[name]["files"] = [quantized_model_path(path, "int8") for path in sources]
+        available.append((name, sources))
+
+    if not skip_quantize:
+        static = [name for name, _ in available if modes[name] == "static"]
+        feeds = record_calibration(static, calibration_dir, calibration_pages, max_calibration_feeds) if static else {}
+        calibration = f"{calibration_dir or 'synthetic'} ({calibration_pages} pages)"
+        for name, sources in available:
+            for source in sources:
+                target = quantized_model_path(source, "int8")
+                logger.info(f"Quantizing {source} -> {target} ({modes[name]})")
+                quantize_file(source, target, modes[name], feeds.get(name), calibration)
+
+    ready = [name for name, sources in available if all(os.path.exists(f) for f in results[name]["files"])]
+    for name, _ in available:
+        if name not in ready:
+            results[name]["error"] = "INT8 model not found"
+
+    baselines = {}
+    for target in sorted({MODEL_TARGETS[name] for name in ready}):
+        corpus = generate_corpus(pages, vertical=(TARGETS[target] == "jpn"))
+        with session_overrides({}):
+            baselines[target] = (corpus, run_corpus(target, corpus, repeat, warmup))
+
+    for name in ready:
+        corpus, baseline = baselines[MODEL_TARGETS[name]]
+        with session_overrides({name: {"precision": "int8"}}):
+            quantized = run_corpus(MODEL_TARGETS[name], corpus, repeat, warmup)
+        accuracy = character_accuracy(baseline["texts"], quantized["texts"])
+        median_change = quantized["summary"]["p50"] / baseline["summary"]["p50"] - 1.0
+        results[name].update({
+            "char_accuracy": accuracy,
+            "fp32": baseline["summary"],
+            "int8": quantized["summary"],
+            "median_change": median_change,
+            "passed": passes_gate(accuracy, median_change, min_accuracy, min_speedup),
+        })
+        logger.info(
+            f"{name}: char accuracy {accuracy:.4f}, median {median_change * 100:+.1f}% "
+            f"-> {'pass' if results[name]['passed'] else 'fail'}"
+        )
+
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "environment": environment(),
+        "config": {
+            "pages": pages, "repeat": repeat, "warmup": warmup,
+            "min_accuracy": min_accuracy, "min_speedup": min_speedup,
+            "calibration_dir": str(calibration_dir) if calibration_dir else None,
+            "calibration_pages": calibration_pages,
+        },
+        "models": results,
+        "recommended_overrides": {
+            name: {"precision": "int8"} for name, result in results.items() if result.get("passed")
+        },
+    }
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2))
+    report_path.with_suffix(".md").write_text(render_markdown(report))
+    logger.info(f"Report saved to {report_path} and {report_path.with_suffix('.md')}")
+
+    if not ready:
+        raise QuantizationError("No quantized model could be evaluated")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantize the OCR models to INT8 and gate them on accuracy and latency")
+    parser.add_argument('--models', nargs='+', choices=MODEL_NAMES, default=list(MODEL_NAMES), help='Models to quantize')
+    parser.add_argument('--mode', choices=["auto", "dynamic", "static"], default="auto", help='Quantization mode (auto: per model)')
+    parser.add_argument('--calibration-dir', type=Path, help='Local page images for static calibration (default: synthetic pages)')
+    parser.add_argument('--calibration-pages', type=int, default=16, help='Pages run to record calibration inputs')
+    parser.add_argument('--max-calibration-feeds', type=int, default=200, help='Calibration inputs kept per model')
+    parser.add_argument('--skip-quantize', action='store_true', help='Only evaluate the existing INT8 files')
+    parser.add_argument('--pages', type=int, default=20, help='Pages in the benchmark corpus')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the corpus')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed pages before measuring')
+    parser.add_argument('--min-accuracy', type=float, default=0.99, help='Lowest character accuracy against FP32 that passes')
+    parser.add_argument('--min-speedup', type=float, default=0.0, help='Lowest median latency reduction (fraction) that passes')
+    parser.add_argument('--report', type=Path, default=BASE_DIR / "benchmarks" / "quantization_report.json", help='Report JSON path; a .md table is written next to it')
+    args = parser.parse_args()
+
+    try:
+        sys.exit(main(
+            models=args.models,
+            mode=args.mode,
+            calibration_dir=args.calibration_dir,
+            calibration_pages=args.calibration_pages,
+            max_calibration_feeds=args.max_calibration_feeds,
+            skip_quantize=args.skip_quantize,
+            pages=args.pages,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            min_accuracy=args.min_accuracy,
+            min_speedup=args.min_speedup,
+            report_path=args.report
+        ))
+    except QuantizationError as e:
+        logger.error(f"Error in quantization: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,55 @@
+"""Statistics and corpus helpers of scripts/benchmark_ocr.py"""
+import numpy as np
+
+from scripts.benchmark_ocr import (
+    compare,
+    corpus_hash,
+    generate_corpus,
+    mann_whitney_greater,
+    summarize,
+)
+
+
+def test_corpus_is_deterministic():
+    first = generate_corpus(2, vertical=False)
+    second = generate_corpus(2, vertical=False)
+    assert corpus_hash(first) == corpus_hash(second)
+    assert corpus_hash(first) != corpus_hash(generate_corpus(2, vertical=True))
+    assert first[0].shape == (1200, 850, 3) and first[0].dtype == np.uint8
+
+
+def test_mann_whitney_direction():
+    rng = np.random.default_rng(0)
+    base = rng.normal(1.0, 0.05, 60)
+    slower = rng.normal(1.2, 0.05, 60)
+    assert mann_whitney_greater(slower, base) < 1e-6
+    assert mann_whitney_greater(base, slower) > 0.999
+    same = mann_whitney_greater(rng.normal(1.0, 0.05, 60), base)
+    assert 0.01 < same < 0.99
+
+
+def test_mann_whitney_all_ties():
+    assert mann_whitney_greater([1.0] * 5, [1.0] * 5) == 1.0
+
+
+def test_summarize_percentiles():
+    summary = summarize(list(range(1, 101)))
+    assert summary["p50"] == 50.5
+    assert summary["count"] == 100
+
+
+def test_compare_flags_only_significant_slowdowns():
+    rng = np.random.default_rng(1)
+    base = {"results": {"paddle_ocr": {
+        "samples": list(rng.normal(1.0, 0.02, 40)),
+        "stage_samples": {"det_infer": list(rng.normal(0.5, 0.01, 40))},
+    }}}
+    current = {"results": {"paddle_ocr": {
+        "samples": list(rng.normal(1.0, 0.02, 40)),
+        "stage_samples": {"det_infer": list(rng.normal(0.6, 0.01, 40))},
+    }, "manga_ocr": {"skipped": True}}}
+
+    findings = {f["series"]: f for f in compare(current, base, alpha=0.01, min_slowdown=0.05)}
+    assert not findings["total"]["regression"]
+    assert findings["det_infer"]["regression"]
+    assert findings["det_infer"]["median_change"] > 0.15
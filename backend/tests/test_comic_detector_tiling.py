@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+import pytest
+
+from lib.manga_ocr.detector import TextDetector
+from lib.manga_ocr.detector_config import TextDetectorConfig
+from lib.manga_ocr.detector_model import TextDetectorModel
+from lib.manga_ocr.utils.yolo_utils import non_max_suppression
+
+
+class _Node:
+    def __init__(self, shape):
+        self.shape = shape
+
+
+class FakeYoloSession:
+    """One "ja" block per dark connected component of each letterboxed input"""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_inputs(self):
+        return [_Node(["batch", 3, 1024, 1024])]
+
+    def run(self, output_names, input_feed):
+        images = input_feed["images"]
+        self.batches.append(images.shape[0])
+        blks = np.zeros((images.shape[0], 16, 7), dtype=np.float32)
+        for i, image in enumerate(images):
+            dark = (image[0] < 0.2).astype(np.uint8)
+            count, _, stats, _ = cv2.connectedComponentsWithStats(dark)
+            for k, (x, y, w, h, _) in enumerate(stats[1:count]):
+                blks[i, k] = [x + w / 2, y + h / 2, w, h, 0.9, 0.0, 1.0]
+        empty = np.zeros((images.shape[0], 1, 4, 4), dtype=np.float32)
+        return [blks, empty, empty]
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    session = FakeYoloSession()
+    monkeypatch.setattr(TextDetectorConfig, "_ensure_model_exists", lambda self: None)
+
+    def load(self):
+        self.session = session
+        self.max_batch = None
+
+    monkeypatch.setattr(TextDetectorModel, "_load_model", load)
+    return TextDetector(), session
+
+
+def _strip():
+    strip = np.full((4000, 800, 3), 255, dtype=np.uint8)
+    blocks = [(100, 200, 300, 400), (600, 600, 760, 700), (300, 1150, 420, 1500), (200, 3800, 600, 3900)]
+    for x1, y1, x2, y2 in blocks:
+        strip[y1:y2, x1:x2] = 0
+    return strip, blocks
+
+
+def test_long_page_is_detected_on_one_batch_of_tiles(detector):
+    text_detector, session = detector
+    strip, blocks = _strip()
+
+    found = sorted(text_detector(strip), key=lambda block: block.xyxy[1])
+
+    assert text_detector.use_tiles(4000, 800)
+    assert session.batches == [len(text_detector.tiles(4000, 800))]
+    assert len(found) == len(blocks)
+    for block, expected in zip(found, blocks):
+        assert np.allclose(block.xyxy, expected, atol=3)
+        assert block.language == "ja"
+
+
+def test_fixed_batch_models_run_tile_by_tile(detector):
+    text_detector, session = detector
+    text_detector.model.max_batch = 1
+    strip, blocks = _strip()
+
+    found = text_detector(strip)
+
+    assert session.batches == [1] * len(text_detector.tiles(4000, 800))
+    assert len(found) == len(blocks)
+
+
+def test_regular_pages_are_letterboxed_whole(detector):
+    text_detector, session = detector
+    page = np.full((1200, 850, 3), 255, dtype=np.uint8)
+    page[100:200, 100:400] = 0
+
+    assert not text_detector.use_tiles(1200, 850)
+    assert len(text_detector(page)) == 1
+    assert session.batches == [1]
+
+
+def test_nms_runs_per_image_of_the_batch():
+    prediction = np.zeros((2, 3, 7), dtype=np.float32)
+    prediction[0, 0] = [50, 50, 20, 20, 0.9, 0.0, 1.0]
+    prediction[0, 1] = [51, 50, 20, 20, 0.8, 0.0, 1.0]
+    prediction[1, 0] = [10, 10, 5, 5, 0.9, 1.0, 0.0]
+
+    first, second = non_max_suppression(prediction, 0.25, 0.35)
+
+    assert first.shape == (1, 6) and first[0, 4] == pytest.approx(0.9)
+    assert second.shape == (1, 6) and second[0, 5] == 0
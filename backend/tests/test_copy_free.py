@@ -0,0 +1,86 @@
+import numpy as np
+
+from lib.onnx_ocr.predict_base import PredictBase
+from lib.onnx_ocr.predict_system import TextSystem
+from lib.onnx_ocr.utils import infer_args
+
+
+class _Node:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    """Det marks dark pixels as text, cls keeps every crop upright, rec reads one character"""
+
+    def __init__(self, name):
+        self.name = name
+        self.inputs = []
+
+    def get_inputs(self):
+        return [_Node("x")]
+
+    def get_outputs(self):
+        return [_Node("y")]
+
+    def run(self, output_names, input_feed):
+        batch = input_feed["x"]
+        self.inputs.append(batch)
+        if self.name == "det":
+            return [(batch[:, :1] < 0).astype(np.float32)]
+        if self.name == "cls":
+            probs = np.zeros((batch.shape[0], 2), dtype=np.float32)
+            probs[:, 0] = 1.0
+            return [probs]
+        preds = np.zeros((batch.shape[0], 4, 100), dtype=np.float32)
+        preds[:, :, 0] = 1.0
+        preds[:, 1, 20] = 2.0
+        return [preds]
+
+
+def _make_system(monkeypatch):
+    sessions = {}
+
+    def fake_session(self, model_dir, use_gpu, name, args=None):
+        sessions[name] = FakeSession(name)
+        return sessions[name]
+
+    monkeypatch.setattr(PredictBase, "get_onnx_session", fake_session)
+    args = infer_args().parse_args([])
+    args.use_angle_cls = True
+    args.warmup = False
+    return TextSystem(args), sessions
+
+
+def _page():
+    page = np.full((320, 480, 3), 255, dtype=np.uint8)
+    page[40:72, 40:400] = 0
+    page[160:192, 80:300] = 0
+    return page
+
+
+def test_caller_arrays_are_not_modified(monkeypatch):
+    system, sessions = _make_system(monkeypatch)
+    page = _page()
+    page.flags.writeable = False
+
+    dt_boxes, rec_res = system(page)
+
+    assert np.array_equal(page, _page())
+    assert len(dt_boxes) == 2
+    assert all(text for text, _ in rec_res)
+    assert set(sessions) == {"det", "cls", "rec"}
+    assert system.crop_stats() == {"slice": 2, "warp": 0}
+
+
+def test_classifier_keeps_input_crops(monkeypatch):
+    system, _ = _make_system(monkeypatch)
+    crops = [np.full((32, 200, 3), 7, dtype=np.uint8), np.full((32, 90, 3), 9, dtype=np.uint8)]
+    for crop in crops:
+        crop.flags.writeable = False
+
+    img_list, cls_res = system.text_classifier(crops)
+
+    assert img_list is not crops
+    assert all(out is crop for out, crop in zip(img_list, crops))
+    assert [label for label, _ in cls_res] == ["0", "0"]
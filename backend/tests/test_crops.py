@@ -0,0 +1,52 @@
+import numpy as np
+
+from lib.onnx_ocr.utils import axis_aligned_mask, get_crops
+
+
+def _page():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(200, 300, 3), dtype=np.uint8)
+
+
+def _quad(left, top, right, bottom):
+    return np.float32([[left, top], [right, top], [right, bottom], [left, bottom]])
+
+
+def test_aligned_boxes_slice_to_the_warped_pixels():
+    page = _page()
+    boxes = [_quad(10, 20, 110, 52), _quad(200, 30, 230, 150), _quad(0, 0, 299, 199)]
+
+    sliced, counts = get_crops(page, boxes)
+    warped, warp_counts = get_crops(page, boxes, tolerance=None)
+
+    assert counts == {"slice": 3, "warp": 0}
+    assert warp_counts == {"slice": 0, "warp": 3}
+    for crop, reference in zip(sliced, warped):
+        assert crop.shape == reference.shape
+        assert np.array_equal(crop, reference)
+    # Tall crops are still turned on their side
+    assert sliced[1].shape[:2] == (30, 120)
+
+
+def test_rotated_and_out_of_page_boxes_are_warped():
+    page = _page()
+    rotated = np.float32([[40, 60], [140, 50], [143, 82], [43, 92]])
+    near_aligned = np.float32([[10, 20], [110, 21], [110, 52], [11, 52]])
+    past_edge = _quad(250, 150, 320, 190)
+
+    crops, counts = get_crops(page, [rotated, near_aligned, past_edge])
+
+    assert axis_aligned_mask([rotated, near_aligned, past_edge]).tolist() == [False, True, True]
+    assert counts == {"slice": 1, "warp": 2}
+    assert crops[2].shape == (40, 70, 3)
+
+
+def test_poly_boxes_use_their_min_area_rect():
+    page = _page()
+    poly = np.array([[10, 20], [60, 20], [110, 20], [110, 52], [60, 52], [10, 52]])
+
+    crops, counts = get_crops(page, [poly], "poly")
+
+    assert counts == {"slice": 1, "warp": 0}
+    assert crops[0].shape == (32, 100, 3)
+    assert get_crops(page, [], "poly") == ([], {"slice": 0, "warp": 0})
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+import pytest
+
+from lib.onnx_ocr.db_postprocess import DBPostProcess, rect_points
+
+
+def _probability_map(seed, regions=300, height=960, width=640):
+    """Noisy map with axis-aligned and rotated text-line blobs"""
+    rng = np.random.default_rng(seed)
+    pred = (rng.random((height, width)) * 0.2).astype(np.float32)
+    for _ in range(regions):
+        center = (rng.uniform(0, width), rng.uniform(0, height))
+        size = (rng.uniform(2, 200), rng.uniform(2, 30))
+        angle = rng.choice([0, 0, 0, rng.uniform(-30, 30)])
+        corners = cv2.boxPoints((center, size, angle)).astype(np.int32)
+        cv2.fillPoly(pred, [corners], float(rng.uniform(0.4, 1.0)))
+    return pred
+
+
+def test_rect_points_match_opencv():
+    rng = np.random.default_rng(0)
+    rects = np.column_stack([
+        rng.uniform(0, 500, (200, 2)), rng.uniform(1, 100, (200, 2)), rng.uniform(-90, 90, 200)
+    ]).astype(np.float32)
+    expected = np.array([cv2.boxPoints(((x, y), (w, h), a)) for x, y, w, h, a in rects])
+    assert np.allclose(rect_points(rects), expected, atol=1e-3)
+
+
+@pytest.mark.parametrize("angle", [-90.0, 0.0, 90.0])
+def test_aligned_rect_points_are_bit_exact(angle):
+    # Near-integer corners (42.999996 vs 43.0) shift the floored scoring window
+    rng = np.random.default_rng(1)
+    rects = np.column_stack([
+        rng.integers(0, 600, 500) + rng.choice([0, 0.5], 500),
+        rng.integers(0, 900, 500) + rng.choice([0, 0.5], 500),
+        rng.integers(1, 200, 500),
+        rng.integers(1, 30, 500),
+        np.full(500, angle),
+    ]).astype(np.float32)
+    expected = np.array([cv2.boxPoints(((x, y), (w, h), a)) for x, y, w, h, a in rects])
+    assert np.array_equal(rect_points(rects), expected)
+
+
+# 68 and 272 hit aligned corners that used to be scored one row off
+@pytest.mark.parametrize("seed", [*range(5), 68, 272])
+@pytest.mark.parametrize("dest", [(640, 960), (1600, 2400)])
+def test_vectorized_boxes_match_per_contour_path(seed, dest):
+    post = DBPostProcess(thresh=0.3, box_thresh=0.6, unclip_ratio=1.5)
+    pred = _probability_map(seed)
+    mask = pred > post.thresh
+
+    expected, expected_scores = post.boxes_from_bitmap(pred, mask, *dest)
+    boxes, scores = post.boxes_from_bitmap_vectorized(pred, mask, *dest)
+
+    assert len(boxes) == len(expected) > 0
+    scale = dest[0] / pred.shape[1]
+    # Within a pixel of the probability map, i.e. `scale` output pixels
+    assert np.abs(boxes.astype(int) - expected.astype(int)).max() <= max(1, round(scale))
+    assert np.allclose(scores, expected_scores, rtol=0, atol=1e-9)
+
+
+def test_empty_map_has_no_boxes():
+    post = DBPostProcess()
+    pred = np.zeros((64, 64), dtype=np.float32)
+    boxes, scores = post.boxes_from_bitmap_vectorized(pred, pred > post.thresh, 64, 64)
+    assert len(boxes) == 0 and scores == []
@@ -0,0 +1,105 @@
+import numpy as np
+
+from lib.onnx_ocr.det_tiling import merge_tile_boxes, plan_tiles, tile_starts, uncut_mask
+from lib.onnx_ocr.predict_base import PredictBase
+from lib.onnx_ocr.predict_det import TextDetector
+from lib.onnx_ocr.utils import infer_args
+
+
+class _Node:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeDetSession:
+    """Probability map that marks dark pixels as text"""
+
+    def __init__(self):
+        self.shapes = []
+
+    def get_inputs(self):
+        return [_Node("x")]
+
+    def get_outputs(self):
+        return [_Node("y")]
+
+    def run(self, output_names, input_feed):
+        batch = input_feed["x"]
+        self.shapes.append(batch.shape)
+        return [(batch[:, :1] < 0).astype(np.float32)]
+
+
+def _make_detector(monkeypatch, **overrides):
+    sessions = []
+
+    def fake_session(self, model_dir, use_gpu, name, args=None):
+        sessions.append(FakeDetSession())
+        return sessions[-1]
+
+    monkeypatch.setattr(PredictBase, "get_onnx_session", fake_session)
+    args = infer_args().parse_args([])
+    args.det_tiling = True
+    vars(args).update(overrides)
+    return TextDetector(args), sessions[0]
+
+
+def _quad(left, top, right, bottom):
+    return np.float32([[left, top], [right, top], [right, bottom], [left, bottom]])
+
+
+def test_tiles_cover_the_page_with_overlap():
+    assert tile_starts(900, 960, 160) == [0]
+    assert tile_starts(1760, 960, 160) == [0, 800]
+    assert tile_starts(2000, 960, 160) == [0, 520, 1040]
+    tiles = plan_tiles(2000, 790, 960, 160)
+    assert [(t.y, t.x, t.h, t.w) for t in tiles] == [(0, 0, 960, 800), (520, 0, 960, 800), (1040, 0, 960, 800)]
+    assert [(t.top, t.bottom, t.left, t.right) for t in tiles] == [(0, 440, 0, 0), (440, 440, 0, 0), (440, 0, 0, 0)]
+
+
+def test_seam_boxes_are_deduplicated_and_joined():
+    tiles = plan_tiles(1760, 400, 960, 160)
+    top, bottom = tiles
+    # Duplicate: fully inside the overlap (page rows 800..960), seen by both tiles
+    duplicate = [_quad(20, 860, 300, 890), _quad(20, 860 - bottom.y, 300, 890 - bottom.y)]
+    # Cut at the bottom tile's top edge but whole in the top tile: dropped
+    cut = _quad(40, 0, 200, 60 - bottom.y + 850)
+    # Tall block longer than the overlap: fragments in both tiles are joined
+    tall_top = _quad(320, 700, 390, 959)
+    tall_bottom = _quad(320, 0, 390, 1100 - bottom.y)
+
+    top_boxes = np.stack([duplicate[0], tall_top])
+    bottom_boxes = np.stack([duplicate[1], cut, tall_bottom])
+    assert uncut_mask(bottom_boxes, bottom).tolist() == [True, False, True]
+    assert uncut_mask(top_boxes, top).tolist() == [True, True]
+
+    merged = merge_tile_boxes([top_boxes, bottom_boxes[uncut_mask(bottom_boxes, bottom)]], tiles)
+
+    spans = sorted((float(b[:, 1].min()), float(b[:, 1].max())) for b in merged)
+    assert spans == [(700.0, 1100.0), (860.0, 890.0)]
+
+
+def test_tall_strip_is_detected_on_batched_tiles(monkeypatch):
+    detector, session = _make_detector(monkeypatch, det_tile_batch=4)
+    strip = np.full((6000, 640, 3), 255, dtype=np.uint8)
+    lines = [(100, 40), (780, 60), (1010, 120), (3000, 40), (5950, 30)]
+    for top, left in lines:
+        strip[top:top + 24, left:left + 400] = 0
+
+    assert detector.use_tiles(strip.shape)
+    boxes = detector(strip)
+
+    assert session.shapes[0] == (4, 3, 960, 640)
+    assert len(session.shapes) == 2
+    centers = sorted(float(box[:, 1].mean()) for box in boxes)
+    assert len(centers) == len(lines)
+    assert np.allclose(centers, [top + 12 for top, _ in lines], atol=3)
+
+
+def test_regular_pages_are_not_tiled(monkeypatch):
+    detector, _ = _make_detector(monkeypatch)
+    assert not detector.use_tiles((1200, 850, 3))
+    assert detector.use_tiles((1200, 2500, 3))
+    # A 20 MP scan of a regular page is resized, not cut into ~40 tiles
+    assert not detector.use_tiles((5472, 3648, 3))
+    detector.tiling = False
+    assert not detector.use_tiles((12000, 800, 3))
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import time
+from functools import partial
+
+from app.services.inference import InferenceExecutor
+
+
+def _failing_warmup():
+    raise RuntimeError("model missing")
+
+
+def test_ready_only_after_warmup():
+    calls = []
+    executor = InferenceExecutor(1, 1, 1, warmup=lambda: calls.append("warm"))
+    try:
+        assert not executor.ready
+        assert executor.warmup_state()["status"] == "pending"
+
+        asyncio.run(executor.warm_up())
+
+        assert calls == ["warm"]
+        assert executor.ready
+        assert executor.warmup_state()["status"] == "ready"
+    finally:
+        executor.shutdown()
+
+
+def test_failed_warmup_is_not_ready():
+    executor = InferenceExecutor(1, 1, 1, warmup=_failing_warmup)
+    try:
+        asyncio.run(executor.warm_up())
+
+        assert not executor.ready
+        assert executor.warmup_state() == {"status": "failed", "seconds": None, "error": "model missing"}
+    finally:
+        executor.shutdown()
+
+
+def test_without_warmup_is_ready():
+    executor = InferenceExecutor(1, 1, 1)
+    try:
+        assert executor.ready
+        assert executor.warmup_state()["status"] == "disabled"
+    finally:
+        executor.shutdown()
+
+
+def _staggered_warmup(directory):
+    # The first worker is done at once, the other ones take a while
+    try:
+        os.close(os.open(os.path.join(directory, "first"), os.O_CREAT | os.O_EXCL))
+    except FileExistsError:
+        time.sleep(1.0)
+    open(os.path.join(directory, str(os.getpid())), "w").close()
+
+
+def test_process_workers_are_all_warm_when_ready(tmp_path):
+    executor = InferenceExecutor(2, 4, 1, backend="process", warmup=partial(_staggered_warmup, str(tmp_path)))
+    try:
+        asyncio.run(executor.warm_up())
+
+        assert executor.ready
+        assert len([name for name in os.listdir(tmp_path) if name.isdigit()]) == 2
+    finally:
+        executor.shutdown()
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from lib.onnx_ocr.predict_base import PredictBase
+from lib.onnx_ocr.predict_cls import TextClassifier
+from lib.onnx_ocr.predict_system import TextSystem
+from lib.onnx_ocr.utils import infer_args
+
+UPRIGHT, FLIPPED = 20, 21
+
+
+class _Node:
+    def __init__(self, name):
+        self.name = name
+
+
+def _mark_on_right(batch):
+    """Per crop: whether the black mark sits in the right half of the content"""
+    columns = batch[:, 0].min(axis=1)
+    content = (batch[:, 0] != 0).any(axis=1)
+    widths = np.array([np.flatnonzero(row).max() + 1 for row in content])
+    return columns.argmin(axis=1) >= widths / 2
+
+
+class FakeSession:
+    """Det marks dark pixels; rec and cls read a crop as upright when its black mark is on the left"""
+
+    def __init__(self, name):
+        self.name = name
+        self.crops = 0
+
+    def get_inputs(self):
+        return [_Node("x")]
+
+    def get_outputs(self):
+        return [_Node("y")]
+
+    def run(self, output_names, input_feed):
+        batch = input_feed["x"]
+        if self.name == "det":
+            return [(batch[:, :1] < 0).astype(np.float32)]
+        self.crops += batch.shape[0]
+        flipped = _mark_on_right(batch)
+        if self.name == "cls":
+            return [np.where(flipped[:, None], [[0.05, 0.95]], [[0.95, 0.05]]).astype(np.float32)]
+        preds = np.zeros((batch.shape[0], 4, 100), dtype=np.float32)
+        preds[:, :, 0] = 1.0
+        preds[:, 1, 0] = 0.0
+        preds[np.arange(batch.shape[0]), 1, np.where(flipped, FLIPPED, UPRIGHT)] = np.where(flipped, 0.3, 0.95)
+        return [preds]
+
+
+def _make_system(monkeypatch, cls_mode):
+    sessions = {}
+
+    def fake_session(self, model_dir, use_gpu, name, args=None):
+        sessions[name] = FakeSession(name)
+        return sessions[name]
+
+    monkeypatch.setattr(PredictBase, "get_onnx_session", fake_session)
+    args = infer_args().parse_args([])
+    args.use_angle_cls = True
+    args.rec_microbatch = False
+    args.cls_mode = cls_mode
+    args.drop_score = 0.0
+    return TextSystem(args), sessions
+
+
+def _page():
+    page = np.full((240, 480, 3), 255, dtype=np.uint8)
+    page[40:72, 40:400] = 100
+    page[44:68, 50:90] = 0  # upright: mark at the start of the line
+    page[160:192, 40:400] = 100
+    page[164:188, 350:390] = 0  # upside down: mark at the end
+    return page
+
+
+@pytest.mark.parametrize("cls_mode, cls_crops, counts", [
+    ("lazy", 1, {"crops": 2, "classified": 1, "rotated": 1, "improved": 1}),
+    ("eager", 2, {"crops": 2, "classified": 2, "rotated": 1, "improved": 0}),
+])
+def test_flipped_crops_are_fixed(monkeypatch, cls_mode, cls_crops, counts):
+    system, sessions = _make_system(monkeypatch, cls_mode)
+    character = system.text_recognizer.postprocess_op.character
+
+    _, rec_res = system(_page())
+
+    assert [text for text, _ in rec_res] == [character[UPRIGHT]] * 2
+    assert [score for _, score in rec_res] == pytest.approx([0.95, 0.95])
+    assert sessions["cls"].crops == cls_crops
+    assert system.cls_stats() == counts
+
+
+def test_confident_pages_skip_the_classifier(monkeypatch):
+    system, sessions = _make_system(monkeypatch, "lazy")
+    page = _page()
+    page[160:192] = 255
+
+    system(page)
+
+    assert sessions["cls"].crops == 0
+    assert system.cls_stats() == {"crops": 1, "classified": 0, "rotated": 0, "improved": 0}
+
+
+class _StubClassifier:
+    """Says 180 degrees for the first crop, returning the crops untouched"""
+
+    cls_thresh = 0.9
+    is_rotated = TextClassifier.is_rotated
+
+    def __call__(self, crops):
+        return list(crops), [("180", 0.99)] + [("0", 0.99)] * (len(crops) - 1)
+
+
+def test_lazy_mode_follows_the_classifier_label():
+    system = TextSystem.__new__(TextSystem)
+    system.cls_lazy_thresh = 0.8
+    system.text_classifier = _StubClassifier()
+    system.recognize = lambda crops: [("x", 0.1)] * len(crops)
+    crops = [np.zeros((8, 32, 3), np.uint8), np.zeros((8, 32, 3), np.uint8)]
+    counts = {"crops": 2, "classified": 0, "rotated": 0, "improved": 0}
+
+    _, rec_res = system.reclassify_uncertain(crops, [("a", 0.5), ("b", 0.5)], counts)
+
+    # Rotated by label, not by object identity, and adopted even though it scored lower
+    assert rec_res == [("x", 0.1), ("b", 0.5)]
+    assert counts == {"crops": 2, "classified": 2, "rotated": 1, "improved": 0}
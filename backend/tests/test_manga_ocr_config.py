@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+from lib.manga_ocr import config as manga_config
+from lib.manga_ocr.config import MangaOCRConfig
+
+
+@pytest.fixture
+def urlopen(monkeypatch):
+    calls = []
+
+    def fake_urlopen(url, timeout=None):
+        calls.append(timeout)
+        raise TimeoutError("stalled")
+
+    monkeypatch.setattr(manga_config.urllib.request, "urlopen", fake_urlopen)
+    return calls
+
+
+def _config(tmp_path, download):
+    config = MangaOCRConfig.__new__(MangaOCRConfig)
+    config.download_cache_decoder = download
+    config.decoder_with_past_path = str(tmp_path / "decoder_with_past_model.onnx")
+    return config
+
+
+def test_cache_decoder_is_not_downloaded_by_default(tmp_path, urlopen):
+    assert not _config(tmp_path, download=False).ensure_cache_decoder()
+    assert urlopen == []
+
+
+def test_failed_download_is_not_retried(tmp_path, urlopen):
+    config = _config(tmp_path, download=True)
+
+    assert not config.ensure_cache_decoder()
+    assert not config.ensure_cache_decoder()
+
+    assert urlopen == [manga_config.DOWNLOAD_TIMEOUT]
+    assert (tmp_path / "decoder_with_past_model.onnx.unavailable").read_text().strip() == "stalled"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["decoder_with_past_model.onnx.unavailable"]
+
+
+def test_download_lands_atomically(tmp_path, monkeypatch):
+    monkeypatch.setattr(manga_config.urllib.request, "urlopen", lambda url, timeout=None: io.BytesIO(b"onnx"))
+    config = _config(tmp_path, download=True)
+
+    assert config.ensure_cache_decoder()
+    assert (tmp_path / "decoder_with_past_model.onnx").read_bytes() == b"onnx"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["decoder_with_past_model.onnx"]
@@ -0,0 +1,42 @@
+import numpy as np
+
+from app.services import ocr_pipeline
+from app.services.ocr_pipeline import recognize_manga_crops
+
+
+class FakeMangaOCR:
+    """Fails on the crop "bad", in a batch or alone"""
+
+    def batch(self, crops):
+        if "bad" in crops:
+            raise RuntimeError("decoder failed")
+        return [crop.upper() for crop in crops]
+
+    def __call__(self, crop):
+        return self.batch([crop])[0]
+
+
+def test_batch_failure_only_loses_the_failing_crop():
+    assert recognize_manga_crops(FakeMangaOCR(), ["a", "bad", "c"]) == ["A", None, "C"]
+
+
+def test_batch_without_failures():
+    assert recognize_manga_crops(FakeMangaOCR(), ["a", "b"]) == ["A", "B"]
+    assert recognize_manga_crops(FakeMangaOCR(), []) == []
+
+
+def test_manga_regions_carry_no_confidence(monkeypatch):
+    class SizeOCR:
+        def batch(self, crops):
+            return [f"{crop.width}x{crop.height}" for crop in crops]
+
+    monkeypatch.setattr(ocr_pipeline, "get_manga_ocr", SizeOCR)
+    page = np.full((100, 100, 3), 255, dtype=np.uint8)
+
+    results = ocr_pipeline.run_manga_ocr_regions(page, [
+        [[10, 10], [40, 10], [40, 30], [10, 30]],
+        [[50, 50], [50, 50], [51, 51], [50, 51]],  # degenerate
+    ])
+
+    assert [result["text"] for result in results] == ["30x20", ""]
+    assert [result["confidence"] for result in results] == [None, None]
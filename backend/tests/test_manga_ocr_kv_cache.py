@@ -0,0 +1,214 @@
+"""Parity of KV-cached, full-recompute and batched greedy decoding in MangaOCRModel"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from lib.manga_ocr.model import MangaOCRModel
+
+VOCAB_SIZE = 12
+HIDDEN = 4
+ENC_SEQ = 5
+EOS = 3
+
+
+def _node(name, shape, type="tensor(float)"):
+    return SimpleNamespace(name=name, shape=shape, type=type)
+
+
+class _ToyDecoder:
+    """Tiny deterministic decoder with the I/O layout of an optimum export.
+
+    Integer-valued weights keep every sum exact, so the cached and the full
+    computation produce bit-identical logits.
+    """
+
+    def __init__(self, seed):
+        rng = np.random.default_rng(seed)
+        self.embed = rng.integers(-3, 4, (VOCAB_SIZE, HIDDEN)).astype(np.float32)
+        self.pos = rng.integers(-2, 3, (64, HIDDEN)).astype(np.float32)
+        self.w = rng.integers(-2, 3, (HIDDEN, VOCAB_SIZE)).astype(np.float32)
+        self.u = rng.integers(-2, 3, (HIDDEN, VOCAB_SIZE)).astype(np.float32)
+
+    def keys(self, input_ids, offset):
+        positions = np.arange(offset, offset + input_ids.shape[1])
+        return (self.embed[input_ids] + self.pos[positions])[:, None, :, :]
+
+    def logits(self, keys_cumsum, cross_key):
+        cross = cross_key[:, 0].sum(axis=1, keepdims=True)
+        return keys_cumsum @ self.w + cross @ self.u
+
+    def full(self, input_ids, encoder_hidden_states):
+        keys = self.keys(input_ids, 0)
+        cross_key = encoder_hidden_states[:, None, :, :]
+        logits = self.logits(np.cumsum(keys[:, 0], axis=1), cross_key)
+        return logits, keys, cross_key
+
+    def with_past(self, input_ids, past_key, cross_key):
+        keys = np.concatenate([past_key, self.keys(input_ids, past_key.shape[2])], axis=2)
+        logits = self.logits(keys[:, 0].sum(axis=1, keepdims=True), cross_key)
+        return logits, keys
+
+
+class _FakeSession:
+    def __init__(self, inputs, outputs, fn):
+        self._inputs = inputs
+        self._outputs = outputs
+        self._fn = fn
+        self.calls = []
+
+    def get_inputs(self):
+        return self._inputs
+
+    def get_outputs(self):
+        return self._outputs
+
+    def run(self, output_names, feed):
+        self.calls.append({name: value.shape for name, value in feed.items()})
+        result = self._fn(feed)
+        names = output_names or [node.name for node in self._outputs]
+        return [result[name] for name in names]
+
+
+PAST_SHAPE = ["batch_size", 1, "past_sequence_length", HIDDEN]
+PRESENT_NODES = [
+    _node("present.0.decoder.key", PAST_SHAPE),
+    _node("present.0.decoder.value", PAST_SHAPE),
+    _node("present.0.encoder.key", PAST_SHAPE),
+    _node("present.0.encoder.value", PAST_SHAPE),
+]
+PAST_NODES = [
+    _node("past_key_values.0.decoder.key", PAST_SHAPE),
+    _node("past_key_values.0.decoder.value", PAST_SHAPE),
+    _node("past_key_values.0.encoder.key", PAST_SHAPE),
+    _node("past_key_values.0.encoder.value", PAST_SHAPE),
+]
+
+
+def _decoder_session(toy):
+    def run(feed):
+        logits, keys, cross_key = toy.full(feed["input_ids"], feed["encoder_hidden_states"])
+        return {
+            "logits": logits,
+            "present.0.decoder.key": keys,
+            "present.0.decoder.value": keys * 2,
+            "present.0.encoder.key": cross_key,
+            "present.0.encoder.value": cross_key * 2,
+        }
+
+    return _FakeSession(
+        [_node("input_ids", ["batch_size", "seq"], "tensor(int64)"), _node("encoder_hidden_states", ["batch_size", ENC_SEQ, HIDDEN])],
+        [_node("logits", ["batch_size", "seq", VOCAB_SIZE])] + PRESENT_NODES,
+        run,
+    )
+
+
+def _with_past_session(toy):
+    def run(feed):
+        assert feed["input_ids"].shape[1] == 1
+        logits, keys = toy.with_past(
+            feed["input_ids"], feed["past_key_values.0.decoder.key"], feed["past_key_values.0.encoder.key"]
+        )
+        return {"logits": logits, "present.0.decoder.key": keys, "present.0.decoder.value": keys * 2}
+
+    return _FakeSession(
+        [_node("input_ids", ["batch_size", 1], "tensor(int64)")] + PAST_NODES,
+        [_node("logits", ["batch_size", 1, VOCAB_SIZE])] + PRESENT_NODES[:2],
+        run,
+    )
+
+
+def _merged_session(toy):
+    def run(feed):
+        if not feed["use_cache_branch"][0]:
+            return _decoder_session(toy)._fn(feed)
+        assert feed["input_ids"].shape[1] == 1
+        logits, keys = toy.with_past(
+            feed["input_ids"], feed["past_key_values.0.decoder.key"], feed["past_key_values.0.encoder.key"]
+        )
+        return {
+            "logits": logits,
+            "present.0.decoder.key": keys,
+            "present.0.decoder.value": keys * 2,
+            "present.0.encoder.key": feed["past_key_values.0.encoder.key"],
+            "present.0.encoder.value": feed["past_key_values.0.encoder.value"],
+        }
+
+    return _FakeSession(
+        [
+            _node("input_ids", ["batch_size", "seq"], "tensor(int64)"),
+            _node("encoder_hidden_states", ["batch_size", ENC_SEQ, HIDDEN]),
+            _node("use_cache_branch", [1], "tensor(bool)"),
+        ] + PAST_NODES,
+        [_node("logits", ["batch_size", "seq", VOCAB_SIZE])] + PRESENT_NODES,
+        run,
+    )
+
+
+def _model(toy, variant):
+    model = MangaOCRModel.__new__(MangaOCRModel)
+    model.config = SimpleNamespace(
+        max_length=24, eos_token_id=EOS, pad_token_id=0, decoder_start_token_id=2, config={}
+    )
+    model.encoder_session = None
+    model.decoder_session = _decoder_session(toy)
+    model.decoder_with_past_session = _with_past_session(toy) if variant == "with_past" else None
+    model.decoder_merged_session = _merged_session(toy) if variant == "merged" else None
+    model.vocab = [str(i) for i in range(VOCAB_SIZE)]
+    return model
+
+
+@pytest.mark.parametrize("variant", ["with_past", "merged"])
+@pytest.mark.parametrize("seed", range(8))
+def test_cached_decoding_matches_full_recompute(variant, seed):
+    toy = _ToyDecoder(seed)
+    encoder_hidden_states = np.random.default_rng(100 + seed).integers(
+        -2, 3, (1, ENC_SEQ, HIDDEN)
+    ).astype(np.float32)
+    model = _model(toy, variant)
+
+    assert model.uses_cache
+    full = model.generate_tokens(encoder_hidden_states, use_cache=False)
+    cached = model.generate_tokens(encoder_hidden_states)
+
+    assert cached == full
+
+
+def test_cached_decoding_feeds_only_newest_token():
+    toy = _ToyDecoder(0)
+    encoder_hidden_states = np.ones((1, ENC_SEQ, HIDDEN), dtype=np.float32)
+    model = _model(toy, "with_past")
+
+    model.generate_tokens(encoder_hidden_states)
+
+    assert len(model.decoder_session.calls) == 1
+    for step, call in enumerate(model.decoder_with_past_session.calls, start=1):
+        assert call["input_ids"] == (1, 1)
+        assert call["past_key_values.0.decoder.key"][2] == step
+
+
+def test_falls_back_to_full_recompute_without_cache_decoder():
+    toy = _ToyDecoder(1)
+    encoder_hidden_states = np.ones((1, ENC_SEQ, HIDDEN), dtype=np.float32)
+    model = _model(toy, None)
+
+    assert not model.uses_cache
+    model.generate_tokens(encoder_hidden_states)
+
+    for step, call in enumerate(model.decoder_session.calls, start=1):
+        assert call["input_ids"] == (1, step)
+
+
+@pytest.mark.parametrize("variant", [None, "with_past", "merged"])
+def test_batched_decoding_matches_single_sequence(variant):
+    toy = _ToyDecoder(3)
+    encoder_hidden_states = np.random.default_rng(7).integers(
+        -2, 3, (10, ENC_SEQ, HIDDEN)
+    ).astype(np.float32)
+    model = _model(toy, variant)
+
+    batched = model.generate_tokens_batch(encoder_hidden_states)
+    single = [model.generate_tokens(encoder_hidden_states[i:i + 1]) for i in range(10)]
+
+    assert batched == single
+    assert len({len(tokens) for tokens in batched}) > 1
@@ -0,0 +1,32 @@
+from app.core.config import get_settings
+from app.services.ocr_cache import ModelFingerprint
+from app.services.ocr_pipeline import model_files, pipeline_options
+
+
+def _fingerprint(monkeypatch, language, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    get_settings.cache_clear()
+    try:
+        return ModelFingerprint()(model_files(language), pipeline_options(language))
+    finally:
+        get_settings.cache_clear()
+
+
+def test_output_settings_change_the_fingerprint(monkeypatch):
+    baseline = _fingerprint(monkeypatch, "eng")
+    assert _fingerprint(monkeypatch, "eng") == baseline
+    for name, value in [
+        ("OCR_CLS_MODE", "lazy"),
+        ("OCR_DET_TILING", "false"),
+        ("OCR_REC_WIDTH_BUCKETS", ""),
+        ("PADDLE_OCR_PRECISION", "int8"),
+    ]:
+        with monkeypatch.context() as patched:
+            assert _fingerprint(patched, "eng", **{name: value}) != baseline, name
+
+
+def test_paddle_settings_leave_japanese_alone(monkeypatch):
+    baseline = _fingerprint(monkeypatch, "jpn")
+    with monkeypatch.context() as patched:
+        assert _fingerprint(patched, "jpn", OCR_CLS_MODE="lazy") == baseline
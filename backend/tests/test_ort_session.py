@@ -0,0 +1,78 @@
+import pytest
+
+from lib.onnx_ocr.utils import infer_args
+from lib.ort_session import (
+    SessionConfig,
+    build_session_options,
+    configure_sessions,
+    create_session,
+    get_session_config,
+    quantized_model_path,
+    resolve_model_path,
+)
+
+CLS_MODEL = infer_args().parse_args([]).cls_model_dir
+
+
+@pytest.fixture(autouse=True)
+def reset_sessions():
+    yield
+    configure_sessions()
+
+
+def test_overrides_apply_on_top_of_default():
+    configure_sessions(
+        SessionConfig(intra_op_num_threads=4, allow_spinning=False),
+        {"rec": {"intra_op_num_threads": 1, "execution_mode": "parallel"}}
+    )
+
+    rec = get_session_config("rec")
+    assert rec.intra_op_num_threads == 1
+    assert rec.execution_mode == "parallel"
+    assert rec.allow_spinning is False
+    assert get_session_config("det").intra_op_num_threads == 4
+
+
+@pytest.mark.parametrize("overrides", [
+    {"recognizer": {"intra_op_num_threads": 1}},
+    {"rec": {"threads": 1}},
+    {"rec": {"graph_optimization_level": "max"}},
+])
+def test_invalid_overrides_are_rejected(overrides):
+    with pytest.raises(ValueError):
+        configure_sessions(SessionConfig(), overrides)
+
+
+def test_session_uses_configured_options():
+    config = SessionConfig(intra_op_num_threads=1, graph_optimization_level="basic", enable_cpu_mem_arena=False)
+    options = build_session_options(config)
+    assert options.intra_op_num_threads == 1
+    assert options.enable_cpu_mem_arena is False
+    assert options.get_session_config_entry("session.intra_op.allow_spinning") == "1"
+
+    configure_sessions(SessionConfig(), {"cls": {"intra_op_num_threads": 1, "allow_spinning": False}})
+    session = create_session(CLS_MODEL, "cls")
+    assert session.get_session_options().intra_op_num_threads == 1
+    assert session.get_session_options().get_session_config_entry("session.intra_op.allow_spinning") == "0"
+
+
+def test_int8_precision_loads_the_tagged_variant(tmp_path):
+    model = tmp_path / "rec.onnx"
+    model.write_bytes(b"")
+    assert quantized_model_path(str(model), "fp32") == str(model)
+    assert quantized_model_path(str(model), "int8") == str(tmp_path / "rec.int8.onnx")
+
+    with pytest.raises(FileNotFoundError):
+        resolve_model_path(str(model), "int8")
+    (tmp_path / "rec.int8.onnx").write_bytes(b"")
+    assert resolve_model_path(str(model), "int8") == str(tmp_path / "rec.int8.onnx")
+
+    with pytest.raises(ValueError):
+        configure_sessions(SessionConfig(), {"rec": {"precision": "int4"}})
+
+
+def test_untagged_int8_model_is_rejected(tmp_path):
+    # The FP32 cls model copied under the INT8 name carries no precision tag
+    (tmp_path / "cls.int8.onnx").write_bytes(open(CLS_MODEL, "rb").read())
+    with pytest.raises(ValueError, match="untagged"):
+        create_session(str(tmp_path / "cls.onnx"), "cls", config=SessionConfig(precision="int8"))
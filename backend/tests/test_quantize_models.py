@@ -0,0 +1,66 @@
+"""Pure helpers of scripts/quantize_models.py"""
+import numpy as np
+import pytest
+
+from scripts.quantize_models import (
+    FeedReader,
+    character_accuracy,
+    edit_distance,
+    passes_gate,
+    quantization_mode,
+    render_markdown,
+)
+
+
+def test_edit_distance():
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("", "abc") == 3
+    assert edit_distance("same", "same") == 0
+
+
+def test_character_accuracy_against_fp32_text():
+    assert character_accuracy(["HELLO", "NO WAY"], ["HELLO", "NO WAY"]) == 1.0
+    assert character_accuracy(["HELLO", "NO WAY"], ["HELL0", "NO WAY"]) == pytest.approx(1 - 1 / 11)
+    assert character_accuracy(["AB"], ["XYZW"]) == 0.0
+    assert character_accuracy([""], [""]) == 1.0
+    assert character_accuracy([""], ["noise"]) == 0.0
+
+
+def test_gate_needs_accuracy_and_speed():
+    assert passes_gate(0.995, -0.30, min_accuracy=0.99, min_speedup=0.0)
+    assert not passes_gate(0.98, -0.30, min_accuracy=0.99, min_speedup=0.0)
+    assert not passes_gate(0.999, 0.05, min_accuracy=0.99, min_speedup=0.0)
+    assert not passes_gate(0.999, -0.05, min_accuracy=0.99, min_speedup=0.10)
+
+
+def test_decoders_are_always_dynamic():
+    assert quantization_mode("det", "auto") == "static"
+    assert quantization_mode("rec", "auto") == "dynamic"
+    assert quantization_mode("rec", "static") == "static"
+    assert quantization_mode("manga_decoder", "static") == "dynamic"
+
+
+def test_feed_reader_is_exhausted_once():
+    feeds = [{"x": np.zeros(1)}, {"x": np.ones(1)}]
+    reader = FeedReader(feeds)
+    assert reader.get_next() is feeds[0]
+    assert reader.get_next() is feeds[1]
+    assert reader.get_next() is None
+
+
+def test_markdown_lists_recommended_overrides():
+    summary = {"p50": 0.1}
+    report = {
+        "created": "now",
+        "config": {"pages": 2, "repeat": 1},
+        "models": {
+            "det": {"mode": "static", "char_accuracy": 1.0, "fp32": summary, "int8": {"p50": 0.05},
+                    "median_change": -0.5, "passed": True},
+            "rec": {"mode": "dynamic", "error": "FP32 model not found"},
+        },
+        "recommended_overrides": {"det": {"precision": "int8"}},
+    }
+    text = render_markdown(report)
+    assert "| det | static | 1.0000 | 100.0 | 50.0 | -50.0% | pass |" in text
+    assert "error: FP32 model not found" in text
+    assert '{"det": {"precision": "int8"}}' in text
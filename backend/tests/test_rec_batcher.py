@@ -0,0 +1,52 @@
+import threading
+import time
+
+from lib.onnx_ocr.rec_batcher import RecognitionBatcher
+
+
+class FakeRecognizer:
+    def __init__(self):
+        self.batch_nums = []
+
+    def __call__(self, img_list, batch_num=None):
+        self.batch_nums.append(batch_num)
+        return [(str(img), 1.0) for img in img_list]
+
+
+def test_large_page_is_split_by_the_cap():
+    recognizer = FakeRecognizer()
+    batcher = RecognitionBatcher(recognizer, max_batch_size=8, max_wait_ms=0)
+
+    assert batcher(list(range(20))) == [(str(i), 1.0) for i in range(20)]
+    assert recognizer.batch_nums == [8]
+    stats = batcher.stats()
+    assert stats["batches"] == 3
+    assert stats["full_batches"] == 2
+    assert stats["max_batch_crops"] == 8
+
+
+def test_lone_request_is_not_delayed():
+    batcher = RecognitionBatcher(FakeRecognizer(), max_batch_size=8, max_wait_ms=2000)
+
+    start = time.perf_counter()
+    with batcher.page():
+        batcher(["a"])
+
+    assert time.perf_counter() - start < 0.5
+
+
+def test_waits_for_crops_of_pages_in_flight():
+    recognizer = FakeRecognizer()
+    batcher = RecognitionBatcher(recognizer, max_batch_size=8, max_wait_ms=2000)
+    results = {}
+
+    with batcher.page():
+        with batcher.page():
+            first = threading.Thread(target=lambda: results.setdefault("a", batcher(["a"])))
+            first.start()
+            time.sleep(0.05)
+            results["b"] = batcher(["b"])
+        first.join()
+
+    assert results == {"a": [("a", 1.0)], "b": [("b", 1.0)]}
+    assert recognizer.batch_nums == [2]
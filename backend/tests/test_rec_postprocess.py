@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from lib.onnx_ocr.rec_postprocess import CTCLabelDecode
+from lib.onnx_ocr.utils import infer_args
+
+DICT_PATH = infer_args().parse_args([]).rec_char_dict_path
+
+
+def _reference_ctc(decoder, preds):
+    """CTC decode as done before vectorization: two reductions, per-item loop"""
+    return decoder._decode_rows(preds.argmax(axis=2), preds.max(axis=2), is_remove_duplicate=True)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float16])
+def test_ctc_decode_matches_per_item_loop(dtype):
+    decoder = CTCLabelDecode(character_dict_path=DICT_PATH, use_space_char=True)
+    rng = np.random.default_rng(0)
+    num_classes = len(decoder.character)
+
+    logits = rng.random((16, 40, num_classes)).astype(dtype)
+    # Long blank runs, repeated characters and an all-blank row
+    winners = rng.choice([0, 0, 0, 5, 5, 17, num_classes - 1], size=(16, 40))
+    np.put_along_axis(logits, winners[..., None], 2.0, axis=2)
+    logits[3, :, 0] = 3.0
+
+    assert decoder(logits) == _reference_ctc(decoder, logits)
+    assert decoder(logits[:0]) == []
+
+
+def test_decode_without_probabilities_matches_per_item_loop():
+    decoder = CTCLabelDecode(character_dict_path=DICT_PATH)
+    text_index = np.array([[0, 3, 3, 0, 7], [0, 0, 0, 0, 0]])
+
+    assert decoder.decode(text_index) == decoder._decode_rows(text_index)
+    assert decoder.decode(text_index[:, :0]) == decoder._decode_rows(text_index[:, :0])
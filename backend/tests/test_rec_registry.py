@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from lib.onnx_ocr.predict_base import PredictBase
+from lib.onnx_ocr.predict_system import TextSystem
+from lib.onnx_ocr.rec_registry import RecognizerRegistry, RecognizerSpec, parse_recognizer_specs
+from lib.onnx_ocr.utils import infer_args
+
+
+class _Node:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    def __init__(self, path):
+        self.path = path
+
+    def get_inputs(self):
+        return [_Node("x")]
+
+    def get_outputs(self):
+        return [_Node("y")]
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """Model paths of the sessions created, in order"""
+    paths = []
+
+    def fake_session(self, model_dir, use_gpu, name, args=None):
+        paths.append(model_dir)
+        return FakeSession(model_dir)
+
+    monkeypatch.setattr(PredictBase, "get_onnx_session", fake_session)
+    return paths
+
+
+def _specs(tmp_path, sizes):
+    specs = {}
+    for language, size in sizes.items():
+        model = tmp_path / f"{language}.onnx"
+        model.write_bytes(b"\0" * size)
+        chars = tmp_path / f"{language}.txt"
+        chars.write_text("a\nb\n", encoding="utf-8")
+        specs[language] = RecognizerSpec(str(model), str(chars), "3, 32, 320")
+    return specs
+
+
+def test_loads_on_first_use(tmp_path, loaded):
+    registry = RecognizerRegistry(infer_args().parse_args([]), _specs(tmp_path, {"kor": 10}))
+
+    assert loaded == []
+    assert registry.get("eng") is None
+
+    recognizer = registry.get("KOR")
+
+    assert registry.get("kor") is recognizer
+    assert loaded == [str(tmp_path / "kor.onnx")]
+    assert recognizer.rec_image_shape == [3, 32, 320]
+    assert registry.stats() == {
+        "hits": 1, "loads": 1, "evictions": 0, "resident": ["kor"], "resident_bytes": 10
+    }
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path, loaded):
+    specs = _specs(tmp_path, {"kor": 40, "lat": 40, "cyr": 40})
+    registry = RecognizerRegistry(infer_args().parse_args([]), specs, memory_budget=100)
+
+    kor = registry.get("kor")
+    registry.get("lat")
+    registry.get("kor")
+    registry.get("cyr")
+
+    stats = registry.stats()
+    assert stats["resident"] == ["kor", "cyr"]
+    assert stats["evictions"] == 1
+    assert registry.get("kor") is kor
+    registry.get("lat")
+    assert len(loaded) == 4
+
+
+def test_oversized_recognizer_stays_loaded(tmp_path, loaded):
+    registry = RecognizerRegistry(infer_args().parse_args([]), _specs(tmp_path, {"kor": 200}), memory_budget=100)
+
+    registry.get("kor")
+
+    assert registry.stats()["resident"] == ["kor"]
+
+
+def test_parse_specs_resolves_relative_paths():
+    specs = parse_recognizer_specs({"KOR": {"rec_model_dir": "korean/rec.onnx", "rec_char_dict_path": "/abs/dict.txt"}})
+
+    assert specs["kor"].rec_model_dir.endswith("models/korean/rec.onnx")
+    assert specs["kor"].rec_char_dict_path == "/abs/dict.txt"
+    with pytest.raises(ValueError):
+        parse_recognizer_specs({"kor": {"rec_model_dir": "rec.onnx"}})
+    with pytest.raises(ValueError):
+        parse_recognizer_specs({"kor": {"rec_model_dir": "rec.onnx", "rec_char_dict_path": "d.txt", "det": 1}})
+
+
+def test_with_recognizer_shares_detection(tmp_path, loaded):
+    args = infer_args().parse_args([])
+    args.rec_microbatch = True
+    system = TextSystem(args)
+    recognizer = RecognizerRegistry(args, _specs(tmp_path, {"kor": 10})).get("kor")
+
+    korean = system.with_recognizer(recognizer)
+
+    assert korean.text_recognizer is recognizer
+    assert korean.text_detector is system.text_detector
+    assert korean.rec_batcher is None
+    assert system.text_recognizer is not recognizer
+    assert system.with_recognizer(system.text_recognizer) is system
+    assert korean._crop_stats is system._crop_stats
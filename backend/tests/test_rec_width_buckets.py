@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from lib.onnx_ocr.predict_base import PredictBase
+from lib.onnx_ocr.predict_rec import TextRecognizer
+from lib.onnx_ocr.utils import infer_args
+
+
+class _Node:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeRecSession:
+    """Emits one character per crop, chosen by the crop's fill value"""
+
+    def __init__(self, num_classes):
+        self.num_classes = num_classes
+        self.shapes = []
+
+    def get_inputs(self):
+        return [_Node("x")]
+
+    def get_outputs(self):
+        return [_Node("y")]
+
+    def run(self, output_names, input_feed):
+        batch = input_feed["x"]
+        self.shapes.append(batch.shape)
+        fill = np.rint((batch[:, 0, 0, 0] * 0.5 + 0.5) * 255).astype(int)
+        preds = np.zeros((batch.shape[0], 4, self.num_classes), dtype=np.float32)
+        preds[:, :, 0] = 1.0
+        preds[np.arange(batch.shape[0]), 1, fill] = 2.0
+        return [preds]
+
+
+@pytest.fixture
+def make_recognizer(monkeypatch):
+    def make(buckets, legacy_stats=False):
+        args = infer_args().parse_args([])
+        args.rec_width_buckets = buckets
+        args.rec_legacy_stats = legacy_stats
+        sessions = []
+
+        def fake_session(self, model_dir, use_gpu, name, args=None):
+            sessions.append(FakeRecSession(len(self.postprocess_op.character)))
+            return sessions[-1]
+
+        monkeypatch.setattr(PredictBase, "get_onnx_session", fake_session)
+        recognizer = TextRecognizer(args)
+        return recognizer, sessions[0]
+    return make
+
+
+def _crops(widths):
+    return [np.full((48, width, 3), 10 + i, dtype=np.uint8) for i, width in enumerate(widths)]
+
+
+def test_crops_go_to_smallest_fitting_bucket(make_recognizer):
+    recognizer, session = make_recognizer("320,480,640")
+    crops = _crops([100, 300, 450, 500, 2000, 120])
+
+    results = recognizer(crops, batch_num=2)
+
+    assert [shape[3] for shape in session.shapes] == [320, 320, 480, 640, 2560]
+    assert [shape[0] for shape in session.shapes] == [2, 1, 1, 1, 1]
+    expected = [recognizer.postprocess_op.character[10 + i] for i in range(len(crops))]
+    assert [text for text, _ in results] == expected
+
+
+def test_without_buckets_batches_pad_to_widest_crop(make_recognizer):
+    recognizer, session = make_recognizer("")
+    crops = _crops([100, 300, 150, 500, 2000, 120])
+
+    recognizer(crops, batch_num=2)
+
+    assert [shape[3] for shape in session.shapes] == [320, 320, 2000]
+
+
+def test_short_crops_keep_the_model_width(make_recognizer):
+    # Buckets below the legacy minimum would change what the model sees
+    recognizer, session = make_recognizer("160,320")
+
+    recognizer(_crops([100, 150]), batch_num=2)
+
+    assert [shape[3] for shape in session.shapes] == [320]
+
+
+def test_stats_compare_against_per_batch_widths(make_recognizer):
+    recognizer, _ = make_recognizer("320,480", legacy_stats=True)
+    recognizer(_crops([100, 140, 400, 410, 470, 475]), batch_num=2)
+
+    stats = recognizer.stats()
+    assert stats["crops"] == 6
+    assert stats["input_columns"] == 320 * 2 + 480 * 4
+    assert stats["legacy_input_columns"] == 320 * 2 + 410 * 2 + 475 * 2
+    assert stats["distinct_widths"] == 2
+    assert stats["legacy_distinct_widths"] == 3
+
+
+def test_legacy_plan_is_skipped_unless_requested(make_recognizer):
+    recognizer, _ = make_recognizer("320,480")
+    recognizer(_crops([100, 400]), batch_num=2)
+
+    stats = recognizer.stats()
+    assert stats["input_columns"] == 320 + 480
+    assert not any(key.startswith("legacy_") for key in stats)
@@ -0,0 +1,66 @@
+import numpy as np
+
+from lib.onnx_ocr.predict_base import PredictBase
+from lib.onnx_ocr.predict_system import TextSystem
+from lib.onnx_ocr.utils import infer_args
+
+
+class _Node:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    """Rec reads character 20 with score 0.9 from crops with ink, blank otherwise"""
+
+    def __init__(self, name):
+        self.name = name
+        self.inputs = []
+
+    def get_inputs(self):
+        return [_Node("x")]
+
+    def get_outputs(self):
+        return [_Node("y")]
+
+    def run(self, output_names, input_feed):
+        batch = input_feed["x"]
+        self.inputs.append(batch.shape)
+        inked = (batch < -0.5).any(axis=(1, 2, 3))
+        preds = np.zeros((batch.shape[0], 4, 100), dtype=np.float32)
+        preds[:, :, 0] = 1.0
+        preds[inked, 1, 0] = 0.0
+        preds[inked, 1, 20] = 0.9
+        return [preds]
+
+
+def _make_system(monkeypatch):
+    sessions = {}
+
+    def fake_session(self, model_dir, use_gpu, name, args=None):
+        sessions[name] = FakeSession(name)
+        return sessions[name]
+
+    monkeypatch.setattr(PredictBase, "get_onnx_session", fake_session)
+    args = infer_args().parse_args([])
+    args.rec_microbatch = False
+    return TextSystem(args), sessions
+
+
+def test_regions_skip_detection(monkeypatch):
+    system, sessions = _make_system(monkeypatch)
+    character = system.text_recognizer.postprocess_op.character
+    page = np.full((200, 300, 3), 255, dtype=np.uint8)
+    page[20:50, 20:200] = 0
+
+    rec_res = system.recognize_regions(page, [
+        [[250, 120], [290, 120], [290, 150], [250, 150]],  # blank
+        [[210, 15], [10, 55], [10, 15], [210, 55]],  # ink, points out of order
+        [[40, 40], [40, 40], [40, 41], [40, 41]],  # degenerate
+        [[-10, 10], [320, 10], [320, 60], [-10, 60]],  # reaches past the page
+    ])
+
+    assert [text for text, _ in rec_res] == ["", character[20], "", character[20]]
+    assert rec_res[2] == ("", 0.0)
+    assert sessions["det"].inputs == []
+    assert system.crop_stats() == {"slice": 3, "warp": 0}
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from lib.onnx_ocr.predict_system import sorted_boxes
+
+
+def _legacy_sorted_boxes(dt_boxes):
+    """Sort + adjacent-swap pass as shipped before the line-grouping sort"""
+    num_boxes = dt_boxes.shape[0]
+    _boxes = list(sorted(dt_boxes, key=lambda x: (x[0][1], x[0][0])))
+    for i in range(num_boxes - 1):
+        for j in range(i, -1, -1):
+            if abs(_boxes[j + 1][0][1] - _boxes[j][0][1]) < 10 and (
+                _boxes[j + 1][0][0] < _boxes[j][0][0]
+            ):
+                _boxes[j], _boxes[j + 1] = _boxes[j + 1], _boxes[j]
+            else:
+                break
+    return _boxes
+
+
+def _boxes(seed, count, y_jitter):
+    rng = np.random.default_rng(seed)
+    line = rng.integers(0, count // 4 + 1, count)
+    x0 = rng.integers(0, 800, count).astype(np.float32)
+    y0 = (line * 40 + rng.integers(0, y_jitter + 1, count)).astype(np.float32)
+    w, h = rng.integers(10, 120, count), rng.integers(10, 30, count)
+    return np.stack([
+        np.stack([x0, y0], 1), np.stack([x0 + w, y0], 1),
+        np.stack([x0 + w, y0 + h], 1), np.stack([x0, y0 + h], 1),
+    ], axis=1).astype(np.float32)
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("y_jitter", [0, 8, 30])
+def test_ltr_matches_legacy_order(seed, y_jitter):
+    boxes = _boxes(seed, 300, y_jitter)
+    expected = _legacy_sorted_boxes(boxes)
+    result = sorted_boxes(boxes)
+    assert len(result) == len(expected)
+    assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+
+
+def test_rtl_reads_lines_right_to_left():
+    boxes = np.array([
+        [[10, 0], [50, 0], [50, 20], [10, 20]],
+        [[200, 4], [260, 4], [260, 24], [200, 24]],
+        [[100, 2], [150, 2], [150, 22], [100, 22]],
+        [[30, 60], [90, 60], [90, 80], [30, 80]],
+    ], dtype=np.float32)
+    order = [box[0][0] for box in sorted_boxes(boxes, reading_order="rtl")]
+    assert order == [200, 100, 10, 30]
+    assert sorted_boxes(np.array([]), reading_order="rtl") == []
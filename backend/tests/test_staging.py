@@ -0,0 +1,38 @@
+import numpy as np
+
+from lib.onnx_ocr.predict_cls import TextClassifier
+from lib.onnx_ocr.predict_rec import TextRecognizer
+from lib.onnx_ocr.utils import infer_args
+
+
+def _crops(seed, count):
+    rng = np.random.default_rng(seed)
+    return [
+        rng.integers(0, 256, size=(int(rng.integers(20, 60)), int(rng.integers(10, 900)), 3), dtype=np.uint8)
+        for _ in range(count)
+    ]
+
+
+def test_rec_staging_matches_per_crop_preprocessing():
+    recognizer = object.__new__(TextRecognizer)
+    recognizer.rec_image_shape = [3, 48, 320]
+    recognizer.rec_algorithm = "SVTR_LCNet"
+
+    # The second, narrower batch reuses the dirty buffer of the first
+    for seed, count, max_wh_ratio in ((0, 8, 20.0), (1, 3, 320 / 48)):
+        crops = _crops(seed, count)
+        indices = list(range(count))
+        expected = np.concatenate([
+            recognizer.resize_norm_img(crop, max_wh_ratio)[np.newaxis, :] for crop in crops
+        ])
+        staged = recognizer.norm_img_batch(crops, indices, max_wh_ratio)
+        assert staged.dtype == np.float32 and staged.flags.c_contiguous
+        assert np.array_equal(staged, expected)
+
+
+def test_cls_staging_matches_per_crop_preprocessing():
+    classifier = TextClassifier(infer_args().parse_args(["--use_gpu", "false"]))
+    for seed, count in ((2, 6), (3, 2)):
+        crops = _crops(seed, count)
+        expected = np.concatenate([classifier.resize_norm_img(crop)[np.newaxis, :] for crop in crops])
+        assert np.array_equal(classifier.norm_img_batch(crops, list(range(count))), expected)